@@ -0,0 +1,65 @@
+# Cost of Auth role/ability requirement check, set lookups vs compiled bitmasks
+#   $ ENV=testing python benchmarks/auth_permission.py
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+)
+os.environ.setdefault('ENV', 'testing')
+
+from typing import Callable, FrozenSet, List, Tuple, Union
+
+from seed.depends.auth.grants import GrantRegistry, GrantRequirement
+
+
+NUMBER: int = 100000
+
+
+def check_has(
+    has: FrozenSet[str],
+    check: List[Union[Tuple[str], str]]
+) -> bool:
+    for item in check:
+        if isinstance(item, tuple):
+            if not any(i in has for i in item):
+                return False
+        elif item not in has:
+            return False
+
+    return True
+
+
+def measure(func: Callable[[], bool]) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f'{"case":<40}{"sets us/op":>12}{"bits us/op":>12}')
+
+    for size in (2, 8, 32):
+        roles: List[Union[Tuple[str], str]] = [
+            tuple(f'role-{i}-{j}' for j in range(3)) for i in range(size)
+        ]
+        abilities: List[Union[Tuple[str], str]] = [f'ability-{i}' for i in range(size)]
+
+        has_roles: FrozenSet[str] = frozenset(f'role-{i}-2' for i in range(size))
+        has_abilities: FrozenSet[str] = frozenset(abilities)
+
+        registry: GrantRegistry = GrantRegistry()
+        requirement: GrantRequirement = GrantRequirement.compile(
+            registry, roles=roles, abilities=abilities
+        )
+        grants: int = registry.grants(has_roles, has_abilities)
+
+        sets: float = measure(
+            lambda: check_has(has_roles, roles) and check_has(has_abilities, abilities)
+        )
+        bits: float = measure(lambda: requirement.check(grants))
+
+        print(f'{f"{size} role clauses, {size} abilities":<40}{sets:>12.2f}{bits:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Per-request cost of JWTToken on the Auth path
+#   $ ENV=testing python benchmarks/jwt_token.py
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+)
+os.environ.setdefault('ENV', 'testing')
+
+from typing import Callable, Tuple
+
+from seed.depends.auth.cache import reset_caches
+from seed.depends.auth.types import JWTToken
+from seed.setting import setting
+
+
+NUMBER: int = 20000
+
+
+def auth_path(credential: str) -> Tuple[str, str]:
+    token: JWTToken = JWTToken(credential)
+
+    return token.subject, token.token_type
+
+
+def all_fields(credential: str) -> Tuple[str, str]:
+    token: JWTToken = JWTToken(credential)
+
+    token.secrets, token.expires, token.created_at  # Fields that used to be built eagerly
+
+    return token.subject, token.token_type
+
+
+def measure(func: Callable[[str], Tuple[str, str]], credential: str) -> float:
+    func(credential)  # Warm up, fill claims cache
+
+    return min(timeit.repeat(
+        lambda: func(credential), number=NUMBER, repeat=3
+    )) / NUMBER * 1e6
+
+
+def main() -> None:
+    credential: str = JWTToken.build(
+        subject='bench@seed.com',
+        secrets={'foo': 'bar'},
+        expires='1h',
+    ).credential
+
+    print(f'{"case":<50}{"us/op":>10}')
+
+    for claims_cache in (False, True):
+        setting.jwt.claims_cache.enable = claims_cache
+        reset_caches()
+
+        for name, func in (('all fields (eager)', all_fields), ('subject, token_type (lazy)', auth_path)):
+            case: str = f'{name}, claims_cache={claims_cache}'
+
+            print(f'{case:<50}{measure(func, credential):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
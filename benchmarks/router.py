@@ -0,0 +1,94 @@
+# Per-request overhead of seed Route endpoints against bare FastAPI routes, ASGI app called directly
+#   $ ENV=testing python benchmarks/router.py
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+)
+os.environ.setdefault('ENV', 'testing')
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from typing import Any, Dict, List, Tuple
+
+from seed.router import Route, Router
+
+
+NUMBER: int = 20000
+
+
+class Item(Route):
+    @Route.option(default_status_code=201)
+    async def get() -> Dict[str, Any]:
+        return {'foo': 'bar'}
+
+    async def post() -> Tuple[Dict[str, Any], int]:
+        return {'foo': 'bar'}, 201
+
+    def put() -> Dict[str, Any]:
+        return {'foo': 'bar'}
+
+
+def create_app() -> FastAPI:
+    app: FastAPI = FastAPI()
+    router: Router = Router()
+    router += '/seed', Item
+
+    @app.get('/fastapi', status_code=201, response_class=ORJSONResponse)
+    async def fastapi_get() -> Dict[str, Any]:
+        return {'foo': 'bar'}
+
+    @app.put('/fastapi', response_class=ORJSONResponse)
+    def fastapi_put() -> Dict[str, Any]:
+        return {'foo': 'bar'}
+
+    app.include_router(router)
+
+    return app
+
+
+async def measure(app: FastAPI, method: str, path: str) -> float:
+    scope: Dict[str, Any] = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'scheme': 'http', 'query_string': b'', 'headers': [], 'server': ('bench', 80),
+    }
+    messages: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    for _ in range(1000):  # Warm up
+        await app(scope, receive, send)
+
+    started_at: float = time.perf_counter()
+
+    for _ in range(NUMBER):
+        await app(scope, receive, send)
+
+    return (time.perf_counter() - started_at) / NUMBER * 1e6
+
+
+def main() -> None:
+    app: FastAPI = create_app()
+    loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+
+    print(f'{"case":<45}{"us/request":>12}')
+
+    for case, method, path in (
+        ('fastapi, async def', 'GET', '/fastapi'),
+        ('seed Route, async def', 'GET', '/seed'),
+        ('seed Route, async def -> (response, status)', 'POST', '/seed'),
+        ('fastapi, def (starlette threadpool)', 'PUT', '/fastapi'),
+        ('seed Route, def (bounded executor)', 'PUT', '/seed'),
+    ):
+        print(f'{case:<45}{loop.run_until_complete(measure(app, method, path)):>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Burst of concurrent token checks, one HGET per request vs auto-pipelined lookups (needs redis of testing setting)
+#   $ ENV=testing python benchmarks/token_batch.py
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+)
+os.environ.setdefault('ENV', 'testing')
+
+from typing import List, Optional
+from unittest.mock import patch
+
+from seed.depends.auth.batch import AsyncTokenBatcher
+from seed.depends.auth.store import TokenStore, AsyncTokenStore
+
+
+CONCURRENCY: int = 1000
+ROUNDS: int = 20
+
+
+async def burst(batcher: Optional[AsyncTokenBatcher]) -> List[float]:
+    latencies: List[float] = []
+
+    async def verify(i: int) -> None:
+        started_at: float = time.perf_counter()
+
+        with patch('seed.depends.auth.store.get_async_token_batcher', return_value=batcher):
+            await AsyncTokenStore().verify(f'bench-{i}', 'access', f'jti-{i}')
+
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(verify(i) for i in range(CONCURRENCY)))
+
+    return sorted(latencies)
+
+
+def main() -> None:
+    store: TokenStore = TokenStore()
+
+    for i in range(CONCURRENCY):
+        store.create(f'bench-{i}', 'access', f'jti-{i}')
+
+    print(f'{"case":<30}{"redis calls":>12}{"p50 ms":>10}{"p99 ms":>10}')
+
+    for name, batcher in (('hget per request', None), ('auto-pipelined', AsyncTokenBatcher())):
+        latencies: List[float] = asyncio.get_event_loop().run_until_complete(burst(batcher))
+        calls: int = batcher.batches if batcher is not None else len(latencies)
+
+        print(
+            f'{name:<30}{calls:>12}'
+            f'{latencies[len(latencies) // 2]:>10.2f}{latencies[int(len(latencies) * 0.99)]:>10.2f}'
+        )
+
+    store.revoke_many([f'bench-{i}' for i in range(CONCURRENCY)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Token store backends, create / verify / revoke per operation (redis backend needs redis of testing setting)
+#   $ ENV=testing python benchmarks/token_store.py
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+)
+os.environ.setdefault('ENV', 'testing')
+
+from itertools import count
+from typing import Callable, Dict, Iterator
+
+from seed.depends.auth.backends import MemoryTokenStore, SQLiteTokenStore
+from seed.depends.auth.store import BaseTokenStore, TokenStore
+
+
+NUMBER: int = 2000
+
+
+def measure(func: Callable[[], None]) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e6
+
+
+def main() -> None:
+    directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+    stores: Dict[str, BaseTokenStore] = {
+        'redis': TokenStore(),
+        'memory': MemoryTokenStore(),
+        'sqlite': SQLiteTokenStore(path=os.path.join(directory.name, 'tokens.sqlite3')),
+    }
+
+    print(f'{"backend":<10}{"create us/op":>15}{"verify us/op":>15}{"revoke us/op":>15}')
+
+    for name, store in stores.items():
+        ids: Iterator[int] = count()
+
+        create: float = measure(lambda: store.create_many(f'bench-{next(ids)}', {
+            'access': ('access_jti', None), 'refresh': ('refresh_jti', 60),
+        }))
+        verify: float = measure(lambda: store.verify('bench-0', 'access', 'access_jti'))
+
+        ids = count()
+        revoke: float = measure(lambda: store.revoke(f'bench-{next(ids)}'))
+
+        print(f'{name:<10}{create:>15.2f}{verify:>15.2f}{revoke:>15.2f}')
+
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
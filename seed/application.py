@@ -22,10 +22,13 @@ from .exceptions.handlers import (
     request_validation_exception_handler
 )
 from .exceptions.schemas import RequestValidationExceptionSchema
+from .db import db
+from .depends.auth.bulk import BulkRevoker
+from .depends.auth.grants import get_grant_registry
 from .middlewares.server_error import ServerErrorMiddleware
 from .utils.database import make_database_url
 from .setting import setting
-from .routes import router as seed_router
+from .routes import router as seed_router, well_known_router
 
 
 class Application:  # pragma: no cover
@@ -71,6 +74,7 @@ class Application:  # pragma: no cover
             },
         )
 
+        self.app.include_router(well_known_router)
         self.app.include_router(seed_router, prefix=setting.api_prefix)
         self.app.include_router(self.router, prefix=setting.api_prefix)
 
@@ -78,6 +82,7 @@ class Application:  # pragma: no cover
         self.bind_middleware()
         self.bind_integrates()
         self.bind_exception_handlers()
+        self.bind_event_handlers()
 
         self.logger_configure()
 
@@ -98,6 +103,14 @@ class Application:  # pragma: no cover
         self.app.add_exception_handler(RequestValidationError, request_validation_exception_handler)
         self.app.add_exception_handler(PyJWTError, pyjwt_exception_handler)
 
+    def bind_event_handlers(self) -> None:
+        self.app.add_event_handler('startup', self.load_grant_registry)
+        self.app.add_event_handler('shutdown', BulkRevoker.shutdown)
+
+    def load_grant_registry(self) -> None:
+        with db():
+            get_grant_registry().load()
+
     def bind_middleware(self) -> None:
         self.app.add_middleware(
             CORSMiddleware,
@@ -0,0 +1,124 @@
+# Move tokens of 'token:<subject>' keys to hash tagged 'token:{<subject>}' keys, run once right after deploy
+#   $ ENV=production python -m seed.commands.migrate_token_keys --batch-size 1000
+import argparse
+import os
+import time
+
+from fastapi import APIRouter
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from seed.application import Application
+from seed.depends.auth.store import TokenStore
+from seed.depends.redis import RedisContextManager
+
+
+LEGACY_PREFIX: str = 'token:'
+
+
+def legacy_subject(name: Union[bytes, str]) -> Optional[str]:
+    name = name.decode() if isinstance(name, bytes) else name
+
+    if not name.startswith(LEGACY_PREFIX) or name.startswith(f'{LEGACY_PREFIX}{{'):
+        return None  # Already hash tagged
+
+    return name[len(LEGACY_PREFIX):]
+
+
+def legacy_names(batch_size: int = 500) -> Iterator[List[str]]:
+    batch: List[str] = []
+
+    with RedisContextManager() as r:
+        for name in r.scan_iter(match=f'{LEGACY_PREFIX}*', count=batch_size, _type='hash'):  # Not streams of 'token:'
+            if legacy_subject(name) is None:
+                continue
+
+            batch.append(name.decode() if isinstance(name, bytes) else name)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    if len(batch):
+        yield batch
+
+
+def migrate(
+    batch_size: int = 500,
+    pause: float = 0.0
+) -> int:
+    migrated: int = 0
+    found: bool = True
+
+    while found:  # Scanned again, until no legacy key is left
+        found = False
+
+        for batch in legacy_names(batch_size=batch_size):
+            found = True
+            migrated += migrate_batch(batch)
+
+            if pause:
+                time.sleep(pause)
+
+    return migrated
+
+
+def migrate_batch(batch: List[str]) -> int:
+    migrated: int = 0
+
+    with RedisContextManager() as r:
+        pipeline: 'Pipeline' = r.pipeline(transaction=False)  # Keys are in different cluster slots
+
+        for name in batch:
+            pipeline.hgetall(name)
+            pipeline.pttl(name)
+            pipeline.exists(TokenStore.name(legacy_subject(name)))
+
+        results: List[Any] = pipeline.execute()
+        pipeline = r.pipeline(transaction=False)
+
+        for i, name in enumerate(batch):
+            tokens, ttl, exists = results[i * 3:i * 3 + 3]
+            tokens: Dict[bytes, bytes]
+            new_name: str = TokenStore.name(legacy_subject(name))
+
+            if len(tokens) and not exists:
+                for token_type, jti in tokens.items():
+                    pipeline.hsetnx(new_name, token_type, jti)  # Tokens issued meanwhile are kept
+
+                if ttl > 0:
+                    pipeline.pexpire(new_name, ttl)
+
+                migrated += 1
+
+            pipeline.unlink(name)
+
+        pipeline.execute()
+
+    return migrated
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Move tokens of 'token:<subject>' keys to 'token:{<subject>}' keys"
+    )
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.01, help='Seconds between batches')
+    parser.add_argument('--env', default=os.environ.get('ENV', 'development'))
+
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:  # pragma: no cover
+    parsed: argparse.Namespace = parse_args(args)
+
+    Application(router=APIRouter(), env=parsed.env).create_app()  # Load setting
+
+    migrated: int = migrate(batch_size=parsed.batch_size, pause=parsed.pause)
+
+    print(f'migrated={migrated}')
+
+    return migrated
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,73 @@
+# Revoke sessions in bulk, without holding request workers
+#   $ ENV=production python -m seed.commands.revoke_sessions --role user --batch-size 1000
+import argparse
+import arrow
+import os
+
+from fastapi import APIRouter
+from typing import Iterable, List, Optional
+
+from seed.application import Application
+from seed.db import db
+from seed.depends.auth.bulk import BulkRevoker, RevokeProgress
+from seed.setting import setting
+from seed.utils.convert import units_to_seconds
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description='Revoke tokens of selected users, in pipelined batches'
+    )
+    parser.add_argument('--user-ids', type=int, nargs='+', help='Users of ids')
+    parser.add_argument('--role', help='Users who have role')
+    parser.add_argument('--banned-since', help="Users banned in period, like '1d', '12h'")
+    parser.add_argument('--all', action='store_true', help='Every stored token, scanned from redis')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.01, help='Seconds between batches')
+    parser.add_argument('--env', default=os.environ.get('ENV', 'development'))
+
+    parsed: argparse.Namespace = parser.parse_args(args)
+
+    if not parsed.all and parsed.user_ids is None and parsed.role is None and parsed.banned_since is None:
+        parser.error('--user-ids, --role, --banned-since or --all is required')
+
+    return parsed
+
+
+def print_progress(progress: RevokeProgress) -> None:
+    print(
+        f'[{progress.job_id}] batches={progress.batches} selected={progress.selected} '
+        f'revoked={progress.revoked} elapsed={progress.elapsed:.2f}s '
+        f'throughput={progress.throughput:.1f}/s'
+    )
+
+
+def main(args: Optional[List[str]] = None) -> RevokeProgress:  # pragma: no cover
+    parsed: argparse.Namespace = parse_args(args)
+
+    Application(router=APIRouter(), env=parsed.env).create_app()  # Load setting, bind database
+
+    revoker: BulkRevoker = BulkRevoker(
+        batch_size=parsed.batch_size,
+        pause=parsed.pause,
+        progress=print_progress,
+    )
+
+    with db():
+        if parsed.all:
+            subjects: Iterable[str] = BulkRevoker.scan_subjects(batch_size=parsed.batch_size)
+        else:
+            subjects: Iterable[str] = BulkRevoker.user_subjects(
+                user_ids=parsed.user_ids,
+                role=parsed.role,
+                banned_since=arrow.now(setting.timezone).shift(
+                    seconds=-units_to_seconds(parsed.banned_since)
+                ).naive if parsed.banned_since else None,
+                batch_size=parsed.batch_size,
+            )
+
+        return revoker.run(subjects)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -2,10 +2,14 @@ from typing import List
 
 from .auth import *  # noqa: F401
 from .context_logger import ContextLogger  # noqa: F401
-from .redis import RedisContextManager, Redis  # noqa: F401
+from .redis import (  # noqa: F401
+    RedisContextManager, Redis,
+    AsyncRedisContextManager, AsyncRedis
+)
 
 
 __all__: List[str] = [
     'Auth', 'JWTToken', 'ContextLogger',
-    'RedisContextManager', 'Redis'
+    'RedisContextManager', 'Redis',
+    'AsyncRedisContextManager', 'AsyncRedis'
 ]  # pragma: no cover
@@ -1,11 +1,13 @@
 from typing import List
 
-from .depend import Auth  # noqa: F401
+from .depend import Auth, AuthContext, AsyncAuth, AsyncAuthContext, context_subject  # noqa: F401
+from .store import TokenStore, AsyncTokenStore  # noqa: F401
 from .types import JWTToken  # noqa: F401
 
 
 __all__: List[str] = [
-    'Auth', 'JWTToken'
+    'Auth', 'AuthContext', 'AsyncAuth', 'AsyncAuthContext',
+    'JWTToken', 'TokenStore', 'AsyncTokenStore'
 ]  # pragma: no cover
 
 __version__ = '0.0.1'  # pragma: no cover
@@ -0,0 +1,295 @@
+import sqlite3
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from seed.setting import setting
+
+from .store import BaseTokenStore, TokenStore, AsyncTokenStore
+
+
+class MemoryTokenStore(BaseTokenStore):
+    _lock: threading.Lock = threading.Lock()
+    _tokens: Dict[str, Tuple[Dict[str, str], Optional[float]]] = {}  # Shared in process, like one redis
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._tokens.clear()
+
+    @staticmethod
+    def _expired(entry: Optional[Tuple[Dict[str, str], Optional[float]]]) -> bool:
+        return entry is not None and entry[1] is not None and entry[1] <= time.monotonic()
+
+    def _entry(self, subject: str) -> Optional[Tuple[Dict[str, str], Optional[float]]]:
+        entry: Optional[Tuple[Dict[str, str], Optional[float]]] = self._tokens.get(subject)
+
+        if not self._expired(entry):
+            return entry
+
+        with self._lock:  # Expired lazily, on access
+            if self._tokens.get(subject) is entry:  # Not replaced by concurrent create
+                del self._tokens[subject]
+
+        return None
+
+    def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        entry: Optional[Tuple[Dict[str, str], Optional[float]]] = self._entry(subject)
+
+        return None if entry is None else entry[0].get(token_type)
+
+    def ttl(self, subject: str) -> Optional[int]:
+        entry: Optional[Tuple[Dict[str, str], Optional[float]]] = self._entry(subject)
+
+        if entry is None or entry[1] is None:
+            return None
+
+        return max(int(round(entry[1] - time.monotonic())), 0)
+
+    def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        _, expires_in = tokens.get(self.REFRESH_TOKEN, (None, None))
+
+        with self._lock:
+            entry: Optional[Tuple[Dict[str, str], Optional[float]]] = self._tokens.get(subject)
+            stored, expires_at = entry if entry is not None and not self._expired(entry) else ({}, None)
+
+            if expires_in is not None:
+                expires_at = time.monotonic() + expires_in
+
+            self._tokens[subject] = (
+                {**stored, **{t: jti for t, (jti, _) in tokens.items()}}, expires_at
+            )
+
+    def revoke(self, subject: str) -> None:
+        self.revoke_many([subject])
+
+    def revoke_many(self, subjects: List[str]) -> int:
+        with self._lock:
+            entries: List[Optional[Tuple[Dict[str, str], Optional[float]]]] = [
+                self._tokens.pop(subject, None) for subject in subjects
+            ]
+
+        return sum(entry is not None and not self._expired(entry) for entry in entries)  # Expired ones are not counted
+
+    def subjects(self, batch_size: int = 500) -> Iterator[str]:
+        for subject in list(self._tokens):
+            if self._entry(subject) is not None:
+                yield subject
+
+
+class SQLiteTokenStore(BaseTokenStore):
+    PURGE_INTERVAL: float = 60
+
+    _local: threading.local = threading.local()
+    _purged_at: float = 0
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path: str = path or setting.jwt.get('store', {}).get('path', 'tokens.sqlite3')
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connections: Dict[str, sqlite3.Connection] = self._local.__dict__.setdefault('connections', {})
+        connection: Optional[sqlite3.Connection] = connections.get(self.path)
+
+        if connection is None:  # Connection per thread, file is shared by every worker of node
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS tokens ('
+                'subject TEXT NOT NULL, token_type TEXT NOT NULL, jti TEXT NOT NULL, expires_at REAL, '
+                'PRIMARY KEY (subject, token_type))'
+            )
+
+            connections[self.path] = connection
+
+        return connection
+
+    def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        row: Optional[Tuple[str]] = self.connection.execute(
+            'SELECT jti FROM tokens WHERE subject = ? AND token_type = ? '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            (subject, token_type, time.time()),
+        ).fetchone()
+
+        return None if row is None else row[0]
+
+    def ttl(self, subject: str) -> Optional[int]:
+        row: Optional[Tuple[Optional[float]]] = self.connection.execute(
+            'SELECT MIN(expires_at) FROM tokens WHERE subject = ? AND expires_at > ?',
+            (subject, time.time()),
+        ).fetchone()
+
+        return None if row[0] is None else max(int(round(row[0] - time.time())), 0)
+
+    def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        _, expires_in = tokens.get(self.REFRESH_TOKEN, (None, None))
+        now: float = time.time()
+
+        with self.connection as c:
+            c.execute('BEGIN IMMEDIATE')
+            c.execute('DELETE FROM tokens WHERE subject = ? AND expires_at <= ?', (subject, now))
+
+            row: Optional[Tuple[Optional[float]]] = c.execute(
+                'SELECT expires_at FROM tokens WHERE subject = ? LIMIT 1', (subject,)
+            ).fetchone()
+            expires_at: Optional[float] = now + expires_in if expires_in is not None else (
+                row[0] if row is not None else None
+            )
+
+            c.executemany(
+                'INSERT OR REPLACE INTO tokens (subject, token_type, jti, expires_at) VALUES (?, ?, ?, ?)',
+                [(subject, t, jti, expires_at) for t, (jti, _) in tokens.items()],
+            )
+            c.execute('UPDATE tokens SET expires_at = ? WHERE subject = ?', (expires_at, subject))
+
+        self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        if SQLiteTokenStore._purged_at > now - self.PURGE_INTERVAL:
+            return
+
+        SQLiteTokenStore._purged_at = now
+
+        self.connection.execute('DELETE FROM tokens WHERE expires_at <= ?', (now,))
+
+    def revoke(self, subject: str) -> None:
+        self.revoke_many([subject])
+
+    def revoke_many(self, subjects: List[str]) -> int:
+        if not len(subjects):
+            return 0
+
+        placeholders: str = ', '.join('?' * len(subjects))
+
+        with self.connection as c:
+            c.execute('BEGIN IMMEDIATE')
+
+            revoked: int = c.execute(
+                f'SELECT COUNT(DISTINCT subject) FROM tokens WHERE subject IN ({placeholders}) '
+                'AND (expires_at IS NULL OR expires_at > ?)',
+                (*subjects, time.time()),
+            ).fetchone()[0]
+
+            c.execute(f'DELETE FROM tokens WHERE subject IN ({placeholders})', subjects)
+
+        return revoked
+
+    def subjects(self, batch_size: int = 500) -> Iterator[str]:
+        last: str = ''
+
+        while True:
+            rows: List[Tuple[str]] = self.connection.execute(
+                'SELECT DISTINCT subject FROM tokens WHERE subject > ? '
+                'AND (expires_at IS NULL OR expires_at > ?) ORDER BY subject LIMIT ?',
+                (last, time.time(), batch_size),
+            ).fetchall()
+
+            for subject, in rows:
+                yield subject
+
+            if len(rows) < batch_size:
+                break
+
+            last = rows[-1][0]
+
+
+class AsyncLocalTokenStore:
+    def __init__(
+        self,
+        store: BaseTokenStore,
+        offload: bool = False
+    ) -> None:
+        self.store: BaseTokenStore = store
+        self.offload: bool = offload  # File backends are run on threadpool, memory stays on loop
+
+    async def _call(self, func: Callable[..., Any], *args) -> Any:
+        if self.offload:
+            return await run_in_threadpool(func, *args)
+
+        return func(*args)
+
+    async def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        return await self._call(self.store.get, subject, token_type)
+
+    async def verify(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str
+    ) -> bool:
+        return await self._call(self.store.verify, subject, token_type, jti)
+
+    async def ttl(self, subject: str) -> Optional[int]:
+        return await self._call(self.store.ttl, subject)
+
+    async def create(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str,
+        expires_in: Optional[int] = None
+    ) -> None:
+        await self._call(self.store.create, subject, token_type, jti, expires_in)
+
+    async def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        await self._call(self.store.create_many, subject, tokens)
+
+    async def revoke(self, subject: str) -> None:
+        await self._call(self.store.revoke, subject)
+
+    async def revoke_many(self, subjects: List[str]) -> int:
+        return await self._call(self.store.revoke_many, subjects)
+
+
+def token_store_backend() -> str:
+    return setting.jwt.get('store', {}).get('backend', 'redis')
+
+
+def get_token_store() -> BaseTokenStore:
+    backend: str = token_store_backend()
+
+    if backend == 'memory':
+        return MemoryTokenStore()
+
+    if backend == 'sqlite':
+        return SQLiteTokenStore()
+
+    return TokenStore()
+
+
+def get_async_token_store() -> Union[AsyncTokenStore, AsyncLocalTokenStore]:
+    backend: str = token_store_backend()
+
+    if backend == 'memory':
+        return AsyncLocalTokenStore(MemoryTokenStore())
+
+    if backend == 'sqlite':
+        return AsyncLocalTokenStore(SQLiteTokenStore(), offload=True)
+
+    return AsyncTokenStore()
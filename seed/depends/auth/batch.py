@@ -0,0 +1,227 @@
+import asyncio
+import os
+import threading
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from seed.depends.redis import RedisContextManager, AsyncRedisContextManager
+from seed.setting import feature_enabled, setting
+
+
+class LookupBatch:
+    __slots__ = ('lookups', 'results', 'error', 'done')
+
+    def __init__(self) -> None:
+        self.lookups: List[Tuple[str, str]] = []
+        self.results: List[Optional[bytes]] = []
+        self.error: Optional[Exception] = None
+        self.done: threading.Event = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.lookups)
+
+    def add(
+        self,
+        name: str,
+        key: str
+    ) -> int:
+        self.lookups.append((name, key))
+
+        return len(self.lookups) - 1
+
+    def execute(self) -> None:
+        try:
+            with RedisContextManager() as r:
+                pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+                for name, key in self.lookups:
+                    pipeline.hget(name, key)
+
+                self.results = pipeline.execute()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+
+class TokenBatcher:
+    def __init__(
+        self,
+        window: float = 0.5,
+        max_pending: int = 64
+    ) -> None:
+        self.window: float = window / 1000  # Milliseconds
+        self.max_pending: int = max_pending
+        self.batches: int = 0
+        self.lookups: int = 0
+
+        self._lock: threading.Lock = threading.Lock()
+        self._full: threading.Condition = threading.Condition(self._lock)
+        self._pending: Optional[LookupBatch] = None
+
+    def hget(
+        self,
+        name: str,
+        key: str
+    ) -> Optional[bytes]:
+        with self._lock:
+            batch: Optional[LookupBatch] = self._pending
+            leader: bool = batch is None
+
+            if leader:  # First lookup of window sends the pipeline
+                batch = self._pending = LookupBatch()
+                self.batches += 1
+
+            index: int = batch.add(name, key)
+            self.lookups += 1
+
+            if len(batch) >= self.max_pending:
+                self._pending = None
+                self._full.notify_all()
+            elif leader:
+                self._full.wait(self.window)
+
+                if self._pending is batch:
+                    self._pending = None
+
+        if leader:
+            batch.execute()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        return batch.results[index]
+
+
+class AsyncLookupBatch:
+    __slots__ = ('loop', 'lookups', 'futures', 'handle')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.lookups: List[Tuple[str, str]] = []
+        self.futures: List[asyncio.Future] = []
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return len(self.lookups)
+
+    def add(
+        self,
+        name: str,
+        key: str
+    ) -> asyncio.Future:
+        future: asyncio.Future = self.loop.create_future()
+
+        self.lookups.append((name, key))
+        self.futures.append(future)
+
+        return future
+
+    async def execute(self) -> None:
+        try:
+            async with AsyncRedisContextManager() as r:
+                pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+                for name, key in self.lookups:
+                    pipeline.hget(name, key)
+
+                results: List[Any] = await pipeline.execute()
+        except Exception as e:
+            for future in self.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future, result in zip(self.futures, results):
+                if not future.done():  # Waiter may be cancelled
+                    future.set_result(result)
+
+
+class AsyncTokenBatcher:
+    def __init__(
+        self,
+        window: float = 0.5,
+        max_pending: int = 64
+    ) -> None:
+        self.window: float = window / 1000
+        self.max_pending: int = max_pending
+        self.batches: int = 0
+        self.lookups: int = 0
+
+        self._pending: Optional[AsyncLookupBatch] = None
+
+    async def hget(
+        self,
+        name: str,
+        key: str
+    ) -> Optional[bytes]:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        batch: Optional[AsyncLookupBatch] = self._pending
+
+        if batch is None or batch.loop is not loop:  # Futures are bound to their event loop
+            batch = self._pending = AsyncLookupBatch(loop)
+            batch.handle = loop.call_later(self.window, self._flush, batch)
+            self.batches += 1
+
+        future: asyncio.Future = batch.add(name, key)
+        self.lookups += 1
+
+        if len(batch) >= self.max_pending:
+            batch.handle.cancel()
+            self._flush(batch)
+
+        return await future
+
+    def _flush(self, batch: AsyncLookupBatch) -> None:
+        if self._pending is batch:
+            self._pending = None
+
+        batch.loop.create_task(batch.execute())
+
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_batchers: Optional[Tuple[TokenBatcher, AsyncTokenBatcher]] = None
+
+
+def _get_batchers() -> Optional[Tuple[TokenBatcher, AsyncTokenBatcher]]:
+    global _pid, _batchers
+
+    if not feature_enabled('jwt', 'verify_batch'):
+        return None
+
+    if _batchers is not None and _pid == os.getpid():
+        return _batchers
+
+    with _lock:
+        if _batchers is None or _pid != os.getpid():
+            batch_setting: Dict[str, Any] = setting.jwt.verify_batch
+            kwargs: Dict[str, Any] = {
+                'window': batch_setting.get('window', 0.5),
+                'max_pending': batch_setting.get('max_pending', 64),
+            }
+
+            _batchers = (TokenBatcher(**kwargs), AsyncTokenBatcher(**kwargs))
+            _pid = os.getpid()
+
+    return _batchers
+
+
+def get_token_batcher() -> Optional[TokenBatcher]:
+    batchers: Optional[Tuple[TokenBatcher, AsyncTokenBatcher]] = _get_batchers()
+
+    return None if batchers is None else batchers[0]
+
+
+def get_async_token_batcher() -> Optional[AsyncTokenBatcher]:
+    batchers: Optional[Tuple[TokenBatcher, AsyncTokenBatcher]] = _get_batchers()
+
+    return None if batchers is None else batchers[1]
+
+
+def reset_token_batchers() -> None:
+    global _pid, _batchers
+
+    with _lock:
+        _pid, _batchers = None, None
@@ -0,0 +1,214 @@
+import datetime
+import orjson
+import threading
+import time
+import uuid
+
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import status
+
+from seed.db import db
+from seed.depends.redis import RedisContextManager
+from seed.exceptions import AdminHTTPException
+from seed.logger import logger
+from seed.models import UserModel, UserRoleModel, UserBanModel
+from seed.setting import setting
+
+from .backends import get_token_store
+from .store import BaseTokenStore
+
+
+class RevokeProgress:
+    __slots__ = ('job_id', 'selected', 'revoked', 'batches', 'started_at', 'finished_at', 'error')
+
+    def __init__(self, job_id: Optional[str] = None) -> None:
+        self.job_id: str = job_id or str(uuid.uuid4())
+        self.selected: int = 0
+        self.revoked: int = 0
+        self.batches: int = 0
+        self.started_at: float = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        return self.selected / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'selected': self.selected,
+            'revoked': self.revoked,
+            'batches': self.batches,
+            'elapsed': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 1),
+            'finished': self.finished_at is not None,
+            'error': self.error,
+        }
+
+
+class BulkRevoker:
+    JOB_TTL: int = 60 * 60 * 24
+
+    _lock: threading.Lock = threading.Lock()
+    _running: Dict[str, 'BulkRevoker'] = {}  # Background jobs of this worker
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        pause: float = 0.01,
+        progress: Optional[Callable[[RevokeProgress], None]] = None,
+        job_id: Optional[str] = None
+    ) -> None:
+        self.batch_size: int = batch_size
+        self.pause: float = pause  # Seconds between batches, leaves room for request traffic
+        self.progress: Optional[Callable[[RevokeProgress], None]] = progress
+        self.job_id: Optional[str] = job_id
+
+        self._stop: threading.Event = threading.Event()
+        self._progress: Optional[RevokeProgress] = None
+
+    @staticmethod
+    def job_name(job_id: str) -> str:
+        return f'revoke:job:{job_id}'
+
+    @classmethod
+    def get_job(cls, job_id: str) -> Optional[Dict[str, Any]]:
+        with RedisContextManager() as r:
+            data: Optional[bytes] = r.get(cls.job_name(job_id))
+
+        return None if data is None else orjson.loads(data)
+
+    def save_job(self, progress: RevokeProgress) -> None:
+        with RedisContextManager() as r:
+            r.set(self.job_name(progress.job_id), orjson.dumps(progress.to_dict()), ex=self.JOB_TTL)
+
+    def run(self, subjects: Iterable[str]) -> RevokeProgress:
+        store: BaseTokenStore = get_token_store()
+        progress: RevokeProgress = self._progress or RevokeProgress(self.job_id)
+        subjects: Iterator[str] = iter(subjects)
+
+        try:
+            while True:
+                if self._stop.is_set():
+                    progress.error = 'Worker stopped before job finished'
+                    break
+
+                batch: List[str] = list(islice(subjects, self.batch_size))
+
+                if not len(batch):
+                    break
+
+                progress.revoked += store.revoke_many(batch)
+                progress.selected += len(batch)
+                progress.batches += 1
+
+                self._report(progress)
+
+                time.sleep(self.pause)
+        except Exception as e:
+            progress.error = str(e)
+
+            logger.exception(f'Bulk revocation {progress.job_id} failed')
+
+            raise
+        finally:
+            progress.finished_at = time.time()
+
+            with self._lock:
+                self._running.pop(progress.job_id, None)
+
+            self._report(progress)
+
+        return progress
+
+    def start(self, subjects: Iterable[str]) -> str:
+        max_jobs: int = setting.jwt.get('bulk_revoke', {}).get('max_jobs', 2)
+        progress: RevokeProgress = RevokeProgress(self.job_id)
+
+        with self._lock:
+            if len(self._running) >= max_jobs:
+                raise AdminHTTPException(
+                    symbol='revoke_jobs_exceeded',
+                    message='Too many revocation jobs are running, retry later',
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+
+            self._running[progress.job_id] = self
+
+        try:
+            self.job_id = progress.job_id
+            self._progress = progress
+            self.save_job(progress)
+
+            threading.Thread(
+                target=self.run,
+                args=(subjects,),
+                name=f'bulk-revoker:{self.job_id}',
+                daemon=True,
+            ).start()  # Own thread, request workers and threadpool are not held
+        except Exception:
+            with self._lock:  # Not started, slot is released
+                self._running.pop(progress.job_id, None)
+
+            raise
+
+        return self.job_id
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            revokers: List['BulkRevoker'] = list(cls._running.values())
+
+        for revoker in revokers:  # Daemon threads die with worker, jobs must not stay running
+            revoker._stop.set()
+
+            progress: RevokeProgress = revoker._progress
+            progress.error = 'Worker stopped before job finished'
+            progress.finished_at = time.time()
+
+            revoker.save_job(progress)
+
+    def _report(self, progress: RevokeProgress) -> None:
+        if self.job_id is not None:
+            self.save_job(progress)
+
+        if self.progress is not None:
+            self.progress(progress)
+
+    @classmethod
+    def scan_subjects(cls, batch_size: int = 500) -> Iterator[str]:
+        yield from get_token_store().subjects(batch_size=batch_size)
+
+    @classmethod
+    def user_subjects(
+        cls,
+        user_ids: Optional[List[int]] = None,
+        role: Optional[str] = None,
+        banned_since: Optional[datetime.datetime] = None,
+        batch_size: int = 500
+    ) -> Iterator[str]:
+        user_key_field: 'Column' = getattr(UserModel, setting.user_key_field)
+        query: 'Query' = db.session.query(user_key_field)
+
+        if user_ids is not None:
+            query = query.filter(UserModel.id.in_(user_ids))
+
+        if role is not None:
+            query = query.filter(UserModel.id.in_(
+                db.session.query(UserRoleModel.user_id).filter(UserRoleModel.role_ == role)
+            ))
+
+        if banned_since is not None:
+            query = query.filter(UserModel.id.in_(
+                db.session.query(UserBanModel.user_id).filter(UserBanModel.created_at >= banned_since)
+            ))
+
+        for subject, in query.order_by(UserModel.id).yield_per(batch_size):
+            yield subject
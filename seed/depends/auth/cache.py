@@ -0,0 +1,249 @@
+import hashlib
+import orjson
+import os
+import redis
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from seed.depends.redis import get_redis
+from seed.logger import logger
+from seed.setting import feature_enabled, setting
+
+
+class TokenCache:
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 5
+    ) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.generation: int = 0
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Tuple[str, float]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        with self._lock:
+            entry: Optional[Dict[str, Tuple[str, float]]] = self._entries.get(subject)
+
+            if entry is None or token_type not in entry:
+                return None
+
+            jti, expires_at = entry[token_type]
+
+            if expires_at < time.monotonic():
+                del entry[token_type]
+                return None
+
+            self._entries.move_to_end(subject)
+
+            return jti
+
+    def set(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str,
+        generation: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # Invalidated while the value was being fetched
+
+            self._entries.setdefault(subject, {})[token_type] = (
+                jti, time.monotonic() + self.ttl
+            )
+            self._entries.move_to_end(subject)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(
+        self,
+        subject: str,
+        token_type: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            self.generation += 1
+
+            if token_type is None:
+                self._entries.pop(subject, None)
+            elif subject in self._entries:
+                self._entries[subject].pop(token_type, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class ClaimsCache:
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize: int = maxsize
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[bytes, Tuple[float, Any]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        credential: str,
+        algorithm: str
+    ) -> bytes:
+        return hashlib.sha256(f'{algorithm}${credential}'.encode()).digest()
+
+    def get(
+        self,
+        credential: str,
+        algorithm: str
+    ) -> Optional[Any]:
+        key: bytes = self.key(credential, algorithm)
+
+        with self._lock:
+            entry: Optional[Tuple[float, Any]] = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, parsed = entry
+
+            if expires_at < int(time.time()):  # Same rule as jwt 'exp' validation, let decode raise
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return parsed
+
+    def set(
+        self,
+        credential: str,
+        algorithm: str,
+        expires_at: Optional[float],
+        parsed: Any
+    ) -> None:
+        key: bytes = self.key(credential, algorithm)
+
+        with self._lock:
+            self._entries[key] = (
+                float('inf') if expires_at is None else expires_at, parsed
+            )
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheSubscriber(threading.Thread):
+    def __init__(
+        self,
+        cache: Any,
+        channel: str
+    ) -> None:
+        super().__init__(name=f'cache-subscriber:{channel}', daemon=True)
+
+        self.cache: Any = cache
+        self.channel: str = channel
+        self.running: bool = True
+
+    def run(self) -> None:  # pragma: no cover
+        while self.running:
+            try:
+                pubsub: 'PubSub' = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+
+                self.cache.clear()  # Messages may have been missed while not subscribed
+
+                while self.running:
+                    message: Optional[Dict[str, Any]] = pubsub.get_message(timeout=1.0)
+
+                    if message is not None:
+                        self.cache.invalidate(**orjson.loads(message['data']))
+
+                pubsub.close()
+            except redis.RedisError as e:
+                logger.warning(f"Cache subscriber of '{self.channel}' disconnected: {e}")
+
+                self.cache.clear()
+                time.sleep(1)
+
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_cache: Optional[TokenCache] = None
+_claims_cache: Optional[ClaimsCache] = None
+
+
+def get_token_cache() -> Optional[TokenCache]:
+    global _pid, _cache
+
+    if not feature_enabled('jwt', 'verify_cache'):
+        return None
+
+    if _cache is not None and _pid == os.getpid():
+        return _cache
+
+    with _lock:
+        if _cache is None or _pid != os.getpid():
+            _cache = TokenCache(
+                maxsize=setting.jwt.verify_cache.get('maxsize', 10000),
+                ttl=setting.jwt.verify_cache.get('ttl', 5),
+            )
+            _pid = os.getpid()
+
+            CacheSubscriber(
+                cache=_cache,
+                channel=invalidate_channel(),
+            ).start()
+
+    return _cache
+
+
+def get_claims_cache() -> Optional[ClaimsCache]:
+    global _claims_cache
+
+    if not feature_enabled('jwt', 'claims_cache'):
+        return None
+
+    if _claims_cache is None:
+        _claims_cache = ClaimsCache(maxsize=setting.jwt.claims_cache.get('maxsize', 10000))
+
+    return _claims_cache
+
+
+def reset_caches() -> None:
+    global _pid, _cache, _claims_cache
+
+    with _lock:
+        if _cache is not None:
+            _cache.clear()
+
+        _pid, _cache, _claims_cache = None, None, None
+
+
+def invalidate_channel() -> str:
+    return setting.jwt.get('verify_cache', {}).get('channel', 'token:invalidate')
+
+
+def invalidate_message(
+    subject: str,
+    token_type: Optional[str] = None
+) -> bytes:
+    return orjson.dumps({'subject': subject, 'token_type': token_type})
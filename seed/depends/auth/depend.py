@@ -2,27 +2,65 @@ from fastapi import (
     Header,
     Request
 )
-from typing import Callable, List, Optional, Tuple, Union, Set
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
 from seed.db import db
 from seed.exceptions import AuthHTTPException
 from seed.models import UserModel
 from seed.setting import setting
 
+from .grants import GrantRequirement, GrantVersions, get_grant_registry, get_grant_versions
+from .permission import PermissionQuery
+from .principal import Principal, PrincipalCache, get_principal_cache
 from .types import JWTToken, JWTTokenType
 from .util import AuthUtil
 
 
-class Auth(AuthUtil, JWTTokenType):
-    user: Optional[UserModel] = None
-    token: Optional[JWTToken] = None
+class AuthContext(AuthUtil, JWTTokenType):
+    __slots__ = ('auth', 'token', '_user', '_principal')
 
+    def __init__(
+        self,
+        auth: 'Auth',
+        token: Optional[JWTToken] = None
+    ) -> None:
+        self.auth: 'Auth' = auth
+        self.token: Optional[JWTToken] = token
+
+        self._user: Optional[UserModel] = None
+        self._principal: Optional[Principal] = None
+
+    @property
+    def user(self) -> Optional[UserModel]:
+        if self._user is None and self.token is not None:
+            self._user = self.auth._user_loader(self.token.subject)
+
+        return self._user
+
+    @property
+    def principal(self) -> Optional[Principal]:
+        if self._principal is None and self.token is not None:
+            self._principal = self.auth._principal_loader(self.token.subject)
+
+        return self._principal
+
+    @property
+    def grants(self) -> int:
+        if self.principal is None:
+            return 0
+
+        return self.principal.grants
+
+
+class Auth(AuthUtil, JWTTokenType):
     def __init__(
         self,
         required: bool = False,
         token_type: Optional[str] = None,
         roles: List[Union[Tuple[str], str]] = None,
-        abilities: List[Union[Tuple[str], str]] = None
+        abilities: List[Union[Tuple[str], str]] = None,
+        sql_permission: bool = False
     ) -> None:
         self.required: bool = required
         self.token_type: str = token_type or self.ACCESS_TOKEN
@@ -30,71 +68,112 @@ class Auth(AuthUtil, JWTTokenType):
         self.roles: List[Union[Tuple[str], str]] = roles or []
         self.abilities: List[Union[Tuple[str], str]] = abilities or []
 
+        self.requirement: GrantRequirement = GrantRequirement.compile(
+            get_grant_registry(),
+            roles=self.roles,
+            abilities=self.abilities,
+        )
+        self.permission_query: Optional[PermissionQuery] = (
+            PermissionQuery(roles=self.roles, abilities=self.abilities)
+            if sql_permission else None
+        )
+
     def __call__(
         self,
         request: Request,
         authorization: Optional[str] = Header(None)
-    ) -> 'Auth':
+    ) -> AuthContext:
+        context: AuthContext = self._create_context(
+            AuthContext, request=request, authorization=authorization
+        )
+
+        if context.token is not None:
+            if not context.token.verify():
+                self._raise_not_verified()
+
+            if self.requirement and self.permission_query is not None:
+                self._check_permission_query(context)
+            elif self.requirement:
+                self._load_claim_principal(context)
+                self._check_permission(context)
+
+        return context
+
+    def _create_context(
+        self,
+        context_class: Type[AuthContext],
+        request: Request,
+        authorization: Optional[str] = None
+    ) -> AuthContext:
         credential: Optional[str] = self._get_credential(
             request=request,
             authorization=authorization
         )
 
+        context: AuthContext = context_class(self)
+
         if credential is not None:
-            self.token: JWTToken = JWTToken(credential)
+            context.token = JWTToken(credential)
 
-            if self.token.token_type != self.token_type:
+            if context.token.token_type != self.token_type:
                 raise AuthHTTPException(
                     symbol='auth_token_type_not_correct',
                     message=f"Token type must be '{self.token_type}'",
                 )
-
-            if not self.token.verify():
-                raise AuthHTTPException(
-                    symbol='auth_token_expired_or_not_verified',
-                    message='Signature has expired or not verified',
-                )
-
-            self.user: Optional[UserModel] = self._user_loader(self.token.subject)
-
-            if len(self.roles) or len(self.abilities):
-                self._check_permission()
         elif self.required:
             raise AuthHTTPException(
                 symbol='auth_token_required',
                 message='JWT credential required',
             )
 
-        return self
+        return context
+
+    def _raise_not_verified(self) -> None:
+        raise AuthHTTPException(
+            symbol='auth_token_expired_or_not_verified',
+            message='Signature has expired or not verified',
+        )
+
+    def _load_claim_principal(self, context: AuthContext) -> None:
+        claim: Optional[Dict[str, Any]] = context.token.grants
+        versions: Optional[GrantVersions] = get_grant_versions()
+
+        if claim is None or versions is None:
+            return
 
-    def _check_permission(self) -> None:
-        if self.user is None:
+        if versions.is_current(claim['id'], claim['version']):
+            context._principal = Principal.from_dict(claim)
+
+    async def _load_claim_principal_async(self, context: AuthContext) -> None:
+        claim: Optional[Dict[str, Any]] = context.token.grants
+        versions: Optional[GrantVersions] = get_grant_versions()
+
+        if claim is None or versions is None:
+            return
+
+        if await versions.is_current_async(claim['id'], claim['version']):
+            context._principal = Principal.from_dict(claim)
+
+    def _check_permission(self, context: AuthContext) -> None:
+        principal: Optional[Principal] = context.principal
+
+        if principal is None:
             raise AuthHTTPException(
                 symbol='auth_user_not_exists',
                 message='User does not exists',
             )
 
-        roles: Set[str] = set()
-        abilities: Set[str] = set()
-
-        for role in self.user.roles:
-            roles.add(role.role_)
-
-            if len(self.abilities):
-                abilities |= role.abilities
-
-        if not self._check_has(roles, self.roles)\
-           or not self._check_has(abilities, self.abilities):
+        if not self.requirement.check(principal.grants):
             raise AuthHTTPException(
                 symbol='auth_permmision_denied',
                 message='Permission Denied',
             )
 
-        for ban in self.user.bans:
-            if not ban.is_continue:
-                continue
+        if not self.requirement.ban_mask or not principal.bans:
+            return
 
-            if ban.role_ in self.roles or ban.ability_ in self.abilities:
+        for ban in principal.active_bans:
+            if self.requirement.banned(ban.grants):
                 raise AuthHTTPException(
                     symbol='auth_banned_user',
                     message='Banned',
@@ -104,27 +183,27 @@ class Auth(AuthUtil, JWTTokenType):
                     },
                 )
 
-    def _check_has(
-        self,
-        has: Set[str],
-        check: List[Union[Tuple[str], str]]
-    ) -> bool:
-        for item in check:
-            if isinstance(item, tuple):
-                checked: bool = False
-
-                for i in item:
-                    if i in has:
-                        checked = True
-                        break
-
-                if not checked:
-                    return False
-            else:
-                if item not in has:
-                    return False
-
-        return True
+    def _check_permission_query(self, context: AuthContext) -> None:
+        status, ban = self.permission_query.execute(context.token.subject)
+
+        if status == PermissionQuery.NOT_EXISTS:
+            raise AuthHTTPException(
+                symbol='auth_user_not_exists',
+                message='User does not exists',
+            )
+
+        if status == PermissionQuery.DENY:
+            raise AuthHTTPException(
+                symbol='auth_permmision_denied',
+                message='Permission Denied',
+            )
+
+        if status == PermissionQuery.BANNED:
+            raise AuthHTTPException(
+                symbol='auth_banned_user',
+                message='Banned',
+                detail=ban,
+            )
 
     def _get_credential(
         self,
@@ -185,12 +264,95 @@ class Auth(AuthUtil, JWTTokenType):
 
         return credential
 
-    def _user_loader(
+    def _principal_loader(
         self,
         subject: str
+    ) -> Optional[Principal]:
+        principal_cache: Optional[PrincipalCache] = get_principal_cache()
+
+        if principal_cache is None:
+            return Principal.load(subject)
+
+        return principal_cache.load(subject, lambda: Principal.load(subject))
+
+    async def _principal_loader_async(
+        self,
+        subject: str
+    ) -> Optional[Principal]:
+        principal_cache: Optional[PrincipalCache] = get_principal_cache()
+
+        if principal_cache is not None:
+            principal: Optional[Principal] = principal_cache.get_local(subject)
+
+            if principal is not None:  # Served from process memory, no need to leave event loop
+                return principal
+
+        return await run_in_threadpool(self._principal_loader, subject)
+
+    def _user_loader(
+        self,
+        subject: str,
+        *options: Any
     ) -> Optional[UserModel]:  # pragma: no cover
         user_key_field: 'Column' = getattr(UserModel, setting.user_key_field)
 
         return db.session.query(UserModel)\
+            .options(*options)\
             .filter(user_key_field == subject)\
             .first()
+
+
+class AsyncAuthContext(AuthContext):
+    __slots__ = ()
+
+    async def load_user(self, *options: Any) -> Optional[UserModel]:
+        if self._user is None and self.token is not None:
+            self._user = await run_in_threadpool(
+                self.auth._user_loader, self.token.subject, *options
+            )
+
+        return self._user
+
+    async def load_principal(self) -> Optional[Principal]:
+        if self._principal is None and self.token is not None:
+            self._principal = await self.auth._principal_loader_async(self.token.subject)
+
+        return self._principal
+
+
+class AsyncAuth(Auth):
+    _context_class: Type[AsyncAuthContext] = AsyncAuthContext
+
+    async def _verify_async(self, context: AsyncAuthContext) -> bool:
+        return await context.token.verify_async()
+
+    async def __call__(
+        self,
+        request: Request,
+        authorization: Optional[str] = Header(None)
+    ) -> AsyncAuthContext:
+        context: AsyncAuthContext = self._create_context(
+            self._context_class, request=request, authorization=authorization
+        )
+
+        if context.token is not None:
+            if not await self._verify_async(context):
+                self._raise_not_verified()
+
+            if self.requirement and self.permission_query is not None:
+                await run_in_threadpool(self._check_permission_query, context)
+            elif self.requirement:
+                await self._load_claim_principal_async(context)
+                await context.load_principal()
+
+                self._check_permission(context)
+
+        return context
+
+
+def context_subject(arguments: Dict[str, Any]) -> Optional[str]:
+    for value in arguments.values():  # Auth depends are resolved before endpoint is called
+        if isinstance(value, AuthContext) and value.token is not None:
+            return value.token.subject
+
+    return None
@@ -0,0 +1,282 @@
+import orjson
+import os
+import threading
+import time
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from seed.db import db
+from seed.depends.redis import RedisContextManager, AsyncRedisContextManager, publish
+from seed.models import AbilityModel, RoleModel
+from seed.setting import feature_enabled, setting
+
+from .cache import CacheSubscriber
+
+
+class GrantRegistry:
+    ROLE: str = 'role'
+    ABILITY: str = 'ability'
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._bits: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def bit(
+        self,
+        kind: str,
+        name: str
+    ) -> int:
+        key: Tuple[str, str] = (kind, name)
+        bit: Optional[int] = self._bits.get(key)
+
+        if bit is not None:
+            return bit
+
+        with self._lock:
+            if key not in self._bits:  # Names not loaded on startup get the next free position
+                self._bits[key] = 1 << len(self._bits)
+
+            return self._bits[key]
+
+    def mask(
+        self,
+        kind: str,
+        names: Iterable[str]
+    ) -> int:
+        mask: int = 0
+
+        for name in names:
+            if name is not None:
+                mask |= self.bit(kind, name)
+
+        return mask
+
+    def grants(
+        self,
+        roles: Iterable[str] = (),
+        abilities: Iterable[str] = ()
+    ) -> int:
+        return self.mask(self.ROLE, roles) | self.mask(self.ABILITY, abilities)
+
+    def load(self) -> None:
+        for role, in db.session.query(RoleModel.role).order_by(RoleModel.role):
+            self.bit(self.ROLE, role)
+
+        for ability, in db.session.query(AbilityModel.ability).order_by(AbilityModel.ability):
+            self.bit(self.ABILITY, ability)
+
+
+class GrantRequirement:
+    __slots__ = ('clauses', 'ban_mask')
+
+    def __init__(
+        self,
+        clauses: Tuple[int, ...] = (),
+        ban_mask: int = 0
+    ) -> None:
+        self.clauses: Tuple[int, ...] = clauses
+        self.ban_mask: int = ban_mask
+
+    def __bool__(self) -> bool:
+        return len(self.clauses) > 0
+
+    @classmethod
+    def compile(
+        cls,
+        registry: GrantRegistry,
+        roles: List[Union[Tuple[str], str]] = [],
+        abilities: List[Union[Tuple[str], str]] = []
+    ) -> 'GrantRequirement':
+        clauses: List[int] = []
+        ban_mask: int = 0
+
+        for kind, check in ((registry.ROLE, roles), (registry.ABILITY, abilities)):
+            for item in check:
+                if isinstance(item, tuple):
+                    clauses.append(registry.mask(kind, item))
+                else:
+                    clauses.append(registry.bit(kind, item))
+                    ban_mask |= registry.bit(kind, item)
+
+        return cls(clauses=tuple(clauses), ban_mask=ban_mask)
+
+    def check(self, grants: int) -> bool:
+        for clause in self.clauses:
+            if not grants & clause:
+                return False
+
+        return True
+
+    def banned(self, ban_grants: int) -> bool:
+        return bool(ban_grants & self.ban_mask)
+
+
+class GrantVersions:
+    GLOBAL_KEY: str = 'grants:version'
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 5,
+        channel: str = 'grants:invalidate'
+    ) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.channel: str = channel
+        self.generation: int = 0
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: Dict[int, Tuple[List[int], float]] = {}
+
+    @staticmethod
+    def name(user_id: int) -> str:
+        return f'grants:version:{user_id}'
+
+    @staticmethod
+    def _parse(values: List[Optional[bytes]]) -> List[int]:
+        return [int(value or 0) for value in values]
+
+    def fetch(self, user_id: int) -> List[int]:
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)  # Not MGET, keys can be in different cluster slots
+            pipeline.get(self.GLOBAL_KEY)
+            pipeline.get(self.name(user_id))
+
+            return self._parse(pipeline.execute())
+
+    async def fetch_async(self, user_id: int) -> List[int]:
+        async with AsyncRedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+            pipeline.get(self.GLOBAL_KEY)
+            pipeline.get(self.name(user_id))
+
+            return self._parse(await pipeline.execute())
+
+    def get_local(self, user_id: int) -> Optional[List[int]]:
+        entry: Optional[Tuple[List[int], float]] = self._entries.get(user_id)
+
+        if entry is None or entry[1] < time.monotonic():
+            return None
+
+        return entry[0]
+
+    def set_local(
+        self,
+        user_id: int,
+        version: List[int],
+        generation: int
+    ) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+
+            self._entries[user_id] = (version, time.monotonic() + self.ttl)
+
+    def is_current(
+        self,
+        user_id: int,
+        version: List[int]
+    ) -> bool:
+        current: Optional[List[int]] = self.get_local(user_id)
+
+        if current is None:
+            generation: int = self.generation
+            current = self.fetch(user_id)
+
+            self.set_local(user_id, current, generation)
+
+        return current == list(version)
+
+    async def is_current_async(
+        self,
+        user_id: int,
+        version: List[int]
+    ) -> bool:
+        current: Optional[List[int]] = self.get_local(user_id)
+
+        if current is None:
+            generation: int = self.generation
+            current = await self.fetch_async(user_id)
+
+            self.set_local(user_id, current, generation)
+
+        return current == list(version)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            self.generation += 1
+
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def bump(self, user_ids: Optional[Set[int]] = None) -> None:
+        user_ids: List[Optional[int]] = list(user_ids) if user_ids is not None else [None]
+
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+            for user_id in user_ids:
+                self.invalidate(user_id)
+
+                pipeline.incr(self.GLOBAL_KEY if user_id is None else self.name(user_id))
+
+            pipeline.execute()
+
+            if len(user_ids):
+                publish(r, self.channel, *(
+                    orjson.dumps({'user_id': user_id}) for user_id in user_ids
+                ))  # Not pipelined, cluster pipelines reject PUBLISH
+
+
+_registry: GrantRegistry = GrantRegistry()
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_versions: Optional[GrantVersions] = None
+
+
+def get_grant_registry() -> GrantRegistry:
+    return _registry
+
+
+def get_grant_versions() -> Optional[GrantVersions]:
+    global _pid, _versions
+
+    if not feature_enabled('auth', 'token_grants'):
+        return None
+
+    if _versions is not None and _pid == os.getpid():
+        return _versions
+
+    with _lock:
+        if _versions is None or _pid != os.getpid():
+            versions_setting: Dict[str, Any] = setting.auth.token_grants
+
+            _versions = GrantVersions(
+                maxsize=versions_setting.get('maxsize', 10000),
+                ttl=versions_setting.get('ttl', 5),
+                channel=versions_setting.get('channel', 'grants:invalidate'),
+            )
+            _pid = os.getpid()
+
+            CacheSubscriber(cache=_versions, channel=_versions.channel).start()
+
+    return _versions
+
+
+def reset_grant_versions() -> None:
+    global _pid, _versions
+
+    with _lock:
+        _pid, _versions = None, None
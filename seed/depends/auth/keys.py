@@ -0,0 +1,205 @@
+import arrow
+import orjson
+import os
+import threading
+
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from jwt.algorithms import RSAAlgorithm, get_default_algorithms
+from jwt.utils import base64url_encode
+from typing import Any, Dict, List, Optional
+
+from seed.setting import setting
+
+
+class SigningKey:
+    __slots__ = ('kid', 'algorithm', 'private_key', 'public_key', 'not_before', 'not_after')
+
+    def __init__(
+        self,
+        kid: str,
+        algorithm: str,
+        private_key: Optional[Any] = None,
+        public_key: Optional[Any] = None,
+        not_before: Optional[int] = None,
+        not_after: Optional[int] = None
+    ) -> None:
+        self.kid: str = kid
+        self.algorithm: str = algorithm
+        self.private_key: Optional[Any] = private_key
+        self.public_key: Any = public_key if public_key is not None else private_key.public_key()
+        self.not_before: int = not_before or 0
+        self.not_after: Optional[int] = not_after
+
+    def __repr__(self) -> str:
+        return f'<SigningKey kid={self.kid} algorithm={self.algorithm}>'
+
+    @staticmethod
+    def _read(
+        value: Optional[str],
+        path: Optional[str]
+    ) -> Optional[str]:
+        if value is None and path is not None:
+            with open(os.path.join(os.getcwd(), path)) as f:
+                value = f.read()
+
+        return value
+
+    @staticmethod
+    def _timestamp(value: Optional[Any]) -> Optional[int]:
+        if value is None:
+            return None
+
+        return arrow.get(value).int_timestamp
+
+    @classmethod
+    def from_setting(cls, key_setting: Dict[str, Any]) -> 'SigningKey':
+        algorithm: str = key_setting['algorithm']
+        prepare_key: Any = get_default_algorithms()[algorithm].prepare_key
+
+        private_key: Optional[str] = cls._read(
+            key_setting.get('private_key'), key_setting.get('private_key_file')
+        )
+        public_key: Optional[str] = cls._read(
+            key_setting.get('public_key'), key_setting.get('public_key_file')
+        )
+
+        return cls(
+            kid=key_setting['kid'],
+            algorithm=algorithm,
+            private_key=prepare_key(private_key) if private_key else None,
+            public_key=prepare_key(public_key) if public_key else None,
+            not_before=cls._timestamp(key_setting.get('not_before')),
+            not_after=cls._timestamp(key_setting.get('not_after')),
+        )
+
+    def is_active(self, now: int) -> bool:
+        return self.not_before <= now and (self.not_after is None or now < self.not_after)
+
+    def jwk(self) -> Dict[str, Any]:
+        return {
+            **self._public_jwk(self.public_key),
+            'kid': self.kid,
+            'alg': self.algorithm,
+            'use': 'sig',
+        }
+
+    @staticmethod
+    def _public_jwk(public_key: Any) -> Dict[str, str]:
+        if isinstance(public_key, rsa.RSAPublicKey):
+            return orjson.loads(RSAAlgorithm.to_jwk(public_key))
+
+        if isinstance(public_key, ec.EllipticCurvePublicKey):  # Not supported by jwt's to_jwk yet
+            size: int = (public_key.curve.key_size + 7) // 8
+            numbers: 'EllipticCurvePublicNumbers' = public_key.public_numbers()
+
+            return {
+                'kty': 'EC',
+                'crv': {
+                    'secp256r1': 'P-256',
+                    'secp384r1': 'P-384',
+                    'secp521r1': 'P-521',
+                    'secp256k1': 'secp256k1',
+                }[public_key.curve.name],
+                'x': base64url_encode(numbers.x.to_bytes(size, 'big')).decode(),
+                'y': base64url_encode(numbers.y.to_bytes(size, 'big')).decode(),
+            }
+
+        return {
+            'kty': 'OKP',
+            'crv': 'Ed25519',
+            'x': base64url_encode(
+                public_key.public_bytes(Encoding.Raw, PublicFormat.Raw)
+            ).decode(),
+        }
+
+
+class KeySet:
+    def __init__(
+        self,
+        secret: str,
+        algorithm: str = 'HS256',
+        keys: List[SigningKey] = []
+    ) -> None:
+        self.secret: str = secret
+        self.algorithm: str = algorithm
+        self.keys: Dict[str, SigningKey] = {key.kid: key for key in keys}
+
+        self._jwks: Optional[bytes] = None
+        self._jwks_expires_at: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(
+        self,
+        kid: str,
+        now: Optional[int] = None
+    ) -> Optional[SigningKey]:
+        key: Optional[SigningKey] = self.keys.get(kid)
+        now: int = now or arrow.utcnow().int_timestamp
+
+        if key is None or (key.not_after is not None and key.not_after <= now):
+            return None  # Retired keys are not accepted anymore
+
+        return key
+
+    def current(self, now: Optional[int] = None) -> Optional[SigningKey]:
+        now: int = now or arrow.utcnow().int_timestamp
+        current: Optional[SigningKey] = None
+
+        for key in self.keys.values():
+            if key.private_key is None or not key.is_active(now):
+                continue
+
+            if current is None or key.not_before > current.not_before:  # Newest scheduled key signs
+                current = key
+
+        return current
+
+    def jwks(self, now: Optional[int] = None) -> bytes:
+        now: int = now or arrow.utcnow().int_timestamp
+
+        if self._jwks is None or (
+            self._jwks_expires_at is not None and self._jwks_expires_at <= now
+        ):
+            keys: List[SigningKey] = [
+                key for key in self.keys.values()
+                if key.not_after is None or now < key.not_after
+            ]  # Scheduled keys are published before they start signing
+
+            self._jwks = orjson.dumps({'keys': [key.jwk() for key in keys]})
+            self._jwks_expires_at = min(
+                (key.not_after for key in keys if key.not_after is not None),
+                default=None,
+            )
+
+        return self._jwks
+
+
+_lock: threading.Lock = threading.Lock()
+_key_set: Optional[KeySet] = None
+
+
+def get_key_set() -> KeySet:
+    global _key_set
+
+    if _key_set is not None:
+        return _key_set
+
+    with _lock:
+        if _key_set is None:  # Keys are parsed once, not on every encode / decode
+            _key_set = KeySet(
+                secret=setting.secret_key.jwt_secret_key,
+                algorithm=setting.jwt.algorithm,
+                keys=[SigningKey.from_setting(k) for k in setting.jwt.get('keys', [])],
+            )
+
+    return _key_set
+
+
+def reset_key_set() -> None:
+    global _key_set
+
+    with _lock:
+        _key_set = None
@@ -0,0 +1,105 @@
+import arrow
+import datetime
+
+from sqlalchemy import and_, bindparam, exists, or_, select
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from seed.db import db
+from seed.models import UserModel, UserRoleModel, UserBanModel, RoleAbilityModel
+from seed.setting import setting
+
+
+class PermissionQuery:
+    PASS: str = 'pass'
+    DENY: str = 'deny'
+    BANNED: str = 'banned'
+    NOT_EXISTS: str = 'not_exists'
+
+    def __init__(
+        self,
+        roles: List[Union[Tuple[str], str]] = [],
+        abilities: List[Union[Tuple[str], str]] = []
+    ) -> None:
+        self.roles: List[Union[Tuple[str], str]] = roles
+        self.abilities: List[Union[Tuple[str], str]] = abilities
+
+        self._statement: Optional['Select'] = None
+
+    @property
+    def statement(self) -> 'Select':
+        if self._statement is None:  # Built on first use, user key field comes from setting
+            self._statement = self.build()
+
+        return self._statement
+
+    def build(self) -> 'Select':
+        users: 'Table' = UserModel.__table__
+        user_roles: 'Table' = UserRoleModel.__table__
+        role_abilities: 'Table' = RoleAbilityModel.__table__
+        user_bans: 'Table' = UserBanModel.__table__
+
+        clauses: List[Any] = []
+
+        for item in self.roles:
+            clauses.append(exists().where(and_(
+                user_roles.c.user_id == users.c.id,
+                user_roles.c.role.in_(item if isinstance(item, tuple) else (item,)),
+            )))
+
+        for item in self.abilities:
+            clauses.append(exists().select_from(
+                user_roles.join(role_abilities, role_abilities.c.role == user_roles.c.role)
+            ).where(and_(
+                user_roles.c.user_id == users.c.id,
+                role_abilities.c.ability.in_(item if isinstance(item, tuple) else (item,)),
+            )))
+
+        banned_roles: List[str] = [r for r in self.roles if not isinstance(r, tuple)]
+        banned_abilities: List[str] = [a for a in self.abilities if not isinstance(a, tuple)]
+
+        ban_targets: List[Any] = []
+
+        if len(banned_roles):
+            ban_targets.append(user_bans.c.role.in_(banned_roles))
+
+        if len(banned_abilities):
+            ban_targets.append(user_bans.c.ability.in_(banned_abilities))
+
+        ban_condition: Any = and_(
+            user_bans.c.user_id == users.c.id,
+            or_(*ban_targets) if len(ban_targets) else False,
+            or_(user_bans.c.until_at.is_(None), user_bans.c.until_at >= bindparam('now')),
+        )
+
+        return select([
+            and_(*clauses).label('granted'),
+            user_bans.c.id,
+            user_bans.c.reason,
+            user_bans.c.until_at,
+        ]).select_from(
+            users.outerjoin(user_bans, ban_condition)
+        ).where(
+            users.c[setting.user_key_field] == bindparam('key')
+        ).limit(1)
+
+    def execute(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        row: Optional[Any] = db.session.execute(self.statement, {
+            'key': key,
+            'now': arrow.now(setting.timezone).naive,
+        }).first()
+
+        if row is None:
+            return self.NOT_EXISTS, None
+
+        granted, ban_id, reason, until_at = row
+
+        if not granted:
+            return self.DENY, None
+
+        if ban_id is not None:
+            if isinstance(until_at, str):  # Dialects without native datetime
+                until_at = datetime.datetime.fromisoformat(until_at)
+
+            return self.BANNED, {'reason': reason, 'until_at': until_at}
+
+        return self.PASS, None
@@ -0,0 +1,521 @@
+import arrow
+import datetime
+import orjson
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from sqlalchemy import and_, event, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from seed.db import db
+from seed.depends.redis import RedisContextManager, publish
+from seed.models import UserModel, UserRoleModel, UserBanModel, RoleAbilityModel
+from seed.setting import feature_enabled, setting
+
+from .cache import CacheSubscriber
+from .grants import GrantVersions, get_grant_registry, get_grant_versions
+
+
+SET_IF_VERSION_SCRIPT: str = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+
+return 1
+"""  # Principal loaded before an invalidation is not stored
+
+
+class PrincipalBan(NamedTuple):
+    role: Optional[str]
+    ability: Optional[str]
+    reason: Optional[str]
+    until_at: Optional[datetime.datetime]
+
+    @property
+    def is_continue(self) -> bool:
+        if self.until_at is None:
+            return True
+
+        return self.until_at >= arrow.now(setting.timezone).naive
+
+    @property
+    def grants(self) -> int:
+        return get_grant_registry().grants((self.role,), (self.ability,))
+
+
+class Principal:
+    __slots__ = ('id', 'key', 'roles', 'abilities', 'bans', '_grants')
+
+    def __init__(
+        self,
+        id: int,
+        key: str,
+        roles: FrozenSet[str] = frozenset(),
+        abilities: FrozenSet[str] = frozenset(),
+        bans: Tuple[PrincipalBan, ...] = ()
+    ) -> None:
+        self.id: int = id
+        self.key: str = key
+        self.roles: FrozenSet[str] = frozenset(roles)
+        self.abilities: FrozenSet[str] = frozenset(abilities)
+        self.bans: Tuple[PrincipalBan, ...] = tuple(bans)
+
+        self._grants: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f'<Principal id={self.id} key={self.key}>'
+
+    @property
+    def active_bans(self) -> List[PrincipalBan]:
+        return [ban for ban in self.bans if ban.is_continue]
+
+    @property
+    def grants(self) -> int:
+        if self._grants is None:
+            self._grants = get_grant_registry().grants(self.roles, self.abilities)
+
+        return self._grants
+
+    @classmethod
+    def from_user(cls, user: UserModel) -> 'Principal':
+        roles: Set[str] = set()
+        abilities: Set[str] = set()
+
+        for role in user.roles:
+            roles.add(role.role_)
+            abilities |= role.abilities
+
+        return cls(
+            id=user.id,
+            key=user.key_field,
+            roles=frozenset(roles),
+            abilities=frozenset(abilities),
+            bans=tuple(
+                PrincipalBan(ban.role_, ban.ability_, ban.reason, ban.until_at)
+                for ban in user.bans if ban.is_continue
+            ),
+        )
+
+    @classmethod
+    def load(cls, key: str) -> Optional['Principal']:
+        users: 'Table' = UserModel.__table__
+        user_roles: 'Table' = UserRoleModel.__table__
+        role_abilities: 'Table' = RoleAbilityModel.__table__
+        user_bans: 'Table' = UserBanModel.__table__
+
+        key_column: 'Column' = users.c[setting.user_key_field]
+        now: datetime.datetime = arrow.now(setting.timezone).naive
+
+        grants: 'Select' = select([
+            literal('grant').label('kind'),
+            users.c.id,
+            user_roles.c.role,
+            role_abilities.c.ability,
+            null().label('reason'),
+            null().label('until_at'),
+        ]).select_from(
+            users
+            .outerjoin(user_roles, user_roles.c.user_id == users.c.id)
+            .outerjoin(role_abilities, role_abilities.c.role == user_roles.c.role)
+        ).where(key_column == key)
+
+        bans: 'Select' = select([
+            literal('ban').label('kind'),
+            users.c.id,
+            user_bans.c.role,
+            user_bans.c.ability,
+            user_bans.c.reason,
+            user_bans.c.until_at,
+        ]).select_from(
+            users.join(user_bans, user_bans.c.user_id == users.c.id)
+        ).where(and_(
+            key_column == key,
+            or_(user_bans.c.until_at.is_(None), user_bans.c.until_at >= now),
+        ))
+
+        rows: List[Any] = db.session.execute(union_all(grants, bans)).fetchall()
+
+        if not len(rows):
+            return None
+
+        roles: Set[str] = set()
+        abilities: Set[str] = set()
+        principal_bans: List[PrincipalBan] = []
+
+        for kind, _, role, ability, reason, until_at in rows:
+            if kind == 'ban':
+                if isinstance(until_at, str):  # Dialects without native datetime on union
+                    until_at = datetime.datetime.fromisoformat(until_at)
+
+                principal_bans.append(PrincipalBan(role, ability, reason, until_at))
+                continue
+
+            if role is not None:
+                roles.add(role)
+
+            if ability is not None:
+                abilities.add(ability)
+
+        return cls(
+            id=rows[0][1],
+            key=key,
+            roles=frozenset(roles),
+            abilities=frozenset(abilities),
+            bans=tuple(principal_bans),
+        )
+
+    @classmethod
+    def load_claim(cls, key: str) -> Optional[Dict[str, Any]]:
+        versions: Optional[GrantVersions] = get_grant_versions()
+
+        if versions is None:
+            return None
+
+        user_key_field: 'Column' = getattr(UserModel, setting.user_key_field)
+        user_id: Optional[int] = db.session.query(UserModel.id)\
+            .filter(user_key_field == key)\
+            .scalar()
+
+        if user_id is None:
+            return None
+
+        version: List[int] = versions.fetch(user_id)  # Read before grants, a change between makes it stale
+        principal: Optional[Principal] = cls.load(key)
+
+        if principal is None:
+            return None
+
+        return {**principal.to_dict(), 'version': version}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'key': self.key,
+            'roles': sorted(self.roles),
+            'abilities': sorted(self.abilities),
+            'bans': [
+                [b.role, b.ability, b.reason, b.until_at.isoformat() if b.until_at else None]
+                for b in self.bans
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'Principal':
+        return cls(
+            id=payload['id'],
+            key=payload['key'],
+            roles=frozenset(payload['roles']),
+            abilities=frozenset(payload['abilities']),
+            bans=tuple(
+                PrincipalBan(
+                    role, ability, reason,
+                    datetime.datetime.fromisoformat(until_at) if until_at else None
+                )
+                for role, ability, reason, until_at in payload['bans']
+            ),
+        )
+
+    def dumps(self) -> bytes:
+        return orjson.dumps(self.to_dict())
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'Principal':
+        return cls.from_dict(orjson.loads(data))
+
+
+class PrincipalCache:
+    GENERATION_KEY: str = 'principal:generation'
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 5,
+        redis_ttl: int = 300,
+        channel: str = 'principal:invalidate'
+    ) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.redis_ttl: int = redis_ttl
+        self.channel: str = channel
+        self.generation: int = 0
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[Principal, float]]' = OrderedDict()
+        self._script: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def name(key: str) -> str:
+        return f'principal:{{{key}}}'
+
+    @staticmethod
+    def version_name(key: str) -> str:
+        return f'principal:version:{{{key}}}'  # Same cluster slot as principal of key
+
+    @staticmethod
+    def index_name(user_id: int) -> str:
+        return f'principal:user:{user_id}'
+
+    def load(
+        self,
+        key: str,
+        loader: Callable[[], Optional[Principal]]
+    ) -> Optional[Principal]:
+        principal: Optional[Principal] = self.get_local(key)
+
+        if principal is not None:
+            return principal
+
+        generation: int = self.generation
+
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)  # Not MGET, keys can be in different cluster slots
+            pipeline.get(self.name(key))
+            pipeline.get(self.GENERATION_KEY)
+            pipeline.get(self.version_name(key))  # Read before loader, a change committed meanwhile bumps it
+
+            data, stored_generation, version = pipeline.execute()
+
+        stored_generation: int = int(stored_generation or 0)
+
+        if data is not None:
+            data_generation, _, principal_data = data.partition(b'$')
+
+            if int(data_generation) == stored_generation:  # Otherwise built before a role ability change
+                principal = Principal.loads(principal_data)
+
+        if principal is None:
+            principal = loader()
+
+            if principal is None:
+                return None
+
+            self.set(principal, stored_generation, int(version or 0))
+
+        self.set_local(principal, generation=generation)
+
+        return principal
+
+    def get_local(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            entry: Optional[Tuple[Principal, float]] = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return principal
+
+    def set(
+        self,
+        principal: Principal,
+        stored_generation: int,
+        version: int = 0
+    ) -> bool:
+        with RedisContextManager() as r:
+            if self._script is None:
+                self._script = r.register_script(SET_IF_VERSION_SCRIPT)
+
+            stored: int = self._script(
+                keys=[self.name(principal.key), self.version_name(principal.key)],
+                args=[version, f'{stored_generation}$'.encode() + principal.dumps(), self.redis_ttl],
+                client=r,
+            )
+
+            if stored:
+                r.set(self.index_name(principal.id), principal.key, ex=self.redis_ttl)
+
+        return bool(stored)
+
+    def set_local(
+        self,
+        principal: Principal,
+        generation: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._entries[principal.key] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            self.generation += 1
+
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def invalidate_users(
+        self,
+        user_ids: Set[int],
+        keys: Iterable[str] = ()
+    ) -> None:
+        user_ids: List[int] = list(user_ids)
+
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+            for user_id in user_ids:
+                pipeline.get(self.index_name(user_id))
+
+            indexed: List[Optional[bytes]] = pipeline.execute()
+            invalidated: Set[str] = {key.decode() for key in indexed if key is not None} | set(keys)
+            pipeline = r.pipeline(transaction=False)
+
+            for user_id in user_ids:
+                pipeline.delete(self.index_name(user_id))
+
+            for key in invalidated:
+                self.invalidate(key)
+
+                pipeline.delete(self.name(key))
+                pipeline.incr(self.version_name(key))  # Also when not cached yet, a loader may be storing it
+                pipeline.expire(self.version_name(key), self.redis_ttl)
+
+            pipeline.execute()
+
+            if len(invalidated):
+                publish(r, self.channel, *(
+                    orjson.dumps({'key': key}) for key in sorted(invalidated)
+                ))  # Not pipelined, cluster pipelines reject PUBLISH
+
+    def invalidate_all(self) -> None:
+        self.invalidate()
+
+        with RedisContextManager() as r:
+            r.incr(self.GENERATION_KEY)
+
+            publish(r, self.channel, orjson.dumps({'key': None}))
+
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> Optional[PrincipalCache]:
+    global _pid, _cache
+
+    if not feature_enabled('auth', 'principal_cache'):
+        return None
+
+    if _cache is not None and _pid == os.getpid():
+        return _cache
+
+    with _lock:
+        if _cache is None or _pid != os.getpid():
+            cache_setting: Dict[str, Any] = setting.auth.principal_cache
+
+            _cache = PrincipalCache(
+                maxsize=cache_setting.get('maxsize', 10000),
+                ttl=cache_setting.get('ttl', 5),
+                redis_ttl=cache_setting.get('redis_ttl', 300),
+                channel=cache_setting.get('channel', 'principal:invalidate'),
+            )
+            _pid = os.getpid()
+
+            CacheSubscriber(cache=_cache, channel=_cache.channel).start()
+
+    return _cache
+
+
+def reset_principal_cache() -> None:
+    global _pid, _cache
+
+    with _lock:
+        _pid, _cache = None, None
+
+
+def queue_principal_changes(
+    session: Session,
+    users: Dict[int, str] = {},
+    all_: bool = False
+) -> None:  # Changes not seen by flush listeners (bulk saves), invalidated on commit of session
+    if get_principal_cache() is None and get_grant_versions() is None:
+        return
+
+    changes: Dict[str, Any] = _principal_changes(session)
+    changes['users'].update(users)
+    changes['all'] = changes['all'] or all_
+
+
+def _principal_changes(session: Session) -> Dict[str, Any]:
+    return session.info.setdefault('principal_changes', {'users': {}, 'all': False})
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_principal_changes(session: Session, flush_context: Any) -> None:
+    if get_principal_cache() is None and get_grant_versions() is None:
+        return
+
+    changes: Dict[str, Any] = _principal_changes(session)
+    user_ids: Set[int] = set()
+
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (UserRoleModel, UserBanModel)):
+            user_ids.add(instance.user_id)
+        elif isinstance(instance, RoleAbilityModel):
+            changes['all'] = True
+
+    user_ids -= changes['users'].keys()
+
+    if len(user_ids):  # Keys of changed users, their principals may be loading without index yet
+        changes['users'].update(
+            session.query(UserModel.id, getattr(UserModel, setting.user_key_field))
+            .filter(UserModel.id.in_(user_ids))
+        )
+
+    _invalidate_principals(changes)  # Also on commit, a request may re-cache rows before it
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_principal_changes(session: Session) -> None:
+    changes: Optional[Dict[str, Any]] = session.info.pop('principal_changes', None)
+
+    if changes is not None:
+        _invalidate_principals(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_principal_changes(session: Session) -> None:
+    session.info.pop('principal_changes', None)
+
+
+def _invalidate_principals(changes: Dict[str, Any]) -> None:
+    cache: Optional[PrincipalCache] = get_principal_cache()
+    versions: Optional[GrantVersions] = get_grant_versions()
+
+    if cache is not None:
+        if changes['all']:
+            cache.invalidate_all()
+        elif changes['users']:
+            cache.invalidate_users(set(changes['users']), keys=changes['users'].values())
+
+    if versions is not None:
+        if changes['all']:
+            versions.bump()
+        elif changes['users']:
+            versions.bump(set(changes['users']))
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import orjson
+import os
+import time
+import uuid
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from fastapi import status
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+
+from seed.depends.redis import AsyncRedisContextManager
+from seed.exceptions import AuthHTTPException
+from seed.setting import feature_enabled, setting
+
+from .backends import get_async_token_store
+from .depend import AsyncAuth, AsyncAuthContext
+from .store import TokenStore
+
+
+RELEASE_LOCK_SCRIPT: str = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+
+return 0
+"""
+
+
+class RefreshFlight:
+    def __init__(
+        self,
+        lock_ttl: float = 5,
+        result_ttl: float = 10,
+        wait: float = 5,
+        interval: float = 0.02
+    ) -> None:
+        self.lock_ttl: float = lock_ttl
+        self.result_ttl: float = result_ttl
+        self.wait: float = wait
+        self.interval: float = interval
+
+    @classmethod
+    def from_setting(cls) -> 'RefreshFlight':
+        flight_setting: Dict[str, Any] = setting.jwt.get('refresh_flight', {})
+
+        return cls(
+            lock_ttl=flight_setting.get('lock_ttl', 5),
+            result_ttl=flight_setting.get('result_ttl', 10),
+            wait=flight_setting.get('wait', 5),
+        )
+
+    @staticmethod
+    def name(
+        subject: str,
+        jti: str
+    ) -> str:
+        return f'{TokenStore.name(subject)}:refresh:{jti}'  # Same slot with token key of subject
+
+    @staticmethod
+    def _cipher(credential: str) -> AESGCM:
+        return AESGCM(hashlib.sha256(f'refresh_flight${credential}'.encode()).digest())
+
+    def seal(
+        self,
+        credential: str,
+        credentials: Dict[str, str]
+    ) -> bytes:
+        nonce: bytes = os.urandom(12)
+
+        return nonce + self._cipher(credential).encrypt(nonce, orjson.dumps(credentials), None)
+
+    def open(
+        self,
+        credential: str,
+        data: bytes
+    ) -> Optional[Dict[str, str]]:
+        try:
+            return orjson.loads(self._cipher(credential).decrypt(data[:12], data[12:], None))
+        except InvalidTag:  # Sealed by other refresh token
+            return None
+
+    async def current(
+        self,
+        subject: str,
+        jti: str
+    ) -> Optional[str]:
+        async with AsyncRedisContextManager() as r:
+            flight: Optional[bytes] = await r.get(f'{self.name(subject, jti)}:lock')
+
+        return None if flight is None else flight.decode()
+
+    async def result(
+        self,
+        subject: str,
+        jti: str,
+        flight: str,
+        credential: str
+    ) -> Optional[Dict[str, str]]:
+        async with AsyncRedisContextManager() as r:
+            data: Optional[bytes] = await r.get(f'{self.name(subject, jti)}:{flight}')
+
+        return None if data is None else self.open(credential, data)
+
+    def _conflict(self) -> AuthHTTPException:
+        return AuthHTTPException(
+            symbol='token_refresh_conflict',
+            message='Concurrent refresh of same refresh token is not finished, retry later',
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+    async def run(
+        self,
+        subject: str,
+        jti: str,
+        credential: str,
+        mint: Callable[[], Awaitable[Dict[str, str]]],
+        flight: Optional[str] = None
+    ) -> Dict[str, str]:
+        name: str = self.name(subject, jti)
+        lock: str = f'{name}:lock'
+        deadline: float = time.monotonic() + self.wait
+
+        async with AsyncRedisContextManager() as r:
+            while time.monotonic() < deadline:
+                if flight is not None:  # Joined while in progress, result is kept under flight id
+                    pipeline: 'Pipeline' = r.pipeline(transaction=False)
+                    pipeline.get(lock)  # Before result, lock is released after result is set
+                    pipeline.get(f'{name}:{flight}')
+
+                    holder, data = await pipeline.execute()
+
+                    if data is not None:
+                        credentials: Optional[Dict[str, str]] = self.open(credential, data)
+
+                        if credentials is None:
+                            raise self._conflict()
+
+                        return credentials
+
+                    if holder is None or holder.decode() != flight:  # Lock holder failed without result
+                        flight = None
+                        continue
+
+                    await asyncio.sleep(self.interval)
+                    continue
+
+                owner: str = str(uuid.uuid4())
+
+                if await r.set(lock, owner, nx=True, px=int(self.lock_ttl * 1000)):
+                    try:
+                        if await get_async_token_store().get(subject, TokenStore.REFRESH_TOKEN) != jti:
+                            raise self._conflict()  # Rotated by refresh finished before this one joined
+
+                        credentials: Dict[str, str] = await mint()
+
+                        await r.set(
+                            f'{name}:{owner}', self.seal(credential, credentials), px=int(self.result_ttl * 1000)
+                        )
+
+                        return credentials
+                    finally:  # Only own lock, expired one may be taken by next refresh
+                        await r.register_script(RELEASE_LOCK_SCRIPT)(keys=[lock], args=[owner], client=r)
+
+                holder: Optional[bytes] = await r.get(lock)  # Started meanwhile, joined
+                flight = None if holder is None else holder.decode()
+
+        raise self._conflict()  # Not minted again, tokens of lock holder would be rotated out
+
+
+class RefreshAuthContext(AsyncAuthContext):
+    __slots__ = ('flight',)
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.flight: Optional[str] = None  # Id of concurrent refresh in progress on arrival
+
+
+class RefreshAuth(AsyncAuth):
+    _context_class: Type[RefreshAuthContext] = RefreshAuthContext
+
+    async def _verify_async(self, context: RefreshAuthContext) -> bool:
+        if not feature_enabled('jwt', 'refresh_flight'):
+            return await super()._verify_async(context)
+
+        context.flight = await RefreshFlight.from_setting().current(
+            context.token.subject, context.token.id
+        )  # Read before verify, rotation happens inside of flight
+
+        return await super()._verify_async(context) or context.flight is not None  # Rotated, joins the flight
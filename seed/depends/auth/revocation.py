@@ -0,0 +1,232 @@
+import hashlib
+import math
+import os
+import redis
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from seed.depends.redis import get_redis
+from seed.logger import logger
+from seed.setting import feature_enabled, setting
+from seed.utils.convert import units_to_seconds
+
+
+class BloomFilter:
+    def __init__(
+        self,
+        capacity: int = 1000000,
+        error_rate: float = 0.001
+    ) -> None:
+        self.size: int = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes: int = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count: int = 0
+
+        self._bits: bytearray = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest: bytes = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1: int = int.from_bytes(digest[:8], 'little')
+        h2: int = int.from_bytes(digest[8:], 'little') | 1
+
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        for position in self._positions(key):
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+
+class RevocationList:
+    def __init__(
+        self,
+        retention: int,
+        exact_size: int = 10000,
+        bloom_capacity: int = 1000000,
+        bloom_error_rate: float = 0.001,
+        max_lag: float = 5
+    ) -> None:
+        self.retention: int = retention
+        self.exact_size: int = exact_size
+        self.bloom_capacity: int = bloom_capacity
+        self.bloom_error_rate: float = bloom_error_rate
+        self.max_lag: float = max_lag
+        self.synced_at: Optional[float] = None
+
+        self._lock: threading.Lock = threading.Lock()
+        self._recent: 'OrderedDict[str, float]' = OrderedDict()
+        self._blooms: List[Tuple[float, BloomFilter]] = []
+
+    def __len__(self) -> int:
+        return len(self._recent) + sum(len(bloom) for _, bloom in self._blooms)
+
+    def add(
+        self,
+        jti: str,
+        revoked_at: Optional[float] = None
+    ) -> None:
+        revoked_at: float = time.time() if revoked_at is None else revoked_at
+
+        if revoked_at < time.time() - self.retention:
+            return  # Every token issued before it is already expired
+
+        with self._lock:
+            self._recent[jti] = revoked_at
+            self._recent.move_to_end(jti)
+
+            while len(self._recent) > self.exact_size:
+                self._bloom_add(self._recent.popitem(last=False)[0])
+
+    def _bloom_add(self, jti: str) -> None:
+        now: float = time.time()
+
+        if not len(self._blooms) or self._blooms[-1][0] < now - self.retention:
+            self._blooms = self._blooms[-1:] + [(
+                now, BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+            )]  # Previous generation only holds entries older than retention after next rotation
+
+        self._blooms[-1][1].add(jti)
+
+    def check(self, jti: str) -> Optional[bool]:
+        if self.synced_at is None or self.synced_at < time.monotonic() - self.max_lag:
+            return None  # Not fresh enough, verify with token store
+
+        if jti in self._recent:
+            return True
+
+        for _, bloom in self._blooms:
+            if jti in bloom:
+                return None  # Maybe revoked, verify with token store
+
+        return False
+
+    def touch(self) -> None:
+        self.synced_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.synced_at = None
+            self._recent.clear()
+            self._blooms = []
+
+
+class RevocationSubscriber(threading.Thread):
+    def __init__(
+        self,
+        revocations: RevocationList,
+        stream: str,
+        block: int = 1000
+    ) -> None:
+        super().__init__(name=f'revocation-subscriber:{stream}', daemon=True)
+
+        self.revocations: RevocationList = revocations
+        self.stream: str = stream
+        self.block: int = block
+        self.running: bool = True
+
+    def run(self) -> None:  # pragma: no cover
+        last_id: bytes = b'0-0'  # Replay stream on start, entries older than retention are skipped
+
+        while self.running:
+            try:
+                r: redis.Redis = get_redis()
+
+                while self.running:
+                    entries: List[Any] = r.xread(
+                        {self.stream: last_id}, count=1000, block=self.block
+                    )
+
+                    for _, messages in entries or []:
+                        for message_id, fields in messages:
+                            self.revocations.add(
+                                fields[b'jti'].decode(), revoked_at=float(fields[b'at'])
+                            )
+
+                            last_id = message_id
+
+                    self.revocations.touch()
+            except redis.RedisError as e:
+                logger.warning(f"Revocation subscriber of '{self.stream}' disconnected: {e}")
+
+                time.sleep(1)
+
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_revocations: Optional[RevocationList] = None
+
+
+def get_revocation_list() -> Optional[RevocationList]:
+    global _pid, _revocations
+
+    if not feature_enabled('jwt', 'stateless'):
+        return None
+
+    if _revocations is not None and _pid == os.getpid():
+        return _revocations
+
+    with _lock:
+        if _revocations is None or _pid != os.getpid():
+            stateless_setting: Dict[str, Any] = setting.jwt.stateless
+
+            _revocations = RevocationList(
+                retention=revocation_retention(),
+                exact_size=stateless_setting.get('exact_size', 10000),
+                bloom_capacity=stateless_setting.get('bloom_capacity', 1000000),
+                bloom_error_rate=stateless_setting.get('bloom_error_rate', 0.001),
+                max_lag=stateless_setting.get('max_lag', 5),
+            )
+            _pid = os.getpid()
+
+            RevocationSubscriber(
+                revocations=_revocations,
+                stream=revocation_stream(),
+                block=stateless_setting.get('sync_interval', 1000),
+            ).start()
+
+    return _revocations
+
+
+def reset_revocation_list() -> None:
+    global _pid, _revocations
+
+    with _lock:
+        _pid, _revocations = None, None
+
+
+def revocation_stream() -> str:
+    return setting.jwt.get('stateless', {}).get('stream', 'token:revoked')
+
+
+def revocation_retention() -> int:
+    return units_to_seconds(setting.jwt.refresh_token_expires)  # Tokens revoked before are already expired
+
+
+def queue_revocations(
+    pipeline: 'Pipeline',
+    jtis: Iterable[str]
+) -> None:
+    revoked_at: float = time.time()
+    minid: str = f'{int((revoked_at - revocation_retention()) * 1000)}-0'  # Not MAXLEN, workers replay retention
+
+    for jti in jtis:
+        pipeline.xadd(
+            revocation_stream(),
+            {'jti': jti, 'at': revoked_at},
+            minid=minid,
+            approximate=True,  # Trims less, never entries newer than minid
+        )
@@ -0,0 +1,433 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from seed.depends.redis import (
+    RedisContextManager,
+    AsyncRedisContextManager,
+    async_publish,
+    publish,
+    transaction_supported
+)
+
+from .batch import (
+    TokenBatcher,
+    AsyncTokenBatcher,
+    get_token_batcher,
+    get_async_token_batcher
+)
+from .cache import (
+    TokenCache,
+    get_token_cache,
+    invalidate_channel,
+    invalidate_message
+)
+from .revocation import RevocationList, get_revocation_list, queue_revocations
+
+
+class BaseTokenStore(ABC):
+    REFRESH_TOKEN: str = 'refresh'
+
+    @staticmethod
+    def name(subject: str) -> str:
+        return f'token:{{{subject}}}'  # Hash tagged, keys of subject stay in one cluster slot
+
+    @staticmethod
+    def _decode(value: Optional[Union[bytes, str]]) -> Optional[str]:
+        if isinstance(value, bytes):
+            return value.decode()
+
+        return value
+
+    @abstractmethod
+    def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        pass
+
+    def verify(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str
+    ) -> bool:
+        stored_jti: Optional[str] = self.get(subject, token_type)
+
+        return stored_jti is not None and stored_jti == jti
+
+    @abstractmethod
+    def ttl(self, subject: str) -> Optional[int]:
+        pass
+
+    def create(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str,
+        expires_in: Optional[int] = None
+    ) -> None:
+        self.create_many(subject, {token_type: (jti, expires_in)})
+
+    @abstractmethod
+    def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:  # Expiration of refresh token is set on all tokens of subject, others keep it
+        pass
+
+    @abstractmethod
+    def revoke(self, subject: str) -> None:
+        pass
+
+    @abstractmethod
+    def revoke_many(self, subjects: List[str]) -> int:
+        pass
+
+    @abstractmethod
+    def subjects(self, batch_size: int = 500) -> Iterator[str]:
+        pass
+
+
+class TokenStore(BaseTokenStore):
+    def __init__(self) -> None:
+        self.cache: Optional[TokenCache] = get_token_cache()
+        self.revocations: Optional[RevocationList] = get_revocation_list()
+        self.batcher: Optional[TokenBatcher] = get_token_batcher()
+
+    @staticmethod
+    def _token_type(tokens: Dict[str, Tuple[str, Optional[int]]]) -> Optional[str]:
+        return next(iter(tokens)) if len(tokens) == 1 else None  # Only replaced type is invalidated
+
+    def _invalidate_local(self, *invalidations: Tuple[str, Optional[str]]) -> None:
+        for subject, token_type in invalidations:  # After execute, a verify meanwhile would cache replaced jti again
+            self.cache.invalidate(subject, token_type)
+
+    def _invalidate(
+        self,
+        r: 'Redis',
+        *invalidations: Tuple[str, Optional[str]]
+    ) -> None:
+        if self.cache is None or not len(invalidations):
+            return
+
+        self._invalidate_local(*invalidations)
+
+        publish(r, invalidate_channel(), *(
+            invalidate_message(subject, token_type) for subject, token_type in invalidations
+        ))  # After execute, not queued in pipeline
+
+    def _revoked_jtis(
+        self,
+        stored: Dict[Union[bytes, str], Union[bytes, str]],
+        tokens: Optional[Dict[str, Tuple[str, Optional[int]]]] = None
+    ) -> List[str]:
+        revoked: List[str] = []
+
+        for token_type, jti in stored.items():
+            token_type, jti = self._decode(token_type), self._decode(jti)
+
+            if tokens is None or (token_type in tokens and tokens[token_type][0] != jti):
+                revoked.append(jti)
+
+        return revoked
+
+    def _queue_revocations(
+        self,
+        pipeline: 'Pipeline',
+        jtis: List[str]
+    ) -> None:
+        for jti in jtis:
+            self.revocations.add(jti)
+
+        queue_revocations(pipeline, jtis)
+
+    def _check_revocations(self, jti: str) -> Optional[bool]:
+        if self.revocations is None:
+            return None
+
+        revoked: Optional[bool] = self.revocations.check(jti)
+
+        return None if revoked is None else not revoked
+
+    def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        with RedisContextManager() as r:
+            return self._decode(r.hget(
+                name=self.name(subject),
+                key=token_type,
+            ))
+
+    def _lookup(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        if self.batcher is None:
+            return self.get(subject, token_type)
+
+        return self._decode(self.batcher.hget(self.name(subject), token_type))
+
+    def verify(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str
+    ) -> bool:
+        verified: Optional[bool] = self._check_revocations(jti)
+
+        if verified is not None:  # Stateless, signature and 'exp' are checked on decode
+            return verified
+
+        generation: Optional[int] = None
+
+        if self.cache is not None:
+            if self.cache.get(subject, token_type) == jti:
+                return True
+
+            generation = self.cache.generation
+
+        stored_jti: Optional[str] = self._lookup(subject, token_type)
+
+        if self.cache is not None and stored_jti is not None:
+            self.cache.set(subject, token_type, stored_jti, generation=generation)
+
+        return stored_jti is not None and stored_jti == jti
+
+    def ttl(self, subject: str) -> Optional[int]:
+        with RedisContextManager() as r:
+            ttl: int = r.ttl(self.name(subject))
+
+        return ttl if ttl >= 0 else None
+
+    def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=transaction_supported())
+
+            if self.revocations is not None:
+                pipeline.hgetall(self.name(subject))  # Rotated jti's are pushed to revocation list
+
+            self._queue_create(pipeline, subject, tokens)
+            results: List[Any] = pipeline.execute()
+
+            self._invalidate(r, (subject, self._token_type(tokens)))
+
+            if self.revocations is not None:
+                pipeline = r.pipeline(transaction=False)
+
+                self._queue_revocations(pipeline, self._revoked_jtis(results[0], tokens))
+                pipeline.execute()
+
+    def _queue_create(
+        self,
+        pipeline: 'Pipeline',
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        pipeline.hset(
+            name=self.name(subject),
+            mapping={t: jti for t, (jti, _) in tokens.items()},
+        )
+
+        _, expires_in = tokens.get(self.REFRESH_TOKEN, (None, None))
+
+        if expires_in is not None:
+            pipeline.expire(
+                name=self.name(subject),
+                time=expires_in,
+            )
+
+    def revoke(self, subject: str) -> None:
+        with RedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(
+                transaction=self.revocations is not None and transaction_supported()
+            )
+
+            if self.revocations is not None:
+                pipeline.hgetall(self.name(subject))
+
+            pipeline.delete(self.name(subject))
+
+            results: List[Any] = pipeline.execute()
+
+            self._invalidate(r, (subject, None))
+
+            if self.revocations is not None:
+                pipeline = r.pipeline(transaction=False)
+
+                self._queue_revocations(pipeline, self._revoked_jtis(results[0]))
+                pipeline.execute()
+
+    def revoke_many(self, subjects: List[str]) -> int:
+        names: List[str] = [self.name(subject) for subject in subjects]
+
+        if not len(names):
+            return 0
+
+        with RedisContextManager() as r:
+            stored: List[Dict[bytes, bytes]] = []
+
+            if self.revocations is not None:
+                pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+                for name in names:
+                    pipeline.hgetall(name)
+
+                stored = pipeline.execute()
+
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+            for name in names:  # Keys are in different cluster slots, unlinked one by one in same pipeline
+                pipeline.unlink(name)  # Memory is reclaimed in background, not on redis main thread
+
+            if self.revocations is not None:
+                self._queue_revocations(pipeline, [
+                    jti for tokens in stored for jti in self._revoked_jtis(tokens)
+                ])
+
+            revoked: int = sum(pipeline.execute()[:len(names)])
+
+            self._invalidate(r, *((subject, None) for subject in subjects))
+
+            return revoked
+
+    def subjects(self, batch_size: int = 500) -> Iterator[str]:
+        prefix: str = 'token:{'
+
+        with RedisContextManager() as r:
+            for name in r.scan_iter(match=f'{prefix}*}}', count=batch_size):  # SCAN, never KEYS
+                yield self._decode(name)[len(prefix):-1]
+
+
+class AsyncTokenStore(TokenStore):
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.batcher: Optional[AsyncTokenBatcher] = get_async_token_batcher()
+
+    async def _invalidate(
+        self,
+        r: 'Redis',
+        *invalidations: Tuple[str, Optional[str]]
+    ) -> None:
+        if self.cache is None or not len(invalidations):
+            return
+
+        self._invalidate_local(*invalidations)
+
+        await async_publish(r, invalidate_channel(), *(
+            invalidate_message(subject, token_type) for subject, token_type in invalidations
+        ))
+
+    async def get(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        async with AsyncRedisContextManager() as r:
+            return self._decode(await r.hget(
+                name=self.name(subject),
+                key=token_type,
+            ))
+
+    async def _lookup(
+        self,
+        subject: str,
+        token_type: str
+    ) -> Optional[str]:
+        if self.batcher is None:
+            return await self.get(subject, token_type)
+
+        return self._decode(await self.batcher.hget(self.name(subject), token_type))
+
+    async def verify(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str
+    ) -> bool:
+        verified: Optional[bool] = self._check_revocations(jti)
+
+        if verified is not None:
+            return verified
+
+        generation: Optional[int] = None
+
+        if self.cache is not None:
+            if self.cache.get(subject, token_type) == jti:
+                return True
+
+            generation = self.cache.generation
+
+        stored_jti: Optional[str] = await self._lookup(subject, token_type)
+
+        if self.cache is not None and stored_jti is not None:
+            self.cache.set(subject, token_type, stored_jti, generation=generation)
+
+        return stored_jti is not None and stored_jti == jti
+
+    async def ttl(self, subject: str) -> Optional[int]:
+        async with AsyncRedisContextManager() as r:
+            ttl: int = await r.ttl(self.name(subject))
+
+        return ttl if ttl >= 0 else None
+
+    async def create(
+        self,
+        subject: str,
+        token_type: str,
+        jti: str,
+        expires_in: Optional[int] = None
+    ) -> None:
+        await self.create_many(subject, {token_type: (jti, expires_in)})
+
+    async def create_many(
+        self,
+        subject: str,
+        tokens: Dict[str, Tuple[str, Optional[int]]]
+    ) -> None:
+        async with AsyncRedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=transaction_supported())
+
+            if self.revocations is not None:
+                pipeline.hgetall(self.name(subject))
+
+            self._queue_create(pipeline, subject, tokens)
+            results: List[Any] = await pipeline.execute()
+
+            await self._invalidate(r, (subject, self._token_type(tokens)))
+
+            if self.revocations is not None:
+                pipeline = r.pipeline(transaction=False)
+
+                self._queue_revocations(pipeline, self._revoked_jtis(results[0], tokens))
+                await pipeline.execute()
+
+    async def revoke(self, subject: str) -> None:
+        async with AsyncRedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(
+                transaction=self.revocations is not None and transaction_supported()
+            )
+
+            if self.revocations is not None:
+                pipeline.hgetall(self.name(subject))
+
+            pipeline.delete(self.name(subject))
+
+            results: List[Any] = await pipeline.execute()
+
+            await self._invalidate(r, (subject, None))
+
+            if self.revocations is not None:
+                pipeline = r.pipeline(transaction=False)
+
+                self._queue_revocations(pipeline, self._revoked_jtis(results[0]))
+                await pipeline.execute()
@@ -3,21 +3,34 @@ import jwt
 import uuid
 import orjson
 
-from typing import Any, Dict, Union, Optional
+from jwt.exceptions import InvalidKeyError
+from typing import Any, Dict, List, Tuple, Union, Optional
 
-from seed.depends.redis import RedisContextManager
 from seed.utils.convert import units_to_seconds
 from seed.utils.crypto import AESCipher
 
 from seed.setting import setting
 
+from .cache import ClaimsCache, get_claims_cache
+from .keys import KeySet, SigningKey, get_key_set
+from .backends import get_token_store, get_async_token_store
+from .store import TokenStore
+
 
 class JWTTokenType:
+    __slots__ = ()
+
     ACCESS_TOKEN: str = 'access'
     REFRESH_TOKEN: str = 'refresh'
 
 
 class JWTToken(JWTTokenType):
+    __slots__ = (
+        'credential', 'algorithm', 'claims',
+        'id', 'subject', 'payload', 'token_type', 'expires_in',
+        '_exp', '_iat', '_secrets', '_expires', '_created_at',
+    )
+
     aes_cipher: AESCipher = AESCipher()
 
     def __init__(
@@ -27,48 +40,166 @@ class JWTToken(JWTTokenType):
         claims: Optional[Dict[str, Any]] = None
     ) -> None:
         self.credential: str = credential
-        self.algorithm: str = algorithm or setting.jwt.algorithm
+        self.algorithm: str = algorithm or get_key_set().algorithm
+
+        claims_cache: Optional[ClaimsCache] = get_claims_cache()
+
+        if claims is None and claims_cache is not None:
+            claims = self._cached_claims(claims_cache, credential, self.algorithm)
+
+        if claims is None:
+            key, claims = self._decode(credential=credential, algorithm=self.algorithm)
+
+            if claims_cache is not None:
+                claims_cache.set(credential, self.algorithm, claims.get('exp'), (
+                    None if key is None else (key.kid, key.algorithm), orjson.dumps(claims)
+                ))  # Serialized, every token gets its own claims
+
+        self.claims: Dict[str, Any] = claims
+
+        self.id: str = claims['jti']
+        self.subject: str = claims['sub']
+        self.payload: Dict[str, Any] = claims['payload']
+        self.token_type: str = claims['type']
+        self.expires_in: int = claims['exp_in']
+
+        self._exp: int = claims['exp']
+        self._iat: int = claims['iat']
+        self._secrets: Optional[str] = None
+        self._expires: Optional['Arrow'] = None
+        self._created_at: Optional['Arrow'] = None
+
+    @property
+    def secrets(self) -> str:
+        if self._secrets is None:
+            self._secrets = self.aes_cipher.decrypt(self.claims['secrets'])
+
+        return self._secrets
+
+    @property
+    def expires(self) -> 'Arrow':
+        if self._expires is None:
+            self._expires = arrow.get(self._exp).to(setting.timezone)
+
+        return self._expires
+
+    @property
+    def created_at(self) -> 'Arrow':
+        if self._created_at is None:
+            self._created_at = arrow.get(self._iat).to(setting.timezone)
+
+        return self._created_at
+
+    @property
+    def grants(self) -> Optional[Dict[str, Any]]:
+        return self.claims.get('grants')
 
-        self.claims: Dict[str, Any] = claims or self.decode(
-            credential=credential,
-            algorithm=self.algorithm
+    @property
+    def redis_name(self) -> str:
+        return TokenStore.name(self.subject)
+
+    def verify(self) -> bool:
+        return get_token_store().verify(
+            subject=self.subject,
+            token_type=self.token_type,
+            jti=self.id,
         )
 
-        self.id: str = self.claims['jti']
-        self.subject: str = self.claims['sub']
-        self.payload: Dict[str, Any] = self.claims['payload']
-        self.secrets: Dict[str, Any] = self.aes_cipher.decrypt(
-            self.claims['secrets']
+    async def verify_async(self) -> bool:
+        return await get_async_token_store().verify(
+            subject=self.subject,
+            token_type=self.token_type,
+            jti=self.id,
         )
-        self.token_type: str = self.claims['type']
-        self.expires_in: int = self.claims['exp_in']
-        self.expires: 'Arrow' = arrow.get(self.claims['exp']).to(setting.timezone)
-        self.created_at: 'Arrow' = arrow.get(self.claims['iat']).to(setting.timezone)
 
-        self.redis_name: str = f'token:{self.subject}'
+    @classmethod
+    def create(cls, *args, **kwargs) -> 'JWTToken':
+        token: 'JWTToken' = cls.build(*args, **kwargs)
 
-    def verify(self) -> bool:
-        with RedisContextManager() as r:
-            stored_uuid: str = r.hget(
-                name=self.redis_name,
-                key=self.token_type,
-            )
+        get_token_store().create(
+            subject=token.subject,
+            token_type=token.token_type,
+            jti=token.id,
+            expires_in=token.expires_in,
+        )
+
+        return token
+
+    @classmethod
+    async def create_async(cls, *args, **kwargs) -> 'JWTToken':
+        token: 'JWTToken' = cls.build(*args, **kwargs)
+
+        await get_async_token_store().create(
+            subject=token.subject,
+            token_type=token.token_type,
+            jti=token.id,
+            expires_in=token.expires_in,
+        )
 
-            return stored_uuid is not None and \
-                self.id == stored_uuid.decode()
+        return token
 
     @classmethod
-    def create(
+    def create_many(
+        cls,
+        token_types: List[str],
+        **kwargs
+    ) -> Dict[str, 'JWTToken']:
+        tokens: Dict[str, 'JWTToken'] = cls.build_many(token_types, **kwargs)
+
+        get_token_store().create_many(
+            subject=kwargs['subject'],
+            tokens={t: (token.id, token.expires_in) for t, token in tokens.items()},
+        )
+
+        return tokens
+
+    @classmethod
+    async def create_many_async(
+        cls,
+        token_types: List[str],
+        **kwargs
+    ) -> Dict[str, 'JWTToken']:
+        tokens: Dict[str, 'JWTToken'] = cls.build_many(token_types, **kwargs)
+
+        await get_async_token_store().create_many(
+            subject=kwargs['subject'],
+            tokens={t: (token.id, token.expires_in) for t, token in tokens.items()},
+        )
+
+        return tokens
+
+    @classmethod
+    def build_many(
+        cls,
+        token_types: List[str],
+        **kwargs
+    ) -> Dict[str, 'JWTToken']:
+        return {
+            type_: cls.build(**{**kwargs, 'token_type': type_})
+            for type_ in token_types
+        }
+
+    @classmethod
+    def build(
         cls,
         subject: str,
         payload: Dict[str, Any] = {},
         secrets: Dict[str, Any] = {},
         token_type: Optional[str] = 'access',
         expires: Union[int, str] = None,
-        algorithm: Optional[str] = None
-    ) -> str:
+        algorithm: Optional[str] = None,
+        grants: Optional[Dict[str, Any]] = None
+    ) -> 'JWTToken':
         token_type: str = token_type or JWTTokenType.ACCESS_TOKEN
-        algorithm: str = algorithm or setting.jwt.algorithm
+        key_set: KeySet = get_key_set()
+        signing_key: Optional[SigningKey] = key_set.current()
+
+        if signing_key is not None and algorithm in (None, signing_key.algorithm):
+            algorithm: str = signing_key.algorithm
+        else:
+            algorithm: str = algorithm or key_set.algorithm
+            signing_key = None
+
         expires: Union[int, str] = expires or (
             setting.jwt.get(f'{token_type}_token_expires', None)
         )
@@ -95,37 +226,76 @@ class JWTToken(JWTTokenType):
             claims['exp'] = now + expires
             claims['exp_in'] = expires
 
-        with RedisContextManager() as r:
-            r.hset(
-                name=f'token:{subject}',
-                key=token_type,
-                value=uuid_,
-            )
+        if grants is not None:
+            claims['grants'] = grants
 
-            if token_type == JWTTokenType.REFRESH_TOKEN:  # pragma: no cover
-                r.expire(
-                    name=f'token:{subject}',
-                    time=claims['exp_in'],
-                )
+        headers: Dict[str, str] = {'typ': 'JWT', 'alg': algorithm}
+
+        if signing_key is not None:
+            headers['kid'] = signing_key.kid
 
         return cls(
             credential=jwt.encode(
                 claims,
-                setting.secret_key.jwt_secret_key,
+                key_set.secret if signing_key is None else signing_key.private_key,
                 algorithm=algorithm,
-                headers={'typ': 'JWT', 'alg': algorithm}
+                headers=headers
             ),
             algorithm=algorithm,
             claims=claims,
         )
 
+    @staticmethod
+    def _cached_claims(
+        claims_cache: ClaimsCache,
+        credential: str,
+        algorithm: str
+    ) -> Optional[Dict[str, Any]]:
+        cached: Optional[Tuple[Optional[Tuple[str, str]], bytes]] = claims_cache.get(credential, algorithm)
+
+        if cached is None:
+            return None
+
+        signed_by, claims = cached
+
+        if signed_by is not None:
+            kid, key_algorithm = signed_by
+            key: Optional[SigningKey] = get_key_set().get(kid)
+
+            if key is None or key.algorithm != key_algorithm:
+                return None  # Key retired or replaced since cached, let decode raise
+
+        return orjson.loads(claims)
+
     @staticmethod
     def decode(
         credential: str,
         algorithm: str = 'HS256'
     ) -> Dict[str, Any]:
-        return jwt.decode(
+        return JWTToken._decode(credential=credential, algorithm=algorithm)[1]
+
+    @staticmethod
+    def _decode(
+        credential: str,
+        algorithm: str = 'HS256'
+    ) -> Tuple[Optional[SigningKey], Dict[str, Any]]:
+        key_set: KeySet = get_key_set()
+        kid: Optional[str] = jwt.get_unverified_header(credential).get('kid')
+
+        if kid is None:
+            return None, jwt.decode(
+                credential,
+                key_set.secret,
+                algorithms=algorithm
+            )
+
+        key: Optional[SigningKey] = key_set.get(kid)
+
+        if key is None:
+            raise InvalidKeyError(f"Signing key '{kid}' not found")
+
+        return key, jwt.decode(
             credential,
-            setting.secret_key.jwt_secret_key,
-            algorithms=algorithm
+            key.public_key,
+            algorithms=key.algorithm
         )
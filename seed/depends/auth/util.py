@@ -6,6 +6,8 @@ from seed.setting import setting
 
 
 class AuthUtil:
+    __slots__ = ()
+
     @classmethod
     def bind_delete_cookie(
         cls,
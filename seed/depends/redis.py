@@ -1,20 +1,422 @@
+import asyncio
+import os
 import redis
+import redis.asyncio as aioredis
+import threading
+import time
 
-from typing import Any
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster, ClusterNode as AsyncClusterNode
+from redis.asyncio.sentinel import Sentinel as AsyncSentinel, SentinelConnectionPool as AsyncSentinelConnectionPool
+from redis.cluster import RedisCluster, ClusterNode
+from redis.sentinel import Sentinel, SentinelConnectionPool
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from seed.setting import setting
 
 
-class RedisContextManager:  # pragma: no cover
+POOL_TIMEOUT_MESSAGE: str = 'No connection available.'  # Raised by blocking pools, when no connection is freed
+
+
+class PoolMetrics:
     def __init__(self) -> None:
-        self.connection: 'Redis' = redis.Redis(
-            host=setting.redis.host,
-            port=setting.redis.port,
-            db=0,
-            encoding=setting.redis.encoding
+        self._lock: threading.Lock = threading.Lock()
+
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.connect_errors: int = 0
+        self.in_use: int = 0
+        self.max_in_use: int = 0
+        self.wait_time_total: float = 0.0
+        self.wait_time_max: float = 0.0
+
+        self._checked_out: Set[int] = set()
+
+    def checkout(
+        self,
+        wait_time: float,
+        connection: 'Connection'
+    ) -> None:
+        with self._lock:
+            self._checked_out.add(id(connection))
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def checkin(self, connection: 'Connection') -> None:
+        with self._lock:
+            if id(connection) in self._checked_out:  # Pool also releases connections failed to connect
+                self._checked_out.discard(id(connection))
+                self.in_use -= 1
+
+    def timeout(self, wait_time: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def connect_error(self) -> None:
+        with self._lock:
+            self.connect_errors += 1
+
+    def failure(
+        self,
+        wait_time: float,
+        error: Exception
+    ) -> None:
+        if isinstance(error, redis.ConnectionError) and str(error) == POOL_TIMEOUT_MESSAGE:
+            self.timeout(wait_time)
+        else:
+            self.connect_error()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connect_errors': self.connect_errors,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+                'wait_time_avg': (
+                    self.wait_time_total / self.checkouts if self.checkouts else 0.0
+                ),
+            }
+
+
+class MetricsPoolMixin:
+    def __init__(self, *args, **kwargs) -> None:
+        self.metrics: PoolMetrics = PoolMetrics()
+
+        super().__init__(*args, **kwargs)
+
+    def get_connection(
+        self,
+        command_name: str,
+        *keys: Any,
+        **options: Any
+    ) -> 'Connection':
+        started_at: float = time.perf_counter()
+
+        try:
+            connection: 'Connection' = super().get_connection(
+                command_name, *keys, **options
+            )
+        except (redis.RedisError, OSError) as e:
+            self.metrics.failure(time.perf_counter() - started_at, e)
+            raise
+
+        self.metrics.checkout(time.perf_counter() - started_at, connection)
+
+        return connection
+
+    def release(self, connection: 'Connection') -> None:
+        super().release(connection)
+
+        self.metrics.checkin(connection)
+
+
+class MetricsConnectionPool(MetricsPoolMixin, redis.BlockingConnectionPool):
+    pass
+
+
+class MetricsSentinelConnectionPool(MetricsPoolMixin, SentinelConnectionPool):
+    pass
+
+
+class AsyncMetricsPoolMixin:
+    def __init__(self, *args, **kwargs) -> None:
+        self.metrics: PoolMetrics = PoolMetrics()
+
+        super().__init__(*args, **kwargs)
+
+    async def get_connection(
+        self,
+        command_name: str,
+        *keys: Any,
+        **options: Any
+    ) -> 'Connection':
+        started_at: float = time.perf_counter()
+
+        try:
+            connection: 'Connection' = await super().get_connection(
+                command_name, *keys, **options
+            )
+        except (redis.RedisError, OSError) as e:
+            self.metrics.failure(time.perf_counter() - started_at, e)
+            raise
+
+        self.metrics.checkout(time.perf_counter() - started_at, connection)
+
+        return connection
+
+    async def release(self, connection: 'Connection') -> None:
+        await super().release(connection)
+
+        self.metrics.checkin(connection)
+
+
+class AsyncMetricsConnectionPool(AsyncMetricsPoolMixin, aioredis.BlockingConnectionPool):
+    pass
+
+
+class AsyncMetricsSentinelConnectionPool(AsyncMetricsPoolMixin, AsyncSentinelConnectionPool):
+    pass
+
+
+_lock: threading.Lock = threading.Lock()
+_pid: Optional[int] = None
+_pool: Optional[MetricsConnectionPool] = None
+_client: Optional[Union[redis.Redis, RedisCluster]] = None
+
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_pool: Optional[AsyncMetricsConnectionPool] = None
+_async_client: Optional[Union[aioredis.Redis, AsyncRedisCluster]] = None
+
+
+def redis_mode() -> str:
+    return setting.redis.get('mode', 'standalone')
+
+
+def transaction_supported() -> bool:
+    return redis_mode() != 'cluster'  # Cluster pipelines are sent per node, without MULTI
+
+
+def publish(
+    client: Union[redis.Redis, RedisCluster],
+    channel: str,
+    *messages: Union[bytes, str]
+) -> None:
+    if redis_mode() == 'cluster':  # Cluster pipelines reject PUBLISH, any node forwards it to subscribers of all nodes
+        for message in messages:
+            client.execute_command('PUBLISH', channel, message, target_nodes=client.RANDOM)
+
+        return
+
+    pipeline: 'Pipeline' = client.pipeline(transaction=False)
+
+    for message in messages:
+        pipeline.publish(channel, message)
+
+    pipeline.execute()
+
+
+async def async_publish(
+    client: Union[aioredis.Redis, AsyncRedisCluster],
+    channel: str,
+    *messages: Union[bytes, str]
+) -> None:
+    if redis_mode() == 'cluster':  # Async cluster client has no publish, sent as raw command
+        for message in messages:
+            await client.execute_command('PUBLISH', channel, message, target_nodes=client.RANDOM)
+
+        return
+
+    pipeline: 'Pipeline' = client.pipeline(transaction=False)
+
+    for message in messages:
+        pipeline.publish(channel, message)
+
+    await pipeline.execute()
+
+
+def _nodes(section: str) -> List[Tuple[str, int]]:
+    return [
+        (host, int(port)) for host, port in (node.rsplit(':', 1) for node in setting.redis[section].nodes)
+    ]
+
+
+def _pool_kwargs() -> Dict[str, Any]:
+    pool_setting: Dict[str, Any] = setting.redis.get('pool', {})
+
+    return {
+        'host': setting.redis.host,
+        'port': setting.redis.port,
+        'db': setting.redis.get('db', 0),
+        'encoding': setting.redis.encoding,
+        'max_connections': pool_setting.get('max_connections', 50),
+        'timeout': pool_setting.get('timeout', 5),
+        'socket_timeout': pool_setting.get('socket_timeout', None),
+        'socket_connect_timeout': pool_setting.get('socket_connect_timeout', None),
+        'socket_keepalive': pool_setting.get('socket_keepalive', False),
+        'health_check_interval': pool_setting.get('health_check_interval', 0),
+    }
+
+
+def _connection_kwargs(*excludes: str) -> Dict[str, Any]:
+    return {
+        k: v for k, v in _pool_kwargs().items()
+        if k not in ('host', 'port', 'timeout', *excludes)
+    }  # Nodes are discovered, only blocking pool waits for free connection
+
+
+def _sentinel_kwargs() -> Dict[str, Any]:
+    return {
+        'service_name': setting.redis.sentinel.get('service_name', 'mymaster'),
+        'sentinel_kwargs': {
+            'socket_timeout': setting.redis.get('pool', {}).get('socket_timeout', None),
+        },
+    }
+
+
+def get_connection_pool() -> MetricsConnectionPool:
+    global _pid, _pool, _client
+
+    if _pool is not None and _pid == os.getpid():
+        return _pool
+
+    with _lock:
+        if _pool is None or _pid != os.getpid():  # Created once per worker process
+            if redis_mode() == 'sentinel':  # Primary is resolved by sentinels again after failover
+                sentinel_kwargs: Dict[str, Any] = _sentinel_kwargs()
+
+                _pool = MetricsSentinelConnectionPool(
+                    sentinel_kwargs['service_name'],
+                    Sentinel(_nodes('sentinel'), sentinel_kwargs=sentinel_kwargs['sentinel_kwargs']),
+                    **_connection_kwargs(),
+                )
+            else:
+                _pool = MetricsConnectionPool(**_pool_kwargs())
+
+            _client = None
+            _pid = os.getpid()
+
+    return _pool
+
+
+def get_redis() -> Union[redis.Redis, RedisCluster]:
+    global _pid, _client
+
+    if redis_mode() == 'cluster':
+        if _client is None or _pid != os.getpid():
+            with _lock:
+                if _client is None or _pid != os.getpid():  # Pools are kept per cluster node
+                    _client = RedisCluster(
+                        startup_nodes=[ClusterNode(host, port) for host, port in _nodes('cluster')],
+                        **_connection_kwargs('db'),
+                    )
+                    _pid = os.getpid()
+
+        return _client
+
+    pool: MetricsConnectionPool = get_connection_pool()
+
+    if _client is None:
+        _client = redis.Redis(connection_pool=pool)
+
+    return _client
+
+
+def _disconnect_async(
+    client: Optional[Union[AsyncMetricsConnectionPool, AsyncRedisCluster]],
+    loop: Optional[asyncio.AbstractEventLoop]
+) -> None:
+    if client is None or loop is None or loop.is_closed():
+        return  # Transports of closed loop are already gone
+
+    coroutine: Any = client.disconnect() if hasattr(client, 'disconnect') else client.close()
+
+    if loop.is_running():  # Owned by other thread
+        asyncio.run_coroutine_threadsafe(coroutine, loop)
+    else:
+        loop.run_until_complete(coroutine)
+
+
+def get_async_connection_pool() -> AsyncMetricsConnectionPool:
+    global _async_loop, _async_pool, _async_client
+
+    loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+
+    if _async_pool is not None and _async_loop is loop:
+        return _async_pool
+
+    with _lock:
+        if _async_pool is None or _async_loop is not loop:  # Asyncio connections are bound to their event loop
+            _disconnect_async(_async_pool, _async_loop)
+
+            if redis_mode() == 'sentinel':
+                sentinel_kwargs: Dict[str, Any] = _sentinel_kwargs()
+
+                _async_pool = AsyncMetricsSentinelConnectionPool(
+                    sentinel_kwargs['service_name'],
+                    AsyncSentinel(_nodes('sentinel'), sentinel_kwargs=sentinel_kwargs['sentinel_kwargs']),
+                    **_connection_kwargs(),
+                )
+            else:
+                _async_pool = AsyncMetricsConnectionPool(**_pool_kwargs())
+
+            _async_client = None
+            _async_loop = loop
+
+    return _async_pool
+
+
+def get_async_redis() -> Union[aioredis.Redis, AsyncRedisCluster]:
+    global _async_loop, _async_client
+
+    if redis_mode() == 'cluster':
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+
+        if _async_client is None or _async_loop is not loop:
+            with _lock:
+                if _async_client is None or _async_loop is not loop:
+                    _disconnect_async(_async_client, _async_loop)
+
+                    _async_client = AsyncRedisCluster(
+                        startup_nodes=[AsyncClusterNode(host, port) for host, port in _nodes('cluster')],
+                        **_connection_kwargs('db'),
+                    )
+                    _async_loop = loop
+
+        return _async_client
+
+    pool: AsyncMetricsConnectionPool = get_async_connection_pool()
+
+    if _async_client is None:
+        _async_client = aioredis.Redis(connection_pool=pool)
+
+    return _async_client
+
+
+def reset_connection_pool() -> None:
+    global _pid, _pool, _client, _async_loop, _async_pool, _async_client
+
+    with _lock:
+        if _pool is not None:
+            _pool.disconnect()
+
+        if isinstance(_client, RedisCluster):
+            _client.close()
+
+        _disconnect_async(
+            _async_client if isinstance(_async_client, AsyncRedisCluster) else _async_pool, _async_loop
         )
 
-    def __enter__(self) -> 'Redis':
+        _pid, _pool, _client = None, None, None
+        _async_loop, _async_pool, _async_client = None, None, None
+
+
+def pool_metrics() -> Dict[str, Any]:
+    if redis_mode() == 'cluster':
+        return {}  # Connections are pooled per cluster node
+
+    return get_connection_pool().metrics.snapshot()
+
+
+def async_pool_metrics() -> Dict[str, Any]:
+    if redis_mode() == 'cluster':
+        return {}
+
+    return get_async_connection_pool().metrics.snapshot()
+
+
+class RedisContextManager:
+    def __init__(self) -> None:
+        self.connection: redis.Redis = get_redis()
+
+    def __enter__(self) -> redis.Redis:
         return self.connection
 
     def __exit__(
@@ -23,9 +425,30 @@ class RedisContextManager:  # pragma: no cover
         exc_value: Any,
         traceback: Any
     ) -> None:
-        self.connection.close()
+        pass  # Connections go back to the shared pool after each command
+
+
+class AsyncRedisContextManager:
+    def __init__(self) -> None:
+        self.connection: aioredis.Redis = get_async_redis()
+
+    async def __aenter__(self) -> aioredis.Redis:
+        return self.connection
+
+    async def __aexit__(
+        self,
+        exc_type: Any,
+        exc_value: Any,
+        traceback: Any
+    ) -> None:
+        pass
 
 
 class Redis:  # pragma: no cover
     def __new__(self):
         return RedisContextManager
+
+
+class AsyncRedis:  # pragma: no cover
+    def __new__(self):
+        return AsyncRedisContextManager
@@ -96,3 +96,11 @@ class OAuthHTTPException(HTTPException):
 
 class UserHTTPException(HTTPException):
     pass
+
+
+class AdminHTTPException(HTTPException):
+    pass
+
+
+class RouterHTTPException(HTTPException):
+    pass
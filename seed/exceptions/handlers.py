@@ -34,7 +34,8 @@ async def seed_http_exception_handler(
 
     return ORJSONResponse(
         error_data,
-        status_code=exc.status_code
+        status_code=exc.status_code,
+        headers=exc.headers
     )
 
 
@@ -0,0 +1,184 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import status
+from typing import Any, Callable, Dict, Optional
+
+from .exceptions import RouterHTTPException
+from .setting import setting
+
+
+class ExecutorMetrics:
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+
+        self.submitted: int = 0
+        self.rejected: int = 0
+        self.queued: int = 0
+        self.max_queued: int = 0
+        self.running: int = 0
+        self.wait_time_total: float = 0.0
+        self.wait_time_max: float = 0.0
+
+    def submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+    def start(self, wait_time: float) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.running -= 1
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            started: int = self.submitted - self.queued
+
+            return {
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'running': self.running,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+                'wait_time_avg': self.wait_time_total / started if started else 0.0,
+            }
+
+
+class BoundedExecutor:
+    def __init__(
+        self,
+        name: str = 'route',
+        max_workers: int = 40,
+        max_queue: Optional[int] = 200,
+        reject_status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+        retry_after: Optional[int] = 1
+    ) -> None:
+        self.name: str = name
+        self.max_workers: int = max_workers
+        self.max_queue: Optional[int] = max_queue  # None is unbounded, never rejected
+        self.reject_status_code: int = reject_status_code
+        self.retry_after: Optional[int] = retry_after
+        self.metrics: ExecutorMetrics = ExecutorMetrics()
+
+        self._pid: Optional[int] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __repr__(self) -> str:
+        return f'<BoundedExecutor name={self.name} max_workers={self.max_workers} max_queue={self.max_queue}>'
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():  # Threads are not inherited by forked workers
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f'executor:{self.name}',
+            )
+            self._pid = os.getpid()
+
+        return self._executor
+
+    def _reject(self) -> None:
+        self.metrics.reject()
+
+        raise RouterHTTPException(
+            symbol='server_busy',
+            message='Server is busy, retry later',
+            headers={'Retry-After': str(self.retry_after)} if self.retry_after is not None else None,
+            status_code=self.reject_status_code,
+        )
+
+    def _call(
+        self,
+        submitted_at: float,
+        func: Callable[..., Any]
+    ) -> Any:
+        self.metrics.start(time.perf_counter() - submitted_at)
+
+        try:
+            return func()
+        finally:
+            self.metrics.finish()
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args,
+        **kwargs
+    ) -> Any:
+        if self.max_queue is not None and self.metrics.queued >= self.max_queue:
+            self._reject()
+
+        self.metrics.submit()
+
+        context: contextvars.Context = contextvars.copy_context()  # Request scoped database session, logger
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor,
+            context.run,
+            functools.partial(
+                self._call, time.perf_counter(), functools.partial(func, *args, **kwargs)
+            ),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+        self._executor = None
+
+
+_lock: threading.Lock = threading.Lock()
+_default: Optional[BoundedExecutor] = None
+
+
+def get_default_executor() -> BoundedExecutor:
+    global _default
+
+    if _default is not None:
+        return _default
+
+    with _lock:
+        if _default is None:
+            executor_setting: Dict[str, Any] = setting.get('router', {}).get('executor', {})
+
+            _default = BoundedExecutor(
+                name='default',
+                max_workers=executor_setting.get('max_workers', 40),
+                max_queue=executor_setting.get('max_queue', 200),
+                reject_status_code=executor_setting.get('reject_status_code', status.HTTP_503_SERVICE_UNAVAILABLE),
+                retry_after=executor_setting.get('retry_after', 1),
+            )
+
+    return _default
+
+
+def reset_default_executor() -> None:
+    global _default
+
+    with _lock:
+        if _default is not None:
+            _default.shutdown()
+
+        _default = None
+
+
+def executor_metrics(executor: Optional[BoundedExecutor] = None) -> Dict[str, Any]:
+    return (executor or get_default_executor()).metrics.snapshot()
@@ -118,6 +118,10 @@ class UserModel(Base, ModelMixin):
         db.session.add(user_profile)
         db.session.bulk_save_objects(roles)
 
+        from seed.depends.auth.principal import queue_principal_changes  # Principal imports models
+
+        queue_principal_changes(db.session, {user.id: user.key_field})  # Bulk saves are not seen by flush listeners
+
 
     @classmethod
     def q_email_or_username(
@@ -0,0 +1,338 @@
+import jwt
+import math
+import redis
+import threading
+import time
+
+from collections import OrderedDict
+from fastapi import Request, status
+from fastapi.responses import Response
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .depends.auth import JWTToken
+from .depends.redis import AsyncRedisContextManager
+from .depends.uuid import UUID
+from .exceptions import RouterHTTPException
+from .logger import logger
+from .setting import feature_enabled, setting
+from .utils.request import REQUEST_PARAMETER
+
+
+# Both return {allowed, remaining, reset ms, retry after ms}, time is passed by caller, scripts stay deterministic
+TOKEN_BUCKET_SCRIPT: str = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+
+local retry = 0
+
+if allowed == 0 then
+    retry = math.max(1, math.ceil((1 - tokens) / rate))
+end
+
+return {allowed, math.floor(tokens), math.ceil((capacity - tokens) / rate), retry}
+"""
+
+SLIDING_WINDOW_SCRIPT: str = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local current = math.floor(now / window)
+local data = redis.call('HMGET', KEYS[1], 'window', 'current', 'previous')
+local last = tonumber(data[1])
+local count = tonumber(data[2]) or 0
+local previous = tonumber(data[3]) or 0
+
+if last ~= current then
+    if last == current - 1 then
+        previous = count
+    else
+        previous = 0
+    end
+
+    count = 0
+end
+
+local elapsed = (now % window) / window
+local weighted = previous * (1 - elapsed) + count
+local allowed = 0
+
+if weighted + 1 <= limit then
+    count = count + 1
+    weighted = weighted + 1
+    allowed = 1
+end
+
+redis.call('HMSET', KEYS[1], 'window', current, 'current', count, 'previous', previous)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+
+local reset = window - now % window
+local retry = 0
+
+if allowed == 0 then
+    if count + 1 > limit or previous == 0 then
+        retry = reset
+    else
+        retry = math.max(1, math.ceil((1 - (limit - 1 - count) / previous - elapsed) * window))
+    end
+end
+
+return {allowed, math.max(0, math.floor(limit - weighted)), reset, retry}
+"""
+
+
+class RateLimitResult:
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset', 'retry_after')
+
+    def __init__(
+        self,
+        allowed: bool,
+        limit: int,
+        remaining: int,
+        reset: int,
+        retry_after: int = 0
+    ) -> None:
+        self.allowed: bool = allowed
+        self.limit: int = limit
+        self.remaining: int = remaining
+        self.reset: int = reset  # Seconds
+        self.retry_after: int = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+        }
+
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+
+        return headers
+
+
+class LocalBlocks:
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize: int = maxsize
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def blocked(self, key: str) -> Optional[float]:
+        blocked_until: Optional[float] = self._entries.get(key)
+
+        if blocked_until is None:
+            return None
+
+        remaining: float = blocked_until - time.monotonic()
+
+        if remaining <= 0:
+            with self._lock:
+                self._entries.pop(key, None)
+
+            return None
+
+        return remaining
+
+    def block(
+        self,
+        key: str,
+        seconds: float
+    ) -> None:
+        with self._lock:
+            self._entries[key] = time.monotonic() + seconds
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RateLimit:
+    _algorithms: Dict[str, str] = {
+        'token_bucket': TOKEN_BUCKET_SCRIPT,
+        'sliding_window': SLIDING_WINDOW_SCRIPT,
+    }
+    _keys: Tuple[str, ...] = ('ip', 'uuid', 'subject')
+
+    def __init__(
+        self,
+        limit: int,
+        period: int = 60,
+        key: str = 'ip',
+        algorithm: str = 'sliding_window',
+        name: Optional[str] = None,
+        status_code: int = status.HTTP_429_TOO_MANY_REQUESTS
+    ) -> None:
+        assert algorithm in self._algorithms, f"Algorithm must be one of {', '.join(self._algorithms)}"
+        assert key in self._keys, f"Key must be one of {', '.join(self._keys)}"
+        assert limit > 0 and period > 0, 'Limit and period must be positive'
+
+        self.limit: int = limit
+        self.period: int = period  # Seconds, refill time of full bucket on token bucket
+        self.key: str = key
+        self.algorithm: str = algorithm
+        self.name: Optional[str] = name
+        self.status_code: int = status_code
+
+        self._script: Optional['AsyncScript'] = None
+
+    def identity(self, request: Request) -> str:
+        if self.key == 'subject':
+            subject: Optional[str] = self.subject(request)
+
+            if subject is not None:
+                return f'subject:{subject}'
+        elif self.key == 'uuid':
+            return f'uuid:{UUID.get_uuid(request)}'
+
+        return f'ip:{request.client.host}'  # Anonymous subject limit falls back to ip, proxy's without --proxy-headers
+
+    @staticmethod
+    def subject(request: Request) -> Optional[str]:  # Checked before auth depends, by signature without token store
+        type_, _, credential = request.headers.get('authorization', '').partition(' ')
+
+        if type_ != 'Bearer' or not credential:
+            credential = next(filter(None, (
+                request.cookies.get(key) for key in setting.jwt.cookie.key.values()
+            )), None)
+
+        if not credential:
+            return None
+
+        try:
+            return JWTToken(credential).subject
+        except (jwt.PyJWTError, KeyError):  # Rejected by auth depend later, limited by ip
+            return None
+
+    def _args(self, now: float) -> Tuple[Any, ...]:
+        period: int = self.period * 1000
+
+        if self.algorithm == 'token_bucket':
+            return self.limit, self.limit / period, int(now)
+
+        return self.limit, period, int(now)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        async with AsyncRedisContextManager() as r:
+            if self._script is None:
+                self._script = r.register_script(self._algorithms[self.algorithm])
+
+            allowed, remaining, reset, retry_after = await self._script(
+                keys=[f'ratelimit:{key}'], args=self._args(time.time() * 1000), client=r
+            )
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limit,
+            remaining=int(remaining),
+            reset=math.ceil(int(reset) / 1000),
+            retry_after=math.ceil(int(retry_after) / 1000),
+        )
+
+    def _raise(self, result: RateLimitResult) -> None:
+        raise RouterHTTPException(
+            symbol='rate_limit_exceeded',
+            message='Too many requests, retry later',
+            headers=result.headers,
+            status_code=self.status_code,
+        )
+
+    def depend(self, name: str) -> Callable[[Request], Awaitable[None]]:
+        name = self.name or name
+
+        async def _(request: Request) -> None:  # First route dependency, before auth depends and body validation
+            blocks: Optional[LocalBlocks] = get_local_blocks()
+
+            if blocks is None:
+                return
+
+            key: str = f'{name}:{self.identity(request)}'
+            blocked: Optional[float] = blocks.blocked(key)
+
+            if blocked is not None:  # Still rejected by redis, shed without round trip
+                retry_after: int = math.ceil(blocked)
+
+                self._raise(RateLimitResult(False, self.limit, 0, retry_after, retry_after))
+
+            try:
+                result: RateLimitResult = await self.hit(key)
+            except redis.RedisError as e:  # Not limited, rather than failed
+                logger.warning(f"Rate limit of '{name}' is not available: {e}")
+
+                return
+
+            if not result.allowed:
+                blocks.block(key, result.retry_after)
+
+                self._raise(result)
+
+            request.state.rate_limit = result
+
+        return _
+
+    def wrap(
+        self,
+        endpoint: Callable[..., Any],
+        name: str,
+        parameter: str = REQUEST_PARAMETER
+    ) -> Callable[..., Any]:
+        @wraps(endpoint)
+        async def _(*args, **kwargs):
+            response: Response = await endpoint(*args, **kwargs)
+            result: Optional[RateLimitResult] = getattr(kwargs[parameter].state, 'rate_limit', None)
+
+            if result is not None:  # Checked by depend
+                response.headers.update(result.headers)
+
+            return response
+
+        return _
+
+
+_lock: threading.Lock = threading.Lock()
+_blocks: Optional[LocalBlocks] = None
+
+
+def get_local_blocks() -> Optional[LocalBlocks]:
+    global _blocks
+
+    if not feature_enabled('router', 'rate_limit'):
+        return None
+
+    if _blocks is None:
+        with _lock:
+            if _blocks is None:
+                _blocks = LocalBlocks(maxsize=setting.router.rate_limit.get('local_maxsize', 10000))
+
+    return _blocks
+
+
+def reset_local_blocks() -> None:
+    global _blocks
+
+    with _lock:
+        _blocks = None
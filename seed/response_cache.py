@@ -0,0 +1,386 @@
+import hashlib
+import redis
+import threading
+import time
+
+from collections import OrderedDict
+from fastapi import Request, status
+from fastapi.responses import Response
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .depends.auth import context_subject
+from .depends.redis import RedisContextManager, AsyncRedisContextManager
+from .logger import logger
+from .setting import feature_enabled, setting
+from .utils.request import REQUEST_PARAMETER
+
+
+class CachedResponse:
+    __slots__ = ('body', 'status_code', 'media_type', 'etag')
+
+    def __init__(
+        self,
+        body: bytes,
+        status_code: int = status.HTTP_200_OK,
+        media_type: Optional[str] = None,
+        etag: Optional[str] = None
+    ) -> None:
+        self.body: bytes = body
+        self.status_code: int = status_code
+        self.media_type: Optional[str] = media_type
+        self.etag: str = etag or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    @classmethod
+    def from_response(cls, response: Response) -> 'CachedResponse':
+        return cls(
+            body=response.body,
+            status_code=response.status_code,
+            media_type=response.headers.get('content-type'),
+            etag=response.headers.get('etag'),
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[bytes, bytes]) -> 'CachedResponse':
+        return cls(
+            body=mapping[b'body'],
+            status_code=int(mapping[b'status_code']),
+            media_type=mapping[b'media_type'].decode() or None,
+            etag=mapping[b'etag'].decode(),
+        )
+
+    def to_mapping(self) -> Dict[str, Any]:
+        return {
+            'body': self.body,
+            'status_code': self.status_code,
+            'media_type': self.media_type or '',
+            'etag': self.etag,
+        }
+
+    def to_response(self, headers: Dict[str, str]) -> Response:
+        return Response(
+            self.body,
+            status_code=self.status_code,
+            headers={**headers, 'ETag': self.etag},
+            media_type=self.media_type,
+        )
+
+
+class MemoryResponseCache:
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize: int = maxsize
+
+        self._lock: threading.Lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[CachedResponse, float, Sequence[str]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry: Optional[Tuple[CachedResponse, float, Sequence[str]]] = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry[0]
+
+    async def set(
+        self,
+        key: str,
+        tags: Sequence[str],
+        cached: CachedResponse,
+        ttl: int
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (cached, time.monotonic() + ttl, tags)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tag: str) -> int:
+        with self._lock:  # Scan is bounded by maxsize, invalidation is rare next to lookups
+            keys: List[str] = [k for k, (_, _, tags) in self._entries.items() if tag in tags]
+
+            for key in keys:
+                del self._entries[key]
+
+        return len(keys)
+
+    async def invalidate_async(self, tag: str) -> int:
+        return self.invalidate(tag)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisResponseCache:
+    @staticmethod
+    def name(key: str) -> str:
+        return f'response:{key}'
+
+    @staticmethod
+    def tag_name(tag: str) -> str:
+        return f'response:tag:{tag}'
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        async with AsyncRedisContextManager() as r:
+            mapping: Dict[bytes, bytes] = await r.hgetall(self.name(key))
+
+        return CachedResponse.from_mapping(mapping) if mapping else None
+
+    async def set(
+        self,
+        key: str,
+        tags: Sequence[str],
+        cached: CachedResponse,
+        ttl: int
+    ) -> None:
+        name: str = self.name(key)
+
+        async with AsyncRedisContextManager() as r:
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+            pipeline.hset(name, mapping=cached.to_mapping())
+            pipeline.expire(name, ttl)
+
+            for tag in tags:  # Members of tag outlive their keys at most by ttl
+                pipeline.sadd(self.tag_name(tag), name)
+                pipeline.expire(self.tag_name(tag), ttl)
+
+            await pipeline.execute()
+
+    def invalidate(self, tag: str) -> int:
+        with RedisContextManager() as r:
+            names: List[bytes] = list(r.smembers(self.tag_name(tag)))
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+            for name in names:  # Per key, names may be on different cluster slots
+                pipeline.unlink(name)
+
+            pipeline.unlink(self.tag_name(tag))
+
+            return sum(pipeline.execute()[:-1])
+
+    async def invalidate_async(self, tag: str) -> int:
+        async with AsyncRedisContextManager() as r:
+            names: List[bytes] = list(await r.smembers(self.tag_name(tag)))
+            pipeline: 'Pipeline' = r.pipeline(transaction=False)
+
+            for name in names:
+                pipeline.unlink(name)
+
+            pipeline.unlink(self.tag_name(tag))
+
+            return sum((await pipeline.execute())[:-1])
+
+
+def _tags(
+    name: str,
+    subject: Optional[str] = None
+) -> List[str]:
+    return [name] if subject is None else [name, f'{name}:{subject}']
+
+
+def _if_none_match(
+    request: Request,
+    etag: str
+) -> bool:
+    header: Optional[str] = request.headers.get('if-none-match')
+
+    if header is None:
+        return False
+
+    return any(
+        t == '*' or t.replace('W/', '', 1) == etag for t in map(str.strip, header.split(','))
+    )
+
+
+class RouteCache:
+    _vary_sources: Tuple[str, ...] = ('subject', 'query', 'header', 'cookie')
+
+    def __init__(
+        self,
+        ttl: int = 60,
+        vary: Optional[List[str]] = None,
+        name: Optional[str] = None
+    ) -> None:
+        self.ttl: int = ttl
+        self.vary: List[str] = vary or []
+        self.name: Optional[str] = name
+
+        for v in self.vary:
+            assert v.split(':', 1)[0] in self._vary_sources, (
+                "Vary must be 'subject', 'query', 'query:<name>', 'header:<name>' or 'cookie:<name>'"
+            )
+
+    def key(
+        self,
+        name: str,
+        request: Request,
+        subject: Optional[str]
+    ) -> str:
+        parts: List[str] = [request.method, request.url.path]
+
+        for v in self.vary:
+            source, _, field = v.partition(':')
+
+            if source == 'subject':
+                parts.append(subject or '')
+            elif source == 'query':
+                parts.append(request.url.query if not field else request.query_params.get(field, ''))
+            elif source == 'header':
+                parts.append(request.headers.get(field, ''))
+            else:
+                parts.append(request.cookies.get(field, ''))
+
+        return f"{name}:{hashlib.blake2b(chr(0).join(parts).encode(), digest_size=16).hexdigest()}"
+
+    @staticmethod
+    def cacheable(response: Response) -> bool:
+        return (
+            200 <= response.status_code < 300
+            and response.status_code != status.HTTP_204_NO_CONTENT
+            and isinstance(getattr(response, 'body', None), bytes)
+            and 'set-cookie' not in response.headers
+        )
+
+    def wrap(
+        self,
+        endpoint: Callable[..., Any],
+        name: str,
+        parameter: str = REQUEST_PARAMETER
+    ) -> Callable[..., Any]:
+        name = self.name or name
+        headers: Dict[str, str] = {
+            'Cache-Control': 'private, no-cache' if 'subject' in self.vary else 'no-cache'
+        }
+
+        @wraps(endpoint)
+        async def _(*args, **kwargs):
+            request: Request = kwargs[parameter]
+            cache: Optional[Any] = get_response_cache()
+
+            if cache is None:
+                return await endpoint(*args, **kwargs)
+
+            subject: Optional[str] = context_subject(kwargs)
+            key: str = self.key(name, request, subject)
+            cached: Optional[CachedResponse] = None
+
+            try:
+                cached = await cache.get(key)
+            except redis.RedisError as e:  # Served uncached, not failed
+                logger.warning(f"Response cache of '{name}' is not available: {e}")
+
+            if cached is None:
+                response: Response = await endpoint(*args, **kwargs)
+
+                if not self.cacheable(response):
+                    return response
+
+                cached = CachedResponse.from_response(response)
+
+                try:
+                    await cache.set(key, _tags(name, subject), cached, self.ttl)
+                except redis.RedisError as e:
+                    logger.warning(f"Response cache of '{name}' is not available: {e}")
+
+            if _if_none_match(request, cached.etag):  # Revalidated, route body is not run on hit
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, 'ETag': cached.etag})
+
+            return cached.to_response(headers)
+
+        return _
+
+
+class RouteCacheInvalidate:
+    def __init__(
+        self,
+        names: Sequence[str],
+        by_subject: bool = True
+    ) -> None:
+        self.names: Sequence[str] = names
+        self.by_subject: bool = by_subject
+
+    def wrap(
+        self,
+        endpoint: Callable[..., Any],
+        name: str,
+        parameter: str = REQUEST_PARAMETER
+    ) -> Callable[..., Any]:
+        @wraps(endpoint)
+        async def _(*args, **kwargs):
+            subject: Optional[str] = context_subject(kwargs) if self.by_subject else None
+            response: Response = await endpoint(*args, **kwargs)
+
+            if response.status_code < 400:
+                for n in self.names:
+                    await invalidate_response_cache_async(n, subject=subject)
+
+            return response
+
+        return _
+
+
+_lock: threading.Lock = threading.Lock()
+_cache: Optional[Any] = None
+
+
+def get_response_cache() -> Optional[Any]:
+    global _cache
+
+    if not feature_enabled('router', 'cache'):
+        return None
+
+    if _cache is not None:
+        return _cache
+
+    with _lock:
+        if _cache is None:
+            cache_setting: Dict[str, Any] = setting.router.cache
+
+            if cache_setting.get('backend', 'memory') == 'redis':
+                _cache = RedisResponseCache()
+            else:
+                _cache = MemoryResponseCache(maxsize=cache_setting.get('maxsize', 10000))
+
+    return _cache
+
+
+def reset_response_cache() -> None:
+    global _cache
+
+    with _lock:
+        if isinstance(_cache, MemoryResponseCache):
+            _cache.clear()
+
+        _cache = None
+
+
+def invalidate_response_cache(
+    name: str,
+    subject: Optional[str] = None
+) -> int:
+    cache: Optional[Any] = get_response_cache()
+
+    return 0 if cache is None else cache.invalidate(_tags(name, subject)[-1])
+
+
+async def invalidate_response_cache_async(
+    name: str,
+    subject: Optional[str] = None
+) -> int:
+    cache: Optional[Any] = get_response_cache()
+
+    if cache is None:
+        return 0
+
+    return await cache.invalidate_async(_tags(name, subject)[-1])
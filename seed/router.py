@@ -1,15 +1,24 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
 from fastapi.responses import Response, ORJSONResponse
 from functools import wraps
 from inspect import iscoroutinefunction
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+from .response_cache import RouteCache, RouteCacheInvalidate
+from .executor import BoundedExecutor, get_default_executor
+from .rate_limit import RateLimit
+from .serializer import FastORJSONResponse, ResponseSampler
+from .utils.request import REQUEST_PARAMETER, request_parameter, with_request
+
 
 class Route:
     _available_methods: List[str] = [
         'get', 'head', 'post', 'put', 'delete', 'options', 'trace', 'patch'
     ]
     _endpoint_options: Dict[str, Any] = {}
+    _route_options: Tuple[str, ...] = (
+        'executor', 'fast_serialize', 'orjson_options', 'cache', 'cache_invalidate', 'rate_limit'
+    )  # Used by seed, not FastAPI
 
     @classmethod
     def doc_option(
@@ -44,7 +53,11 @@ class Route:
         operation_id: Optional[str] = None,
         response_class: Response = ORJSONResponse,
         route_class_override: Optional['APIRoute'] = None,
-        callbacks: Optional[List['BaseRoute']] = None
+        callbacks: Optional[List['BaseRoute']] = None,
+        executor: Optional[BoundedExecutor] = None,
+        fast_serialize: Optional[bool] = None,
+        orjson_options: Optional[int] = None,
+        rate_limit: Optional[RateLimit] = None
     ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
         def _(method):
             method.endpoint_options: Dict[str, Any] = {
@@ -56,6 +69,19 @@ class Route:
                 'route_class_override': route_class_override,
                 'callbacks': callbacks,
             }
+
+            if executor is not None:  # Otherwise router's or default executor
+                method.endpoint_options['executor'] = executor
+
+            if fast_serialize is not None:
+                method.endpoint_options['fast_serialize'] = fast_serialize
+
+            if orjson_options is not None:
+                method.endpoint_options['orjson_options'] = orjson_options
+
+            if rate_limit is not None:
+                method.endpoint_options['rate_limit'] = rate_limit
+
             return method
         return _
 
@@ -83,6 +109,35 @@ class Route:
             return method
         return _
 
+    @classmethod
+    def cache(
+        cls,
+        ttl: int = 60,
+        vary: Optional[List[str]] = None,
+        name: Optional[str] = None
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def _(method):
+            method.cache_options: Dict[str, Any] = {
+                **getattr(method, 'cache_options', {}),
+                'cache': RouteCache(ttl=ttl, vary=vary, name=name),
+            }
+            return method
+        return _
+
+    @classmethod
+    def cache_invalidate(
+        cls,
+        *names: str,
+        by_subject: bool = True
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def _(method):
+            method.cache_options: Dict[str, Any] = {
+                **getattr(method, 'cache_options', {}),
+                'cache_invalidate': RouteCacheInvalidate(names, by_subject=by_subject),
+            }
+            return method
+        return _
+
     @classmethod
     def _get_endpoints(cls) -> Dict[str, Callable[..., Any]]:
         endpoints: Dict[str, Callable[..., Any]] = {}
@@ -101,12 +156,16 @@ class Router(APIRouter):
         self,
         *args,
         endpoint_options: Optional[Dict[str, Any]] = {},
+        executor: Optional[BoundedExecutor] = None,
         **kwargs
     ) -> None:
         super().__init__(*args, **kwargs)
 
         self.endpoint_options: Dict[str, Any] = endpoint_options
 
+        if executor is not None:
+            self.endpoint_options = {**endpoint_options, 'executor': executor}
+
     def Route(
         self,
         path: str,
@@ -126,11 +185,22 @@ class Router(APIRouter):
                     **endpoint_options,
                     **getattr(endpoint, 'endpoint_options', {}),
                     **getattr(endpoint, 'doc_options', {}),
-                    **getattr(endpoint, 'response_model', {})
+                    **getattr(endpoint, 'response_model', {}),
+                    **getattr(endpoint, 'cache_options', {})
                 }
 
                 kwargs['methods'] = [method.upper()]
 
+                endpoint.route_options: Dict[str, Any] = {
+                    k: kwargs.pop(k) for k in Route._route_options if k in kwargs
+                }
+
+                if endpoint.route_options.get('rate_limit') is not None:  # Before every other dependency
+                    kwargs['dependencies'] = [
+                        Depends(endpoint.route_options['rate_limit'].depend(endpoint.__qualname__)),
+                        *(kwargs.get('dependencies') or []),
+                    ]
+
                 endpoint.options: Dict[str, Any] = kwargs
                 endpoint: Callable[..., 'Response'] = self._endpoint_wrapper(endpoint)
 
@@ -142,28 +212,20 @@ class Router(APIRouter):
         self,
         method: Callable[..., Any]
     ) -> Any:
-        @wraps(method)
-        async def _(*args, **kwargs):
-            response: Any = None
-            method_options: Dict[str, Any] = {}
-
-            try:
-                method_options = method.options
-            except AttributeError:
-                pass
-
-            status_code: int = method_options.get(
-                'status_code',
-                status.HTTP_200_OK
-            )
+        method_options: Dict[str, Any] = getattr(method, 'options', {})
 
-            if not hasattr(method, 'is_coroutine'):
-                method.is_coroutine: bool = iscoroutinefunction(method)
+        default_status_code: int = method_options.get('status_code', status.HTTP_200_OK)
+        response_class: Response = method_options.get('response_class', ORJSONResponse)
+        route_options: Dict[str, Any] = getattr(method, 'route_options', {})
+        executor: Optional[BoundedExecutor] = route_options.get('executor')
+        fast_serialize: bool = route_options.get('fast_serialize', False)
+        orjson_options: Optional[int] = route_options.get('orjson_options')
+        sampler: Optional[ResponseSampler] = ResponseSampler(
+            method_options['response_model'], method_options.get('name') or method.__qualname__
+        ) if fast_serialize and method_options.get('response_model') is not None else None
 
-            if method.is_coroutine:
-                response: Any = await method(*args, **kwargs)
-            else:
-                response: Any = method(*args, **kwargs)
+        def _response(response: Any) -> Response:  # Options are bound once, on route registration
+            status_code: int = default_status_code
 
             if isinstance(response, tuple):
                 assert len(response) == 2, 'Response must be Tuple[response, status_code]'
@@ -174,11 +236,50 @@ class Router(APIRouter):
 
             if isinstance(response, Response):
                 response.status_code = status_code
-            else:
-                response_class = method_options.get('response_class', ORJSONResponse)
-                response = response_class(response, status_code=status_code)
 
-            return response
+                return response
+
+            if fast_serialize:  # Straight to bytes, without jsonable_encoder
+                response = FastORJSONResponse(response, status_code=status_code, option=orjson_options)
+
+                if sampler is not None:
+                    sampler.check(response.body)
+
+                return response
+
+            return response_class(response, status_code=status_code)
+
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def _(*args, **kwargs):
+                return _response(await method(*args, **kwargs))
+        else:
+            @wraps(method)
+            async def _(*args, **kwargs):  # Blocking work runs on bounded threadpool, not on event loop
+                return _response(
+                    await (executor or get_default_executor()).run(method, *args, **kwargs)
+                )
+
+        hooks: List[Any] = [
+            route_options[h] for h in ('cache_invalidate', 'cache', 'rate_limit') if route_options.get(h) is not None
+        ]  # Last one runs first, rate limit headers are added to cached responses too
+
+        if len(hooks):
+            parameter: Optional[str] = request_parameter(method)
+
+            if parameter is None:  # Hooks read request, route methods are not changed
+                endpoint: Callable[..., Any] = _
+
+                @wraps(method)
+                async def _(*args, **kwargs):
+                    kwargs.pop(REQUEST_PARAMETER)
+                    return await endpoint(*args, **kwargs)
+
+            for hook in hooks:
+                _ = hook.wrap(_, method.__qualname__, parameter or REQUEST_PARAMETER)
+
+            if parameter is None:
+                _ = with_request(_, method)
 
         return _
 
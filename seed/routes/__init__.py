@@ -1,9 +1,11 @@
 from seed.router import Router
 
-from .auth import router as auth_router
+from .admin import router as admin_router
+from .auth import router as auth_router, well_known_router  # noqa: F401
 from .users import router as users_router
 
 
 router = Router()
 router.join(auth_router)
 router.join(users_router, prefix='/users')
+router.join(admin_router, prefix='/admin')
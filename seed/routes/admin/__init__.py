@@ -0,0 +1,8 @@
+from seed.router import Router
+
+from .sessions import SessionsRevoke, SessionsRevokeJob
+
+
+router = Router()
+router += '/sessions/revoke', SessionsRevoke
+router += '/sessions/revoke/{job_id}', SessionsRevokeJob
@@ -0,0 +1,104 @@
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from seed.depends.auth import AsyncAuth
+from seed.depends.auth.bulk import BulkRevoker
+from seed.exceptions import AdminHTTPException
+from seed.router import Route, status
+from seed.schemas.admin_schemas import RevokeSessionsSchema
+
+
+class SessionsRevoke(Route):
+    @Route.option(
+        name='Revoke Sessions',
+        default_status_code=status.HTTP_202_ACCEPTED
+    )
+    @Route.doc_option(
+        tags=['admin'],
+        description='Revoke tokens of selected users (ids, role, banned since) or all users, in background',
+        responses={
+            status.HTTP_202_ACCEPTED: {
+                'description': 'Revocation job started',
+                'content': {
+                    'application/json': {
+                        'example': {
+                            'job_id': '<string>',
+                            'selected': 0,
+                        }
+                    }
+                }
+            },
+            **AdminHTTPException.doc_object([
+                'revoke_jobs_exceeded'
+            ])
+        }
+    )
+    async def post(
+        body: RevokeSessionsSchema,
+        auth: AsyncAuth(required=True, roles=['admin']) = Depends()
+    ) -> Tuple[Any, int]:
+        if body.all:
+            subjects: Iterable[str] = BulkRevoker.scan_subjects(batch_size=body.batch_size)
+        else:
+            subjects: Iterable[str] = await run_in_threadpool(
+                lambda: list(BulkRevoker.user_subjects(
+                    user_ids=body.user_ids,
+                    role=body.role,
+                    banned_since=body.banned_since,
+                    batch_size=body.batch_size,
+                ))
+            )  # Database session is bound to request, selected before job starts
+
+        job_id: str = BulkRevoker(batch_size=body.batch_size).start(subjects)
+
+        return {
+            'job_id': job_id,
+            'selected': None if body.all else len(subjects),
+        }, status.HTTP_202_ACCEPTED
+
+
+class SessionsRevokeJob(Route):
+    @Route.option(
+        name='Revoke Sessions Progress'
+    )
+    @Route.doc_option(
+        tags=['admin'],
+        description='Progress and throughput of revocation job',
+        responses={
+            status.HTTP_200_OK: {
+                'description': 'Revocation job progress',
+                'content': {
+                    'application/json': {
+                        'example': {
+                            'job_id': '<string>',
+                            'selected': 0,
+                            'revoked': 0,
+                            'batches': 0,
+                            'elapsed': 0.0,
+                            'throughput': 0.0,
+                            'finished': False,
+                            'error': None,
+                        }
+                    }
+                }
+            },
+            **AdminHTTPException.doc_object([
+                'revoke_job_not_exists'
+            ])
+        }
+    )
+    async def get(
+        job_id: str,
+        auth: AsyncAuth(required=True, roles=['admin']) = Depends()
+    ) -> Tuple[Any, int]:
+        job: Optional[Dict[str, Any]] = await run_in_threadpool(BulkRevoker.get_job, job_id)
+
+        if job is None:
+            raise AdminHTTPException(
+                symbol='revoke_job_not_exists',
+                message='Revocation job does not exists',
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+
+        return job, status.HTTP_200_OK
@@ -1,5 +1,6 @@
 from seed.router import Router
 
+from .jwks import JWKS
 from .oauth import OAuth
 from .logout import Logout
 from .token_refresh import TokenRefresh
@@ -9,3 +10,6 @@ router = Router()
 router += '/oauth', OAuth
 router += '/logout', Logout
 router += '/token/refresh', TokenRefresh
+
+well_known_router = Router()  # Served on root path, outside of api prefix
+well_known_router += '/.well-known/jwks.json', JWKS
@@ -0,0 +1,40 @@
+from fastapi.responses import Response
+from typing import Any, Tuple
+
+from seed.router import Route, status
+from seed.depends.auth.keys import get_key_set
+
+
+class JWKS(Route):
+    @Route.option(
+        name='JSON Web Key Set'
+    )
+    @Route.doc_option(
+        tags=['auth'],
+        description='Public keys to verify issued tokens, selected by kid header',
+        responses={
+            status.HTTP_200_OK: {
+                'description': 'JSON Web Key Set',
+                'content': {
+                    'application/json': {
+                        'example': {
+                            'keys': [
+                                {
+                                    'kty': '<string>',
+                                    'kid': '<string>',
+                                    'alg': '<string>',
+                                    'use': 'sig'
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+    )
+    def get() -> Tuple[Any, int]:
+        return Response(
+            content=get_key_set().jwks(),
+            media_type='application/json',
+            headers={'Cache-Control': 'public, max-age=300'},
+        ), status.HTTP_200_OK
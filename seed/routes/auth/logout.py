@@ -3,8 +3,8 @@ from fastapi.responses import ORJSONResponse
 from typing import Any, Tuple
 
 from seed.router import Route, status
-from seed.depends.auth import Auth
-from seed.depends.redis import Redis
+from seed.depends.auth import AsyncAuth
+from seed.depends.auth.backends import get_async_token_store
 
 
 class Logout(Route):
@@ -26,8 +26,7 @@ class Logout(Route):
         }
     )
     async def post(
-        auth: Auth(required=True) = Depends(),
-        redis: Redis() = Depends()
+        auth: AsyncAuth(required=True) = Depends()
     ) -> Tuple[Any, int]:
         response: ORJSONResponse = ORJSONResponse()
 
@@ -36,7 +35,6 @@ class Logout(Route):
             'access', 'refresh'
         )
 
-        with redis as r:
-            r.delete(auth.token.redis_name)
+        await get_async_token_store().revoke(auth.token.subject)
 
         return response
@@ -3,15 +3,19 @@ import importlib
 
 from fastapi import Request
 from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Any, Dict, Optional, List, Tuple, Union
 
 from seed.db import db
 from seed.setting import setting
 
+from seed.rate_limit import RateLimit
 from seed.router import Route, status
 from seed.exceptions import OAuthHTTPException  
 from seed.schemas.auth_schemas import OAuthCodeSchema
 from seed.depends.auth import Auth, JWTToken
+from seed.depends.auth.grants import get_grant_versions
+from seed.depends.auth.principal import Principal
 from seed.models import (
     UserSocialAccountModel,
     UserLoginHistoryModel
@@ -23,7 +27,8 @@ from seed.utils.crypto import AESCipher
 class OAuth(Route):
     @Route.option(
         name='OAuth',
-        default_status_code=status.HTTP_201_CREATED
+        default_status_code=status.HTTP_201_CREATED,
+        rate_limit=RateLimit(limit=30, period=60, key='ip')
     )
     @Route.doc_option(
         tags=['auth'],
@@ -94,7 +99,7 @@ class OAuth(Route):
         user_social_account.access_token = access_token
         user_social_account.refresh_token = refresh_token
 
-        response: ORJSONResponse = OAuth.get_token_response(
+        response: ORJSONResponse = await OAuth.get_token_response(
             subject=user_social_account.user.key_field,
             payload={},
         )
@@ -124,29 +129,39 @@ class OAuth(Route):
         return AESCipher().encrypt(payload)
 
     @staticmethod
-    def get_token_response(
+    async def get_token_response(
         token_types: List[str] = ['access', 'refresh'],
         **kwargs
     ) -> ORJSONResponse:
-        tokens: Dict[str, JWTToken] = {}
-        content: Dict[str, Union[str, int]] = {}
+        return OAuth.token_response(await OAuth.create_tokens(token_types, **kwargs))
+
+    @staticmethod
+    async def create_tokens(
+        token_types: List[str] = ['access', 'refresh'],
+        **kwargs
+    ) -> Dict[str, JWTToken]:
+        if get_grant_versions() is not None:  # Authorize from token until user's grants are changed
+            kwargs['grants'] = await run_in_threadpool(Principal.load_claim, kwargs['subject'])
 
-        for type_ in token_types:
-            kwargs['token_type']: str = type_
-            kwargs['expires']: str = setting.jwt.get(f'{type_}_token_expires')
+        return await JWTToken.create_many_async(
+            token_types=token_types,
+            **kwargs
+        )
 
-            token: JWTToken = JWTToken.create(**kwargs)
+    @staticmethod
+    def token_response(tokens: Dict[str, JWTToken]) -> ORJSONResponse:
+        content: Dict[str, Union[str, int]] = {}
 
-            tokens[type_] = token
+        for type_, token in tokens.items():
             content[f'{type_}_token'] = token.credential
             content[f'{type_}_token_expires'] = token.expires_in
 
         response: ORJSONResponse = ORJSONResponse(content=content)
 
-        for type_ in token_types:
+        for token in tokens.values():
             Auth.bind_set_cookie(
                 response=response,
-                token=tokens[type_]
+                token=token
             )
 
         return response
@@ -2,13 +2,14 @@ import arrow
 
 from fastapi import Depends
 from fastapi.responses import ORJSONResponse
-from typing import Any, Tuple, List
+from typing import Any, Dict, Tuple, List
 
-from seed.setting import setting
+from seed.setting import feature_enabled, setting
 
+from seed.rate_limit import RateLimit
 from seed.router import Route, status
-from seed.depends.auth import Auth
-from seed.depends.redis import Redis
+from seed.depends.auth import JWTToken
+from seed.depends.auth.refresh import RefreshAuth, RefreshFlight
 from seed.utils.convert import units_to_seconds
 
 from .oauth import OAuth
@@ -17,7 +18,8 @@ from .oauth import OAuth
 class TokenRefresh(Route):
     @Route.option(
         name='Token Refresh',
-        default_status_code=status.HTTP_201_CREATED
+        default_status_code=status.HTTP_201_CREATED,
+        rate_limit=RateLimit(limit=10, period=60, key='subject', algorithm='token_bucket')
     )
     @Route.doc_option(
         tags=['auth'],
@@ -39,8 +41,7 @@ class TokenRefresh(Route):
         }
     )
     async def post(
-        auth: Auth(required=True, token_type='refresh') = Depends(),
-        redis: Redis() = Depends()
+        auth: RefreshAuth(required=True, token_type='refresh') = Depends()
     ) -> Tuple[Any, int]:
         now: int = arrow.now(setting.timezone).int_timestamp
         token_types: List[str] = ['access', 'refresh']
@@ -51,11 +52,25 @@ class TokenRefresh(Route):
         if auth.token.expires.int_timestamp - renewal_in > now:
             token_types = ['access']
 
-        response: ORJSONResponse = OAuth.get_token_response(
-            token_types=token_types,
-            subject=auth.token.subject,
-            payload=auth.token.payload,
-            secrets=auth.token.secrets,
-        )
+        async def mint() -> Dict[str, str]:
+            tokens: Dict[str, JWTToken] = await OAuth.create_tokens(
+                token_types=token_types,
+                subject=auth.token.subject,
+                payload=auth.token.payload,
+                secrets=auth.token.secrets,
+            )
+
+            return {t: token.credential for t, token in tokens.items()}
+
+        if feature_enabled('jwt', 'refresh_flight'):  # Concurrent refreshes of same refresh token get same tokens
+            credentials: Dict[str, str] = await RefreshFlight.from_setting().run(
+                auth.token.subject, auth.token.id, auth.token.credential, mint, flight=auth.flight
+            )
+        else:
+            credentials: Dict[str, str] = await mint()
+
+        response: ORJSONResponse = OAuth.token_response({
+            t: JWTToken(credential) for t, credential in credentials.items()
+        })
 
         return response, status.HTTP_201_CREATED
@@ -2,18 +2,22 @@ import orjson
 
 from fastapi import Request, Depends
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import joinedload, selectinload
 from typing import Any, Tuple, Optional, Dict, Set
 
-from seed.depends.auth import Auth
+from seed.depends.auth import AsyncAuth
 from seed.exceptions import AuthHTTPException
+from seed.models import UserModel
 from seed.router import Route, status
 
 
 class UserMe(Route):
     @Route.option(
         name='Get User Information (me)',
-        default_status_code=status.HTTP_200_OK
+        default_status_code=status.HTTP_200_OK,
+        fast_serialize=True
     )
+    @Route.cache(ttl=30, vary=['subject'])  # Mutations of user need Route.cache_invalidate('UserMe.get')
     @Route.doc_option(
         tags=['users'],
         description='Get User Information',
@@ -41,13 +45,18 @@ class UserMe(Route):
         }
     )
     async def get(
-        auth: Auth(required=True) = Depends()
+        auth: AsyncAuth(required=True) = Depends()
     ) -> Tuple[Any, int]:
         exclude: Set[str] = {'id', 'user_id', 'updated_at'}
+        user: UserModel = await auth.load_user(
+            joinedload(UserModel.profile),
+            joinedload(UserModel.meta),
+            selectinload(UserModel.social_accounts),
+        )
 
         return {
-            **auth.user.jsonify(include={'email', 'username'}),
-            'profile': auth.user.profile.jsonify(exclude=exclude),
-            'meta': auth.user.meta.jsonify(exclude=exclude),
-            'social_accounts': list(map(lambda s: s.provider, auth.user.social_accounts))
+            **user.jsonify(include={'email', 'username'}),
+            'profile': user.profile.jsonify(exclude=exclude),
+            'meta': user.meta.jsonify(exclude=exclude),
+            'social_accounts': list(map(lambda s: s.provider, user.social_accounts))
         }, status.HTTP_200_OK
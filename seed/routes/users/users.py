@@ -6,6 +6,7 @@ from typing import Any, Tuple, Optional, Dict
 from seed.db import db
 from seed.exceptions import UserHTTPException
 from seed.schemas.user_schemas import RegisterSchema, SocialInfoSchema
+from seed.rate_limit import RateLimit
 from seed.router import Route, status
 from seed.models import (
     UserModel,
@@ -20,7 +21,8 @@ from seed.utils.crypto import AESCipher
 class Users(Route):
     @Route.option(
         name='Register',
-        default_status_code=status.HTTP_201_CREATED
+        default_status_code=status.HTTP_201_CREATED,
+        rate_limit=RateLimit(limit=10, period=60, key='uuid')
     )
     @Route.doc_option(
         tags=['users'],
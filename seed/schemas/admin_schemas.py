@@ -0,0 +1,22 @@
+import datetime
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, root_validator
+
+
+class RevokeSessionsSchema(BaseModel):
+    user_ids: Optional[List[int]] = Field(None)
+    role: Optional[str] = Field(None, max_length=20)
+    banned_since: Optional[datetime.datetime] = Field(None)
+    all: bool = Field(False)
+    batch_size: int = Field(500, ge=1, le=10000)
+
+    @root_validator
+    def selection_required(cls, values):
+        if not values.get('all') and all(
+            values.get(k) is None for k in ('user_ids', 'role', 'banned_since')
+        ):
+            raise ValueError("user_ids, role, banned_since or all is required")
+
+        return values
@@ -0,0 +1,100 @@
+import decimal
+import enum
+import orjson
+import random
+
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError, parse_obj_as
+from typing import Any, Dict, Optional
+
+from .logger import logger
+from .setting import setting
+
+
+def orjson_default(obj: Any) -> Any:  # Called only for types orjson does not serialize natively
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)  # Exact, float would round
+
+    if isinstance(obj, enum.Enum):
+        return obj.value
+
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+
+    if hasattr(obj, '__table__'):  # Model instance, columns without jsonable_encoder
+        aliases: Dict[str, str] = getattr(obj, '_column_alias', {})
+
+        return {
+            str(column.key): getattr(obj, aliases.get(column.key, column.key), None)
+            for column in obj.__table__.columns
+        }
+
+    if hasattr(obj, '_asdict'):  # Query row of columns
+        return obj._asdict()
+
+    if hasattr(obj, 'keys') and hasattr(obj, 'items'):  # Core result row
+        return dict(obj.items())
+
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+
+    raise TypeError(f'Type is not JSON serializable: {obj.__class__.__name__}')
+
+
+def dumps(
+    content: Any,
+    option: Optional[int] = None
+) -> bytes:
+    return orjson.dumps(content, default=orjson_default, option=option or 0)
+
+
+class FastORJSONResponse(Response):
+    media_type: str = 'application/json'
+
+    def __init__(
+        self,
+        content: Any = None,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        option: Optional[int] = None
+    ) -> None:
+        self.option: Optional[int] = option
+
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content, self.option)
+
+
+class ResponseSampler:
+    def __init__(
+        self,
+        response_model: Any,
+        name: Optional[str] = None
+    ) -> None:
+        self.response_model: Any = response_model
+        self.name: Optional[str] = name
+
+        self._sample_rate: Optional[float] = None
+
+    @property
+    def sample_rate(self) -> float:
+        if self._sample_rate is None:  # Resolved on first response, setting of env is loaded by then
+            self._sample_rate = setting.get('router', {}).get('fast_serialize', {}).get(
+                'sample_rate', 0.01
+            ) if setting.debug else 0.0
+
+        return self._sample_rate
+
+    def check(self, body: bytes) -> bool:
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return True
+
+        try:
+            parse_obj_as(self.response_model, orjson.loads(body))
+        except ValidationError as e:
+            logger.warning(f"Response of '{self.name}' does not match response model: {e}")
+
+            return False
+
+        return True
@@ -16,3 +16,7 @@ setting: Dynaconf = Dynaconf(
         os.path.join(_root_path, './settings/setting.testing.toml')
     ]
 )
+
+
+def feature_enabled(section: str, name: str) -> bool:  # 'enable' of [section.name], read on every call
+    return bool(setting.get(section, {}).get(name, {}).get('enable', False))
@@ -1,4 +1,10 @@
-from typing import Dict, Any
+import inspect
+
+from fastapi import Request
+from typing import Any, Callable, Dict, List, Optional
+
+
+REQUEST_PARAMETER: str = 'seed_request'  # Injected into endpoint signature, FastAPI passes request of route
 
 
 async def get_trace_dict(request: 'Request') -> Dict[str, Any]:
@@ -12,3 +18,34 @@ async def get_trace_dict(request: 'Request') -> Dict[str, Any]:
     result['headers'] = dict(request.headers)
 
     return result
+
+
+def request_parameter(endpoint: Callable[..., Any]) -> Optional[str]:
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        if inspect.isclass(parameter.annotation) and issubclass(parameter.annotation, Request):
+            return name  # FastAPI passes request to one parameter only
+
+    return None
+
+
+def with_request(
+    func: Callable[..., Any],
+    endpoint: Callable[..., Any]
+) -> Callable[..., Any]:
+    signature: inspect.Signature = inspect.signature(endpoint)
+
+    assert REQUEST_PARAMETER not in signature.parameters, f"'{REQUEST_PARAMETER}' is reserved by router"
+
+    parameters: List[inspect.Parameter] = list(signature.parameters.values())
+    index: int = len(parameters)
+
+    if index and parameters[-1].kind == inspect.Parameter.VAR_KEYWORD:
+        index -= 1
+
+    parameters.insert(index, inspect.Parameter(
+        REQUEST_PARAMETER, inspect.Parameter.KEYWORD_ONLY, annotation=Request
+    ))
+
+    func.__signature__ = signature.replace(parameters=parameters)
+
+    return func
@@ -2,6 +2,7 @@ import os
 import pytest
 import sys
 
+from sqlalchemy import event
 from unittest.mock import patch, PropertyMock
 
 from fastapi import APIRouter
@@ -18,6 +19,10 @@ from app.routes import router
 
 from seed.application import Application
 from seed.depends.auth.types import JWTToken
+from seed.depends.redis import RedisContextManager
+from seed.rate_limit import reset_local_blocks
+from seed.response_cache import reset_response_cache
+from seed.setting import setting
 
 
 # Initialize testing application
@@ -43,6 +48,21 @@ def session():
         db.session.close()
 
 
+@pytest.fixture
+def query_counter(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    yield statements
+
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
 @pytest.fixture
 def get_test_client():
     return lambda app: TestClient(app)
@@ -99,3 +119,33 @@ def create_token():
         )
 
     return _
+
+
+@pytest.fixture
+def unlink_keys():
+    def _(*patterns):
+        with RedisContextManager() as r:
+            for pattern in patterns:
+                for key in list(r.scan_iter(match=pattern)):
+                    r.unlink(key)
+
+    return _
+
+
+@pytest.fixture
+def response_cache():  # Disabled by default
+    reset_response_cache()
+
+    with patch.dict(setting.router.cache, {'enable': True}):
+        yield
+
+    reset_response_cache()
+
+
+@pytest.fixture(autouse=True)
+def clean_rate_limit(unlink_keys):
+    reset_local_blocks()
+    unlink_keys('ratelimit:*')  # Buckets live up to twice the period, shared between runs
+    yield
+    unlink_keys('ratelimit:*')
+    reset_local_blocks()
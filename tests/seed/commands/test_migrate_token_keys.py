@@ -0,0 +1,50 @@
+import pytest
+
+from seed.commands.migrate_token_keys import legacy_subject, migrate, parse_args
+from seed.depends.auth.store import TokenStore
+from seed.depends.redis import RedisContextManager
+
+
+@pytest.fixture(autouse=True)
+def clean_tokens(unlink_keys):
+    unlink_keys('token:legacy*', 'token:{legacy*')
+    yield
+    unlink_keys('token:legacy*', 'token:{legacy*')
+
+
+def test_legacy_subject():
+    assert legacy_subject('token:foobar') == 'foobar'
+    assert legacy_subject(b'token:foo:bar') == 'foo:bar'
+    assert legacy_subject('token:{foobar}') is None
+    assert legacy_subject('principal:foobar') is None
+
+
+def test_migrate():
+    store = TokenStore()
+
+    with RedisContextManager() as r:
+        r.hset('token:legacy-1', mapping={'access': 'access_jti', 'refresh': 'refresh_jti'})
+        r.expire('token:legacy-1', 100)
+        r.hset('token:legacy-2', mapping={'access': 'old_access_jti'})
+        r.xadd('token:legacy-stream', {'jti': 'jti'})  # Not a session
+
+    store.create('legacy-2', 'access', 'new_access_jti')  # Issued after deploy
+
+    assert migrate(batch_size=1) == 1
+    assert store.get('legacy-1', 'access') == 'access_jti'
+    assert store.get('legacy-1', 'refresh') == 'refresh_jti'
+    assert 90 < store.ttl('legacy-1') <= 100
+    assert store.get('legacy-2', 'access') == 'new_access_jti'
+
+    with RedisContextManager() as r:
+        assert not r.exists('token:legacy-1', 'token:legacy-2')
+        assert r.exists('token:legacy-stream')
+
+    assert migrate() == 0
+
+
+def test_parse_args():
+    parsed = parse_args(['--batch-size', '1000'])
+
+    assert parsed.batch_size == 1000
+    assert parsed.pause == 0.01
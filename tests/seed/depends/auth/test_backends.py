@@ -0,0 +1,136 @@
+import pytest
+import time
+
+from unittest.mock import patch
+
+from seed.depends.auth.backends import (
+    MemoryTokenStore,
+    SQLiteTokenStore,
+    AsyncLocalTokenStore,
+    get_token_store,
+    get_async_token_store
+)
+from seed.depends.auth.store import BaseTokenStore, TokenStore, AsyncTokenStore
+
+
+@pytest.fixture(params=['redis', 'memory', 'sqlite'])
+def store(request, tmp_path, unlink_keys):
+    MemoryTokenStore.clear()
+    unlink_keys('token:{*}')  # Every backend starts empty, subjects() scans whole keyspace
+
+    yield {
+        'redis': lambda: TokenStore(),
+        'memory': lambda: MemoryTokenStore(),
+        'sqlite': lambda: SQLiteTokenStore(path=str(tmp_path / 'tokens.sqlite3')),
+    }[request.param]()
+
+    unlink_keys('token:{*}')
+
+
+def test_store_create_and_verify(store):
+    store.create('store-create', 'access', 'jti')
+
+    assert store.get('store-create', 'access') == 'jti'
+    assert store.verify('store-create', 'access', 'jti')
+    assert not store.verify('store-create', 'access', 'other_jti')
+    assert not store.verify('store-create', 'refresh', 'jti')
+    assert not store.verify('not_exists', 'access', 'jti')
+
+
+def test_store_create_many(store):
+    store.create_many('store-create-many', {'access': ('access_jti', 10), 'refresh': ('refresh_jti', 20)})
+    store.create('store-create-many', 'access', 'new_access_jti')
+
+    assert store.get('store-create-many', 'access') == 'new_access_jti'
+    assert store.get('store-create-many', 'refresh') == 'refresh_jti'
+
+
+def test_store_ttl(store):
+    store.create('store-ttl', 'access', 'jti', expires_in=10)
+
+    assert store.ttl('store-ttl') is None  # Only refresh token sets expiration
+
+    store.create('store-ttl', 'refresh', 'jti', expires_in=10)
+    store.create('store-ttl', 'access', 'jti', expires_in=30)
+
+    assert 0 < store.ttl('store-ttl') <= 10
+    assert store.ttl('not_exists') is None
+
+
+def test_store_expire(store):
+    store.create_many('store-expire', {'access': ('access_jti', None), 'refresh': ('refresh_jti', 1)})
+
+    time.sleep(1.1)
+
+    assert store.get('store-expire', 'access') is None
+    assert store.get('store-expire', 'refresh') is None
+
+    store.create('store-expire', 'access', 'jti')
+
+    assert store.ttl('store-expire') is None  # Expired tokens do not pass expiration to new ones
+
+
+def test_store_revoke(store):
+    store.create('foo', 'access', 'jti')
+    store.create('bar', 'access', 'jti')
+    store.create('baz', 'access', 'jti')
+    store.revoke('foo')
+
+    assert store.get('foo', 'access') is None
+    assert store.revoke_many(['bar', 'not_exists']) == 1
+    assert store.get('baz', 'access') == 'jti'
+    assert list(store.subjects(batch_size=1)) == ['baz']
+
+
+def test_store_abstract():
+    class _Store(BaseTokenStore):
+        def get(self, subject, token_type):
+            return None
+
+    with pytest.raises(TypeError):
+        _Store()
+
+
+@pytest.mark.asyncio
+async def test_async_local_store(tmp_path):
+    store = AsyncLocalTokenStore(SQLiteTokenStore(path=str(tmp_path / 'tokens.sqlite3')), offload=True)
+
+    await store.create_many('foobar', {'access': ('access_jti', 10), 'refresh': ('refresh_jti', 20)})
+
+    assert await store.verify('foobar', 'access', 'access_jti')
+    assert 0 < await store.ttl('foobar') <= 20
+
+    await store.revoke('foobar')
+
+    assert await store.get('foobar', 'refresh') is None
+
+
+def test_token_store_backend_setting():
+    with patch('seed.depends.auth.backends.token_store_backend', return_value='memory'):
+        assert isinstance(get_token_store(), MemoryTokenStore)
+        assert isinstance(get_async_token_store().store, MemoryTokenStore)
+
+    with patch('seed.depends.auth.backends.token_store_backend', return_value='sqlite'):
+        assert isinstance(get_token_store(), SQLiteTokenStore)
+
+    assert isinstance(get_token_store(), TokenStore)
+    assert isinstance(get_async_token_store(), AsyncTokenStore)
+
+
+def test_memory_store_expire_race():
+    class _Lock:  # Concurrent create takes lock right before expired entry is popped
+        def __enter__(self):
+            MemoryTokenStore._tokens['store-race'] = ({'access': 'new_jti'}, None)
+
+        def __exit__(self, *args):
+            pass
+
+    MemoryTokenStore.clear()
+    MemoryTokenStore._tokens['store-race'] = ({'access': 'jti'}, time.monotonic() - 1)
+
+    with patch.object(MemoryTokenStore, '_lock', _Lock()):
+        assert MemoryTokenStore().get('store-race', 'access') is None
+
+    assert MemoryTokenStore().get('store-race', 'access') == 'new_jti'
+
+    MemoryTokenStore.clear()
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+import threading
+
+from unittest.mock import patch
+
+from seed.depends.auth.batch import TokenBatcher, AsyncTokenBatcher
+from seed.depends.auth.store import TokenStore, AsyncTokenStore
+
+
+def create_tokens(count):
+    for i in range(count):
+        TokenStore().create(f'user-{i}', 'access', f'jti-{i}')
+
+
+def test_token_batcher():
+    create_tokens(8)
+
+    batcher = TokenBatcher(window=50, max_pending=8)
+    results = {}
+
+    def lookup(i):
+        results[i] = batcher.hget(TokenStore.name(f'user-{i}'), 'access')
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: f'jti-{i}'.encode() for i in range(8)}
+    assert batcher.lookups == 8
+    assert batcher.batches < 8
+
+
+def test_token_batcher_window():
+    create_tokens(1)
+
+    batcher = TokenBatcher(window=0.1)
+
+    assert batcher.hget(TokenStore.name('user-0'), 'access') == b'jti-0'
+    assert batcher.hget(TokenStore.name('not_exists'), 'access') is None
+    assert batcher.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_async_token_batcher():
+    create_tokens(10)
+
+    batcher = AsyncTokenBatcher(window=1, max_pending=4)
+    results = await asyncio.gather(*(
+        batcher.hget(TokenStore.name(f'user-{i}'), 'access') for i in range(10)
+    ))
+
+    assert results == [f'jti-{i}'.encode() for i in range(10)]
+    assert batcher.batches == 3  # 4 + 4 sent when full, 2 after window
+
+
+def test_token_store_batched_verify():
+    create_tokens(1)
+
+    with patch('seed.depends.auth.store.get_token_batcher', return_value=TokenBatcher()):
+        store = TokenStore()
+
+        with patch.object(TokenStore, 'get', side_effect=AssertionError):
+            assert store.verify('user-0', 'access', 'jti-0')
+            assert not store.verify('user-0', 'access', 'other_jti')
+
+        assert store.batcher.lookups == 2
+
+
+@pytest.mark.asyncio
+async def test_async_token_store_batched_verify():
+    create_tokens(3)
+
+    with patch('seed.depends.auth.store.get_async_token_batcher', return_value=AsyncTokenBatcher()):
+        store = AsyncTokenStore()
+
+        assert await asyncio.gather(
+            store.verify('user-0', 'access', 'jti-0'),
+            store.verify('user-1', 'access', 'jti-1'),
+            store.verify('user-2', 'access', 'other_jti'),
+        ) == [True, True, False]
+        assert store.batcher.batches == 1
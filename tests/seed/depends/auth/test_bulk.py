@@ -0,0 +1,131 @@
+import datetime
+import pytest
+import redis
+import threading
+
+from unittest.mock import patch
+
+from seed.depends.auth.bulk import BulkRevoker
+from seed.depends.auth.store import TokenStore
+from seed.depends.redis import RedisContextManager
+from seed.exceptions import AdminHTTPException
+from seed.models import RoleModel, UserRoleModel, UserBanModel
+from seed.setting import setting
+
+
+@pytest.fixture(autouse=True)
+def clean_tokens(unlink_keys):
+    unlink_keys('token:{*}', 'revoke:job:*')  # Subjects are scanned over whole keyspace
+    yield
+    unlink_keys('token:{*}', 'revoke:job:*')
+
+
+def create_tokens(*subjects):
+    for subject in subjects:
+        TokenStore().create(subject, 'access', f'{subject}_jti')
+
+
+def test_token_store_revoke_many():
+    create_tokens('foo', 'bar', 'baz')
+
+    assert TokenStore().revoke_many(['foo', 'bar', 'not_exists']) == 2
+
+    with RedisContextManager() as r:
+        assert not r.exists(TokenStore.name('foo'), TokenStore.name('bar'))
+        assert r.exists(TokenStore.name('baz'))
+
+
+def test_bulk_revoker_run():
+    create_tokens(*(f'user-{i}' for i in range(5)))
+    reports = []
+
+    progress = BulkRevoker(
+        batch_size=2,
+        pause=0,
+        progress=lambda p: reports.append(p.batches),
+    ).run(f'user-{i}' for i in range(5))
+
+    assert progress.selected == 5
+    assert progress.revoked == 5
+    assert progress.batches == 3
+    assert progress.finished_at is not None
+    assert reports == [1, 2, 3, 3]
+
+
+def test_bulk_revoker_job():
+    create_tokens('foo')
+
+    revoker = BulkRevoker(pause=0, job_id='job')
+    revoker.run(['foo'])
+
+    job = BulkRevoker.get_job('job')
+
+    assert job['revoked'] == 1
+    assert job['finished']
+    assert BulkRevoker.get_job('not_exists') is None
+
+
+def test_bulk_revoker_scan_subjects():
+    create_tokens('foo', 'bar')
+
+    with RedisContextManager() as r:
+        r.set('token:other', 1)  # Not a token key of subject
+
+        try:
+            assert sorted(BulkRevoker.scan_subjects(batch_size=1)) == ['bar', 'foo']
+        finally:
+            r.unlink('token:other')
+
+
+def test_bulk_revoker_user_subjects(session):
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        UserRoleModel(user_id=1, role_='user'),
+        UserRoleModel(user_id=2, role_='user'),
+        UserBanModel(user_id=2, role_='user', created_at=datetime.datetime(2021, 3, 1)),
+        UserBanModel(user_id=3, role_='user', created_at=datetime.datetime(2020, 3, 1)),
+    ])
+    session.flush()
+
+    assert list(BulkRevoker.user_subjects(user_ids=[1, 3])) == [
+        'test@foobar.com', 'powlowski.elvis@example.net'
+    ]
+    assert list(BulkRevoker.user_subjects(role='user')) == [
+        'test@foobar.com', 'mbosco@example.com'
+    ]
+    assert list(BulkRevoker.user_subjects(banned_since=datetime.datetime(2021, 1, 1))) == [
+        'mbosco@example.com'
+    ]
+
+
+def test_bulk_revoker_max_jobs():
+    started, release = threading.Event(), threading.Event()
+
+    def subjects():
+        started.set()
+        release.wait(5)
+        yield 'foo'
+
+    with patch.dict(setting.jwt, {'bulk_revoke': {'max_jobs': 1}}):
+        job_id = BulkRevoker(pause=0).start(subjects())
+        started.wait(5)
+
+        with pytest.raises(AdminHTTPException):
+            BulkRevoker(pause=0).start(['bar'])
+
+        BulkRevoker.shutdown()
+        release.set()
+
+        job = BulkRevoker.get_job(job_id)
+
+    assert job['finished']
+    assert job['error'] == 'Worker stopped before job finished'
+
+
+def test_bulk_revoker_start_failed():
+    with patch.dict(setting.jwt, {'bulk_revoke': {'max_jobs': 1}}):
+        with patch.object(BulkRevoker, 'save_job', side_effect=redis.RedisError):
+            with pytest.raises(redis.RedisError):
+                BulkRevoker(pause=0).start(['foo'])
+
+        assert not len(BulkRevoker._running)  # Slot is not held by job never started
@@ -0,0 +1,163 @@
+import time
+
+from redis.client import Pipeline
+from unittest.mock import patch
+
+from seed.depends.auth.cache import ClaimsCache, TokenCache, get_claims_cache, invalidate_message, reset_caches
+from seed.depends.auth.store import TokenStore
+from seed.depends.auth.types import JWTToken
+from seed.setting import setting
+
+
+def test_token_cache_get_set():
+    cache = TokenCache()
+    cache.set('foobar', 'access', 'jti')
+
+    assert cache.get('foobar', 'access') == 'jti'
+    assert cache.get('foobar', 'refresh') is None
+    assert cache.get('not_exists', 'access') is None
+
+
+def test_token_cache_ttl():
+    cache = TokenCache(ttl=0.01)
+    cache.set('foobar', 'access', 'jti')
+
+    time.sleep(0.02)
+
+    assert cache.get('foobar', 'access') is None
+
+
+def test_token_cache_maxsize():
+    cache = TokenCache(maxsize=2)
+    cache.set('foo', 'access', 'jti')
+    cache.set('bar', 'access', 'jti')
+    cache.get('foo', 'access')
+    cache.set('daz', 'access', 'jti')
+
+    assert len(cache) == 2
+    assert cache.get('bar', 'access') is None
+    assert cache.get('foo', 'access') == 'jti'
+
+
+def test_token_cache_invalidate():
+    cache = TokenCache()
+    cache.set('foobar', 'access', 'jti')
+    cache.set('foobar', 'refresh', 'jti')
+
+    cache.invalidate('foobar', 'access')
+
+    assert cache.get('foobar', 'access') is None
+    assert cache.get('foobar', 'refresh') == 'jti'
+
+    cache.invalidate('foobar')
+
+    assert cache.get('foobar', 'refresh') is None
+
+
+def test_token_cache_stale_set():
+    cache = TokenCache()
+    generation = cache.generation
+
+    cache.invalidate('foobar')
+    cache.set('foobar', 'access', 'jti', generation=generation)
+
+    assert cache.get('foobar', 'access') is None
+
+
+def test_invalidate_message():
+    assert invalidate_message('foobar') == b'{"subject":"foobar","token_type":null}'
+
+
+def test_token_store_verify_with_cache():
+    cache = TokenCache()
+
+    with patch('seed.depends.auth.store.get_token_cache', return_value=cache):
+        store = TokenStore()
+        store.create('foobar', 'access', 'jti')
+
+        assert store.verify('foobar', 'access', 'jti')
+        assert cache.get('foobar', 'access') == 'jti'
+
+        with patch.object(TokenStore, 'get') as get:
+            assert store.verify('foobar', 'access', 'jti')
+            assert not get.called
+
+        store.revoke('foobar')
+
+        assert cache.get('foobar', 'access') is None
+        assert not store.verify('foobar', 'access', 'jti')
+
+
+def test_token_store_verify_while_revoking():
+    cache = TokenCache()
+    execute = Pipeline.execute
+
+    def verify_before_execute(pipeline, *args, **kwargs):
+        store.verify('foobar', 'access', 'jti')  # Concurrent verify still reads stored jti
+
+        return execute(pipeline, *args, **kwargs)
+
+    with patch('seed.depends.auth.store.get_token_cache', return_value=cache):
+        store = TokenStore()
+        store.create('foobar', 'access', 'jti')
+
+        with patch.object(Pipeline, 'execute', verify_before_execute):
+            store.revoke('foobar')
+
+        assert cache.get('foobar', 'access') is None
+        assert not store.verify('foobar', 'access', 'jti')
+
+
+def test_claims_cache_get_set():
+    cache = ClaimsCache()
+    cache.set('credential', 'HS256', time.time() + 10, 'parsed')
+
+    assert cache.get('credential', 'HS256') == 'parsed'
+    assert cache.get('credential', 'HS512') is None
+    assert cache.get('other_credential', 'HS256') is None
+
+
+def test_claims_cache_expired():
+    cache = ClaimsCache()
+    cache.set('credential', 'HS256', time.time() - 10, 'parsed')
+
+    assert cache.get('credential', 'HS256') is None
+    assert len(cache) == 0
+
+
+def test_claims_cache_maxsize():
+    cache = ClaimsCache(maxsize=1)
+    cache.set('credential1', 'HS256', None, 'parsed')
+    cache.set('credential2', 'HS256', None, 'parsed')
+
+    assert len(cache) == 1
+    assert cache.get('credential1', 'HS256') is None
+
+
+def test_jwt_token_with_claims_cache():
+    cache = ClaimsCache()
+
+    with patch('seed.depends.auth.types.get_claims_cache', return_value=cache):
+        credential = JWTToken.create(subject='foobar', expires=10).credential
+        JWTToken(credential)
+
+        with patch.object(JWTToken, '_decode') as decode:
+            token = JWTToken(credential)
+
+            assert not decode.called
+            assert token.subject == 'foobar'
+
+        token.payload['foo'] = 'bar'
+
+        assert JWTToken(credential).payload == {}  # Not shared between tokens
+
+
+def test_claims_cache_setting_change():
+    reset_caches()
+
+    assert get_claims_cache() is not None
+
+    with patch.dict(setting.jwt, {'claims_cache': {'enable': False}}):
+        assert get_claims_cache() is None  # Setting is read on every call, not once
+
+    assert get_claims_cache() is not None
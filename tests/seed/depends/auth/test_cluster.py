@@ -0,0 +1,131 @@
+import orjson
+import pytest
+import redis.asyncio as aioredis
+
+from redis.cluster import RedisCluster, block_pipeline_command
+from unittest.mock import patch
+
+from seed.depends.auth.cache import TokenCache, invalidate_channel
+from seed.depends.auth.grants import GrantVersions
+from seed.depends.auth.principal import Principal, PrincipalCache
+from seed.depends.auth.store import TokenStore, AsyncTokenStore
+from seed.depends.redis import get_redis, get_async_connection_pool
+
+
+class ClusterClient:  # Commands of cluster client, on standalone redis
+    RANDOM: str = RedisCluster.RANDOM
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        if name == 'publish':
+            raise AttributeError(name)  # Async cluster client has no publish, it can not be routed without key
+
+        return getattr(self.client, name)
+
+    def pipeline(self, transaction=None, shard_hint=None):
+        assert not transaction, 'Cluster pipelines are sent without MULTI'
+
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.publish = block_pipeline_command('PUBLISH')
+
+        return pipeline
+
+    def execute_command(self, *args, target_nodes=None, **options):
+        assert target_nodes is not None, 'Keyless commands need target nodes'
+
+        return self.client.execute_command(*args, **options)
+
+
+@pytest.fixture
+def cluster(unlink_keys):
+    unlink_keys('token:{foobar}', 'principal:*', 'grants:version*')
+
+    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(invalidate_channel(), 'principal:invalidate', 'grants:invalidate')
+
+    def messages(count):
+        received = []
+
+        for _ in range(count + 10):  # Reads may return nothing before messages arrive
+            if len(received) == count:
+                break
+
+            message = pubsub.get_message(timeout=0.1)
+
+            if message is not None:
+                received.append((message['channel'].decode(), orjson.loads(message['data'])))
+
+        return received
+
+    with patch('seed.depends.redis.redis_mode', return_value='cluster'), \
+            patch('seed.depends.redis.get_redis', return_value=ClusterClient(get_redis())), \
+            patch('seed.depends.auth.store.get_token_cache', return_value=TokenCache()):
+        yield messages
+
+    pubsub.close()
+    unlink_keys('token:{foobar}', 'principal:*', 'grants:version*')
+
+
+def test_cluster_token_store(cluster):
+    store = TokenStore()
+    store.create_many('foobar', {'access': ('access_jti', None), 'refresh': ('refresh_jti', 10)})
+
+    assert store.verify('foobar', 'access', 'access_jti')
+
+    store.create('foobar', 'access', 'new_access_jti')
+    store.revoke('foobar')
+
+    assert store.get('foobar', 'access') is None
+    assert store.revoke_many(['foobar']) == 0
+    assert cluster(4) == [
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': None}),
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': 'access'}),
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': None}),
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': None}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cluster_async_token_store(cluster):
+    client = ClusterClient(aioredis.Redis(connection_pool=get_async_connection_pool()))
+
+    with patch('seed.depends.redis.get_async_redis', return_value=client):
+        store = AsyncTokenStore()
+        await store.create_many('foobar', {'access': ('access_jti', None), 'refresh': ('refresh_jti', 10)})
+
+        assert await store.verify('foobar', 'access', 'access_jti')
+
+        await store.revoke('foobar')
+
+        assert await store.get('foobar', 'access') is None
+
+    assert cluster(2) == [
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': None}),
+        (invalidate_channel(), {'subject': 'foobar', 'token_type': None}),
+    ]
+
+
+def test_cluster_principal_cache(cluster):
+    cache = PrincipalCache()
+    cache.set(Principal(id=1, key='test@foobar.com'), 0)
+    cache.invalidate_users({1, 2})
+    cache.invalidate_all()
+
+    assert cluster(2) == [
+        ('principal:invalidate', {'key': 'test@foobar.com'}),
+        ('principal:invalidate', {'key': None}),
+    ]
+
+
+def test_cluster_grant_versions(cluster):
+    versions = GrantVersions()
+    versions.bump({1})
+    versions.bump()
+
+    assert versions.fetch(1) == [1, 1]
+    assert cluster(2) == [
+        ('grants:invalidate', {'user_id': 1}),
+        ('grants:invalidate', {'user_id': None}),
+    ]
@@ -1,8 +1,13 @@
 import datetime
+import pytest
 
 from fastapi import Depends, Request, Header
+from unittest.mock import patch
 
-from seed.depends.auth.depend import Auth
+from seed.depends.auth.depend import Auth, AuthContext, AsyncAuth, AsyncAuthContext
+from seed.depends.auth.grants import GrantVersions
+from seed.depends.auth.principal import Principal, PrincipalCache
+from seed.depends.auth.types import JWTToken
 from seed.depends.redis import RedisContextManager
 from seed.models import (
     RoleModel,
@@ -15,6 +20,13 @@ from seed.models import (
 from seed.setting import setting
 
 
+@pytest.fixture(autouse=True)
+def clean_grants(unlink_keys):
+    unlink_keys('grants:version*', 'principal:*')  # Shared counters and principals of other tests
+    yield
+    unlink_keys('grants:version*', 'principal:*')
+
+
 def test_auth_depend(empty_app, get_test_client, create_token):
     @empty_app.get('/auth_optional')
     def endpoint(auth: Auth() = Depends()):
@@ -75,7 +87,7 @@ def test_auth_depend_jwt_notin_redis(empty_app, get_test_client, create_token):
     credential = token.credential
 
     with RedisContextManager() as r:
-        r.delete('token:foobar')
+        r.delete('token:{foobar}')
 
     client = get_test_client(empty_app)
     response = client.get('/auth_optional', headers={
@@ -364,8 +376,195 @@ def test_auth_check_permission_banned_not_continue(session, empty_app, get_test_
     assert response.json()
 
 
-def test_check_has():
-    assert Auth()._check_has({'has1', 'has2'}, ['has1', ('has2', 'has3')])
-    assert not Auth()._check_has({'has1', 'has2'}, ['has1', ('has3', 'has4')])
-    assert not Auth()._check_has({'has1', 'has2'}, ['has1', 'has3'])
-    assert not Auth()._check_has(set(), ['has1', 'has3'])
+def test_auth_principal_cache(session, empty_app, get_test_client, create_token):
+    @empty_app.get('/principal_cache')
+    def endpoint(auth: Auth(required=True, roles=['user']) = Depends()) -> str:
+        return True
+
+    token = create_token(subject='test@foobar.com')
+    client = get_test_client(empty_app)
+    headers = {'Authorization': f'Bearer {token.credential}'}
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        UserRoleModel(user_id=1, role_='user')
+    ])
+
+    with patch('seed.depends.auth.depend.get_principal_cache', return_value=PrincipalCache()):
+        assert client.get('/principal_cache', headers=headers).status_code == 200
+
+        with patch.object(Auth, '_user_loader', side_effect=AssertionError):
+            assert client.get('/principal_cache', headers=headers).status_code == 200
+
+
+def test_auth_permission_query_count(session, query_counter, empty_app, get_test_client, create_token):
+    @empty_app.get('/query_count')
+    def endpoint(
+        auth: Auth(
+            required=True,
+            roles=['user', ('admin', 'super-admin')],
+            abilities=['auth']
+        ) = Depends()
+    ) -> str:
+        return True
+
+    token = create_token(subject='test@foobar.com')
+    client = get_test_client(empty_app)
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        AbilityModel(ability='auth'),
+        RoleAbilityModel(role_='user', ability_='auth'),
+        UserRoleModel(user_id=1, role_='user'),
+        UserRoleModel(user_id=1, role_='admin')
+    ])
+    session.flush()
+    query_counter.clear()
+
+    response = client.get('/query_count', headers={
+        'Authorization': f'Bearer {token.credential}',
+    })
+
+    assert response.status_code == 200
+    assert len([s for s in query_counter if s.lstrip().upper().startswith('SELECT')]) == 1
+
+
+def test_auth_sql_permission(session, empty_app, get_test_client, create_token):
+    @empty_app.get('/sql_permission')
+    def endpoint(auth: Auth(required=True, roles=['user'], sql_permission=True) = Depends()) -> str:
+        return True
+
+    @empty_app.get('/sql_permission_denied')
+    def denied_endpoint(auth: Auth(required=True, roles=['admin'], sql_permission=True) = Depends()) -> str:
+        return True
+
+    token = create_token(subject='test@foobar.com')
+    client = get_test_client(empty_app)
+    headers = {'Authorization': f'Bearer {token.credential}'}
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        UserRoleModel(user_id=1, role_='user')
+    ])
+
+    with patch.object(Auth, '_principal_loader', side_effect=AssertionError):
+        assert client.get('/sql_permission', headers=headers).status_code == 200
+
+        response = client.get('/sql_permission_denied', headers=headers)
+
+        assert response.status_code == 401
+        assert response.json()['symbol'] == 'auth_permmision_denied'
+
+    session.bulk_save_objects([
+        UserBanModel(user_id=1, role_='user', reason='foobar')
+    ])
+
+    response = client.get('/sql_permission', headers=headers)
+
+    assert response.status_code == 401
+    assert response.json()['symbol'] == 'auth_banned_user'
+    assert response.json()['detail']['reason'] == 'foobar'
+
+
+def test_auth_context_per_request(create_token):
+    auth = Auth(required=True)
+    request = Request({'type': 'http', 'headers': []})
+
+    contexts = [
+        auth(request, authorization=f'Bearer {create_token(subject=subject).credential}')
+        for subject in ('foo', 'bar')
+    ]
+
+    assert isinstance(contexts[0], AuthContext)
+    assert contexts[0] is not contexts[1]
+    assert contexts[0].token.subject == 'foo'
+    assert contexts[1].token.subject == 'bar'
+    assert not hasattr(auth, 'token')
+
+
+def test_async_auth(session, empty_app, get_test_client, create_token):
+    @empty_app.get('/async_auth')
+    async def endpoint(auth: AsyncAuth(required=True, roles=['user']) = Depends()) -> str:
+        user = await auth.load_user()
+
+        return isinstance(auth, AsyncAuthContext) and user.id == auth.principal.id
+
+    token = create_token(subject='test@foobar.com')
+    client = get_test_client(empty_app)
+    headers = {'Authorization': f'Bearer {token.credential}'}
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        UserRoleModel(user_id=1, role_='user')
+    ])
+
+    with patch.object(JWTToken, 'verify', side_effect=AssertionError):
+        response = client.get('/async_auth', headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()
+
+    assert client.get('/async_auth').json()['symbol'] == 'auth_token_required'
+
+
+def test_async_auth_principal_cache(session, empty_app, get_test_client, create_token):
+    @empty_app.get('/async_auth_principal_cache')
+    async def endpoint(auth: AsyncAuth(required=True, roles=['admin']) = Depends()) -> str:
+        return True
+
+    token = create_token(subject='test@foobar.com')
+    client = get_test_client(empty_app)
+    headers = {'Authorization': f'Bearer {token.credential}'}
+
+    session.bulk_save_objects([
+        RoleModel(role='admin'),
+        UserRoleModel(user_id=1, role_='admin')
+    ])
+
+    with patch('seed.depends.auth.depend.get_principal_cache', return_value=PrincipalCache()):
+        assert client.get('/async_auth_principal_cache', headers=headers).status_code == 200
+
+        with patch('seed.depends.auth.depend.run_in_threadpool', side_effect=AssertionError):
+            assert client.get('/async_auth_principal_cache', headers=headers).status_code == 200
+
+
+def test_auth_token_grants(session, empty_app, get_test_client):
+    @empty_app.get('/token_grants')
+    def endpoint(auth: Auth(required=True, roles=['user']) = Depends()) -> str:
+        return True
+
+    @empty_app.get('/async_token_grants')
+    async def async_endpoint(auth: AsyncAuth(required=True, roles=['user']) = Depends()) -> str:
+        return True
+
+    versions = GrantVersions()
+    client = get_test_client(empty_app)
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        UserRoleModel(user_id=1, role_='user')
+    ])
+    session.flush()
+
+    with patch('seed.depends.auth.principal.get_grant_versions', return_value=versions), \
+         patch('seed.depends.auth.depend.get_grant_versions', return_value=versions):
+        token = JWTToken.create(
+            subject='test@foobar.com',
+            grants=Principal.load_claim('test@foobar.com'),
+        )
+        headers = {'Authorization': f'Bearer {token.credential}'}
+
+        with patch.object(Auth, '_principal_loader', side_effect=AssertionError):
+            assert client.get('/token_grants', headers=headers).status_code == 200
+            assert client.get('/async_token_grants', headers=headers).status_code == 200
+
+        session.delete(session.query(UserRoleModel).first())
+        session.flush()
+
+        response = client.get('/token_grants', headers=headers)
+
+        assert response.status_code == 401
+        assert response.json()['symbol'] == 'auth_permmision_denied'
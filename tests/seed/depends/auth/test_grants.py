@@ -0,0 +1,99 @@
+import pytest
+
+from unittest.mock import patch
+
+from seed.depends.auth.grants import GrantRegistry, GrantRequirement, GrantVersions
+from seed.models import RoleModel, AbilityModel
+
+
+@pytest.fixture(autouse=True)
+def clean_grants(unlink_keys):
+    unlink_keys('grants:version*', 'principal:*')  # Shared counters and principals of other tests
+    yield
+    unlink_keys('grants:version*', 'principal:*')
+
+
+def test_grant_registry_bit():
+    registry = GrantRegistry()
+
+    assert registry.bit('role', 'user') == 1
+    assert registry.bit('ability', 'user') == 2
+    assert registry.bit('role', 'user') == 1
+    assert registry.grants(['user'], ['user', None]) == 3
+    assert len(registry) == 2
+
+
+def test_grant_registry_load(session):
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        AbilityModel(ability='auth'),
+    ])
+
+    registry = GrantRegistry()
+    registry.load()
+
+    assert registry.bit('role', 'admin') == 1
+    assert registry.bit('role', 'user') == 2
+    assert registry.bit('ability', 'auth') == 4
+
+
+def test_grant_requirement_check():
+    registry = GrantRegistry()
+    requirement = GrantRequirement.compile(registry, roles=['has1', ('has2', 'has3')])
+
+    assert requirement
+    assert requirement.check(registry.grants(['has1', 'has2']))
+    assert not requirement.check(registry.grants(['has1', 'has4']))
+    assert not requirement.check(registry.grants(abilities=['has1', 'has2']))
+    assert not requirement.check(0)
+
+    assert not GrantRequirement.compile(registry)
+    assert GrantRequirement.compile(registry).check(0)
+
+
+def test_grant_requirement_banned():
+    registry = GrantRegistry()
+    requirement = GrantRequirement.compile(
+        registry, roles=['user', ('admin', 'staff')], abilities=['auth']
+    )
+
+    assert requirement.banned(registry.grants(['user']))
+    assert requirement.banned(registry.grants(abilities=['auth']))
+    assert not requirement.banned(registry.grants(['admin']))
+    assert not requirement.banned(registry.grants(abilities=['user']))
+
+
+def test_grant_versions():
+    versions = GrantVersions()
+
+    assert versions.fetch(1) == [0, 0]
+    assert versions.is_current(1, [0, 0])
+
+    versions.bump({1})
+
+    assert versions.get_local(1) is None
+    assert versions.is_current(1, [0, 1])
+    assert not versions.is_current(2, [0, 1])
+
+    versions.bump()
+
+    assert versions.is_current(1, [1, 1])
+    assert versions.is_current(2, [1, 0])
+
+
+def test_grant_versions_local_cache():
+    versions = GrantVersions()
+
+    assert versions.is_current(1, [0, 0])
+
+    with patch.object(GrantVersions, 'fetch', side_effect=AssertionError):
+        assert versions.is_current(1, [0, 0])
+
+
+@pytest.mark.asyncio
+async def test_grant_versions_async():
+    versions = GrantVersions()
+    versions.bump({1})
+
+    assert await versions.is_current_async(1, [0, 1])
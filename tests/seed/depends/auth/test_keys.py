@@ -0,0 +1,85 @@
+import jwt
+import orjson
+import pytest
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.exceptions import InvalidKeyError
+from unittest.mock import patch
+
+from seed.depends.auth.cache import ClaimsCache
+from seed.depends.auth.keys import KeySet, SigningKey
+from seed.depends.auth.types import JWTToken
+
+
+def make_key_set(*keys):
+    return KeySet(secret='jwt_secret_key', keys=list(keys))
+
+
+@pytest.mark.parametrize('algorithm, private_key', [
+    ('RS256', rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+    ('ES256', ec.generate_private_key(ec.SECP256R1())),
+    ('EdDSA', ed25519.Ed25519PrivateKey.generate()),
+])
+def test_jwt_token_asymmetric(algorithm, private_key):
+    key_set = make_key_set(SigningKey('key-1', algorithm, private_key=private_key))
+
+    with patch('seed.depends.auth.types.get_key_set', return_value=key_set):
+        token = JWTToken.build(subject='foobar', expires=10)
+
+        assert jwt.get_unverified_header(token.credential)['kid'] == 'key-1'
+        assert token.algorithm == algorithm
+        assert JWTToken.decode(token.credential)['sub'] == 'foobar'
+
+    jwk = orjson.loads(key_set.jwks())['keys'][0]
+
+    assert jwk['kid'] == 'key-1'
+    assert jwk['alg'] == algorithm
+    assert 'd' not in jwk  # Public key only
+
+
+def test_key_set_rotation():
+    old_key = SigningKey('old', 'ES256', private_key=ec.generate_private_key(ec.SECP256R1()), not_after=200)
+    new_key = SigningKey('new', 'ES256', private_key=ec.generate_private_key(ec.SECP256R1()), not_before=100)
+    key_set = make_key_set(old_key, new_key)
+
+    assert key_set.current(now=50) is old_key
+    assert key_set.current(now=150) is new_key
+    assert key_set.get('old', now=150) is old_key
+    assert key_set.get('old', now=200) is None
+
+    assert [k['kid'] for k in orjson.loads(key_set.jwks(now=50))['keys']] == ['old', 'new']
+    assert [k['kid'] for k in orjson.loads(key_set.jwks(now=200))['keys']] == ['new']
+
+
+def test_jwt_token_retired_key_with_claims_cache():
+    key = SigningKey('key-1', 'EdDSA', private_key=ed25519.Ed25519PrivateKey.generate())
+    key_set = make_key_set(key)
+
+    with patch('seed.depends.auth.types.get_key_set', return_value=key_set), \
+            patch('seed.depends.auth.types.get_claims_cache', return_value=ClaimsCache()):
+        credential = JWTToken.build(subject='foobar', expires=10).credential
+
+        assert JWTToken(credential).subject == 'foobar'  # Cached
+
+        key.not_after = 1  # Retired
+
+        with pytest.raises(InvalidKeyError):
+            JWTToken(credential)
+
+
+def test_jwt_token_unknown_kid():
+    key_set = make_key_set(SigningKey('key-1', 'EdDSA', private_key=ed25519.Ed25519PrivateKey.generate()))
+
+    with patch('seed.depends.auth.types.get_key_set', return_value=key_set):
+        token = JWTToken.build(subject='foobar', expires=10)
+
+    with patch('seed.depends.auth.types.get_key_set', return_value=make_key_set()):
+        with pytest.raises(InvalidKeyError):
+            JWTToken.decode(token.credential)
+
+
+def test_jwt_token_without_keys():
+    token = JWTToken.build(subject='foobar', expires=10)
+
+    assert 'kid' not in jwt.get_unverified_header(token.credential)
+    assert JWTToken.decode(token.credential)['sub'] == 'foobar'
@@ -0,0 +1,69 @@
+import datetime
+
+from seed.depends.auth.permission import PermissionQuery
+from seed.models import (
+    RoleModel,
+    AbilityModel,
+    RoleAbilityModel,
+    UserRoleModel,
+    UserBanModel
+)
+
+
+def save_grants(session, *bans):
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        AbilityModel(ability='auth'),
+        RoleAbilityModel(role_='user', ability_='auth'),
+        UserRoleModel(user_id=1, role_='user'),
+        *bans
+    ])
+    session.flush()
+
+
+def test_permission_query_pass(session, query_counter):
+    save_grants(session)
+    query_counter.clear()
+
+    query = PermissionQuery(roles=[('admin', 'user')], abilities=['auth'])
+
+    assert query.execute('test@foobar.com') == (PermissionQuery.PASS, None)
+    assert len(query_counter) == 1
+
+
+def test_permission_query_deny(session):
+    save_grants(session)
+
+    assert PermissionQuery(roles=['admin']).execute('test@foobar.com')[0] == PermissionQuery.DENY
+    assert PermissionQuery(roles=['user'], abilities=[('read',)])\
+        .execute('test@foobar.com')[0] == PermissionQuery.DENY
+
+
+def test_permission_query_not_exists(session):
+    assert PermissionQuery(roles=['user']).execute('not_exist_user') == (
+        PermissionQuery.NOT_EXISTS, None
+    )
+
+
+def test_permission_query_banned(session):
+    save_grants(
+        session,
+        UserBanModel(user_id=1, ability_='auth', reason='foobar', until_at=datetime.datetime(2999, 3, 6)),
+    )
+
+    status, ban = PermissionQuery(abilities=['auth']).execute('test@foobar.com')
+
+    assert status == PermissionQuery.BANNED
+    assert ban == {'reason': 'foobar', 'until_at': datetime.datetime(2999, 3, 6)}
+
+    assert PermissionQuery(roles=['user']).execute('test@foobar.com')[0] == PermissionQuery.PASS
+
+
+def test_permission_query_banned_not_continue(session):
+    save_grants(
+        session,
+        UserBanModel(user_id=1, role_='user', until_at=datetime.datetime(1999, 3, 6)),
+    )
+
+    assert PermissionQuery(roles=['user']).execute('test@foobar.com')[0] == PermissionQuery.PASS
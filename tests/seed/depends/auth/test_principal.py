@@ -0,0 +1,236 @@
+import datetime
+import pytest
+
+from unittest.mock import patch
+
+from seed.depends.auth.grants import GrantVersions, get_grant_registry
+from seed.depends.auth.principal import Principal, PrincipalBan, PrincipalCache, queue_principal_changes
+from seed.models import (
+    RoleModel,
+    AbilityModel,
+    RoleAbilityModel,
+    UserModel,
+    UserRoleModel,
+    UserBanModel
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_grants(unlink_keys):
+    unlink_keys('grants:version*', 'principal:*')  # Shared counters and principals of other tests
+    yield
+    unlink_keys('grants:version*', 'principal:*')
+
+
+def make_principal(key='test@foobar.com'):
+    return Principal(
+        id=1,
+        key=key,
+        roles=frozenset({'user'}),
+        abilities=frozenset({'auth'}),
+        bans=(
+            PrincipalBan('user', None, 'reason', None),
+            PrincipalBan(None, 'auth', 'reason', datetime.datetime(1999, 3, 6)),
+        ),
+    )
+
+
+def test_principal_dumps_loads():
+    principal = Principal.loads(make_principal().dumps())
+
+    assert principal.id == 1
+    assert principal.key == 'test@foobar.com'
+    assert principal.roles == {'user'}
+    assert principal.abilities == {'auth'}
+    assert principal.bans == make_principal().bans
+
+
+def test_principal_active_bans():
+    assert make_principal().active_bans == [PrincipalBan('user', None, 'reason', None)]
+
+
+def test_principal_from_user(session):
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        AbilityModel(ability='auth'),
+        RoleAbilityModel(role_='user', ability_='auth'),
+        UserRoleModel(user_id=1, role_='user'),
+        UserBanModel(user_id=1, role_='user', reason='foobar')
+    ])
+
+    principal = Principal.from_user(session.query(UserModel).get(1))
+
+    assert principal.key == 'test@foobar.com'
+    assert principal.roles == {'user'}
+    assert principal.abilities == {'auth'}
+    assert principal.bans[0].reason == 'foobar'
+
+
+def test_principal_cache_load():
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    assert cache.load(principal.key, lambda: principal) is principal
+
+    cache.invalidate(principal.key)
+
+    loaded = cache.load(principal.key, lambda: None)  # From redis layer
+
+    assert loaded.roles == principal.roles
+    assert cache.get_local(principal.key) is not None
+
+
+def test_principal_cache_invalidate_users():
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    cache.load(principal.key, lambda: principal)
+    cache.invalidate_users({principal.id})
+
+    assert cache.get_local(principal.key) is None
+    assert cache.load(principal.key, lambda: None) is None
+
+
+def test_principal_cache_stale_loader():
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    def loader():
+        cache.invalidate_users({principal.id}, keys=[principal.key])  # Committed after rows were read
+
+        return principal
+
+    assert cache.load(principal.key, loader) is principal
+    assert cache.get_local(principal.key) is None
+    assert cache.load(principal.key, lambda: None) is None  # Stale rows are not stored
+
+
+def test_principal_cache_invalidate_all():
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    cache.load(principal.key, lambda: principal)
+    cache.invalidate_all()
+
+    assert cache.load(principal.key, lambda: None) is None
+
+
+def test_principal_cache_invalidate_on_flush(session):
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    with patch('seed.depends.auth.principal.get_principal_cache', return_value=cache):
+        cache.load(principal.key, lambda: principal)
+
+        session.add(RoleModel(role='user'))
+        session.add(UserRoleModel(user_id=1, role_='user'))
+        session.flush()
+
+    assert cache.get_local(principal.key) is None
+
+
+def test_principal_cache_invalidate_not_cached_on_flush(session):
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    with patch('seed.depends.auth.principal.get_principal_cache', return_value=cache):
+        session.add(RoleModel(role='user'))
+        session.add(UserRoleModel(user_id=1, role_='user'))
+        session.flush()  # Not indexed yet, principal may be loading
+
+    assert not cache.set(principal, 0)
+
+
+def test_principal_cache_invalidate_on_bulk_save(session):
+    cache = PrincipalCache()
+    principal = make_principal()
+
+    with patch('seed.depends.auth.principal.get_principal_cache', return_value=cache):
+        cache.load(principal.key, lambda: principal)
+
+        session.bulk_save_objects([RoleModel(role='user'), UserRoleModel(user_id=1, role_='user')])
+        queue_principal_changes(session, {1: principal.key})
+
+        session.add(AbilityModel(ability='auth'))
+        session.flush()  # Invalidated on next flush or commit
+
+    assert cache.get_local(principal.key) is None
+    assert cache.load(principal.key, lambda: None) is None
+
+
+def test_principal_load(session, query_counter):
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        RoleModel(role='admin'),
+        AbilityModel(ability='auth'),
+        AbilityModel(ability='read'),
+        RoleAbilityModel(role_='user', ability_='auth'),
+        RoleAbilityModel(role_='admin', ability_='read'),
+        UserRoleModel(user_id=1, role_='user'),
+        UserRoleModel(user_id=1, role_='admin'),
+        UserBanModel(user_id=1, role_='admin', reason='foobar'),
+        UserBanModel(user_id=1, ability_='auth', until_at=datetime.datetime(1999, 3, 6))
+    ])
+    session.flush()
+    query_counter.clear()
+
+    principal = Principal.load('test@foobar.com')
+
+    assert len(query_counter) == 1
+    assert principal.id == 1
+    assert principal.roles == {'user', 'admin'}
+    assert principal.abilities == {'auth', 'read'}
+    assert principal.bans == (PrincipalBan('admin', None, 'foobar', None),)
+
+
+def test_principal_load_without_grants():
+    principal = Principal.load('test@foobar.com')
+
+    assert principal.id == 1
+    assert principal.roles == set()
+    assert principal.bans == ()
+
+
+def test_principal_load_not_exists():
+    assert Principal.load('not_exist_user') is None
+
+
+def test_principal_grants():
+    principal = make_principal()
+    registry = get_grant_registry()
+
+    assert principal.grants == registry.grants(['user'], ['auth'])
+    assert principal.bans[0].grants == registry.grants(['user'])
+    assert principal.bans[1].grants == registry.grants(abilities=['auth'])
+
+
+def test_principal_load_claim(session):
+    versions = GrantVersions()
+    versions.bump({1})
+
+    session.bulk_save_objects([
+        RoleModel(role='user'),
+        UserRoleModel(user_id=1, role_='user'),
+    ])
+    session.flush()
+
+    with patch('seed.depends.auth.principal.get_grant_versions', return_value=versions):
+        claim = Principal.load_claim('test@foobar.com')
+
+        assert Principal.load_claim('not_exist_user') is None
+
+    assert claim['version'] == [0, 1]
+    assert Principal.from_dict(claim).roles == {'user'}
+    assert Principal.load_claim('test@foobar.com') is None  # Disabled
+
+
+def test_principal_changes_bump_grant_versions(session):
+    versions = GrantVersions()
+
+    with patch('seed.depends.auth.principal.get_grant_versions', return_value=versions):
+        session.add(RoleModel(role='user'))
+        session.flush()
+        session.add(UserRoleModel(user_id=1, role_='user'))
+        session.flush()
+
+    assert versions.fetch(1) == [0, 1]
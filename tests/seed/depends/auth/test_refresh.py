@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+
+from seed.depends.auth.refresh import RefreshFlight
+from seed.depends.auth.store import TokenStore
+from seed.depends.redis import AsyncRedisContextManager
+from seed.exceptions import AuthHTTPException
+
+
+@pytest.fixture(autouse=True)
+def clean_flight(unlink_keys):
+    unlink_keys(f'{RefreshFlight.name("foobar", "*")}*', TokenStore.name('foobar'))  # Locks, results of previous runs
+    TokenStore().create('foobar', 'refresh', 'jti')
+    yield
+    unlink_keys(f'{RefreshFlight.name("foobar", "*")}*', TokenStore.name('foobar'))
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_coalesce():
+    calls = []
+
+    async def mint():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+
+        return {'access': f'access-{len(calls)}'}
+
+    flight = RefreshFlight(interval=0.01)
+    results = await asyncio.gather(*(flight.run('foobar', 'jti', 'credential', mint) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert results == [{'access': 'access-1'}] * 5
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_joined():
+    flight = RefreshFlight(interval=0.01)
+    started = asyncio.Event()
+
+    async def mint():
+        started.set()
+        await asyncio.sleep(0.05)
+
+        return {'access': 'access'}
+
+    leader = asyncio.ensure_future(flight.run('foobar', 'jti', 'credential', mint))
+    await started.wait()
+
+    flight_id = await flight.current('foobar', 'jti')  # Read by RefreshAuth of joined refresh
+
+    assert flight_id is not None
+    assert await flight.run('foobar', 'jti', 'credential', mint, flight=flight_id) == {'access': 'access'}
+    assert await leader == {'access': 'access'}
+    assert await flight.current('foobar', 'jti') is None
+    assert await flight.result('foobar', 'jti', flight_id, 'credential') == {'access': 'access'}
+    assert await flight.result('foobar', 'jti', flight_id, 'other_credential') is None
+
+    async with AsyncRedisContextManager() as r:
+        assert b'access' not in await r.get(f'{RefreshFlight.name("foobar", "jti")}:{flight_id}')  # Sealed
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_rotated():
+    async def mint():
+        return {'access': 'access'}
+
+    TokenStore().create('foobar', 'refresh', 'new_jti')  # Rotated by refresh finished before
+
+    with pytest.raises(AuthHTTPException) as e:
+        await RefreshFlight(interval=0.01).run('foobar', 'jti', 'credential', mint)
+
+    assert e.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_leader_failed():
+    async def mint():
+        return {'access': 'access'}
+
+    # Joined flight ended without result, refresh leads itself
+    assert await RefreshFlight(interval=0.01).run(
+        'foobar', 'jti', 'credential', mint, flight='failed'
+    ) == {'access': 'access'}
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_wait_timeout():
+    async def mint():
+        return {'access': 'access'}
+
+    lock: str = f'{RefreshFlight.name("foobar", "jti")}:lock'
+
+    async with AsyncRedisContextManager() as r:
+        await r.set(lock, 1, px=5000)  # Stuck lock holder
+
+    flight = RefreshFlight(wait=0.05, interval=0.01)
+
+    try:
+        with pytest.raises(AuthHTTPException) as e:
+            await flight.run('foobar', 'jti', 'credential', mint)
+
+        assert e.value.status_code == 409  # Not minted again
+
+        async with AsyncRedisContextManager() as r:
+            assert await r.get(lock) == b'1'
+    finally:
+        async with AsyncRedisContextManager() as r:
+            await r.delete(lock)
+
+
+@pytest.mark.asyncio
+async def test_refresh_flight_expired_lock():
+    lock: str = f'{RefreshFlight.name("foobar", "jti")}:lock'
+
+    async def mint():
+        async with AsyncRedisContextManager() as r:
+            await r.set(lock, 'next', px=5000)  # Lock expired while minting, taken by next refresh
+
+        return {'access': 'access'}
+
+    try:
+        assert await RefreshFlight(interval=0.01).run('foobar', 'jti', 'credential', mint) == {'access': 'access'}
+
+        async with AsyncRedisContextManager() as r:
+            assert await r.get(lock) == b'next'
+    finally:
+        async with AsyncRedisContextManager() as r:
+            await r.delete(lock)
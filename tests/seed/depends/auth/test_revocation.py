@@ -0,0 +1,132 @@
+import pytest
+import time
+
+from unittest.mock import patch
+
+from seed.depends.auth.revocation import BloomFilter, RevocationList, queue_revocations, revocation_stream
+from seed.depends.auth.store import TokenStore, AsyncTokenStore
+from seed.depends.redis import RedisContextManager
+from seed.setting import setting
+
+
+@pytest.fixture(autouse=True)
+def clean_stream():
+    with RedisContextManager() as r:
+        r.unlink(revocation_stream(), TokenStore.name('foobar'))
+
+    yield
+
+    with RedisContextManager() as r:
+        r.unlink(revocation_stream(), TokenStore.name('foobar'))
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+    for i in range(1000):
+        bloom.add(f'jti-{i}')
+
+    assert len(bloom) == 1000
+    assert all(f'jti-{i}' in bloom for i in range(1000))
+    assert sum(f'other-{i}' in bloom for i in range(1000)) < 50
+
+
+def test_revocation_list_check():
+    revocations = RevocationList(retention=60)
+    revocations.add('revoked')
+
+    assert revocations.check('revoked') is None  # Not synced yet
+
+    revocations.touch()
+
+    assert revocations.check('revoked') is True
+    assert revocations.check('jti') is False
+
+
+def test_revocation_list_max_lag():
+    revocations = RevocationList(retention=60, max_lag=0.01)
+    revocations.touch()
+
+    assert revocations.check('jti') is False
+
+    time.sleep(0.02)
+
+    assert revocations.check('jti') is None
+
+
+def test_revocation_list_bloom():
+    revocations = RevocationList(retention=60, exact_size=2, bloom_capacity=100)
+    revocations.touch()
+
+    for jti in ('jti-1', 'jti-2', 'jti-3'):
+        revocations.add(jti)
+
+    assert len(revocations) == 3
+    assert revocations.check('jti-1') is None  # Maybe revoked, verified with token store
+    assert revocations.check('jti-3') is True
+
+
+def test_revocation_list_retention():
+    revocations = RevocationList(retention=60)
+    revocations.add('jti', revoked_at=time.time() - 61)
+
+    assert len(revocations) == 0
+
+
+def test_queue_revocations_retention():
+    now = int(time.time() * 1000)
+
+    with RedisContextManager() as r:
+        for i in range(5):
+            r.xadd(revocation_stream(), {'jti': f'recent-{i}', 'at': 0}, id=f'{now - 30000 + i}-0')
+
+        with patch.dict(setting.jwt, {'refresh_token_expires': '60s'}):
+            pipeline = r.pipeline()
+            queue_revocations(pipeline, ['jti'])
+            pipeline.execute()
+
+        jtis = [fields[b'jti'] for _, fields in r.xrange(revocation_stream())]
+
+    assert jtis == [*(f'recent-{i}'.encode() for i in range(5)), b'jti']  # Within retention, replayed by workers
+
+
+def test_token_store_stateless_verify():
+    revocations = RevocationList(retention=60)
+    revocations.touch()
+
+    with patch('seed.depends.auth.store.get_revocation_list', return_value=revocations):
+        store = TokenStore()
+        store.create('foobar', 'access', 'jti-1')
+        store.create('foobar', 'access', 'jti-2')
+
+        with patch.object(TokenStore, 'get', side_effect=AssertionError):
+            assert not store.verify('foobar', 'access', 'jti-1')
+            assert store.verify('foobar', 'access', 'jti-2')
+
+        store.revoke('foobar')
+
+        assert not store.verify('foobar', 'access', 'jti-2')
+
+    with RedisContextManager() as r:
+        assert [
+            fields[b'jti'] for _, fields in r.xrange(revocation_stream())
+        ] == [b'jti-1', b'jti-2']
+
+
+@pytest.mark.asyncio
+async def test_async_token_store_stateless_verify():
+    revocations = RevocationList(retention=60)
+    revocations.touch()
+
+    with patch('seed.depends.auth.store.get_revocation_list', return_value=revocations):
+        store = AsyncTokenStore()
+        await store.create_many('foobar', {'access': ('jti-1', 10), 'refresh': ('jti-2', 20)})
+        await store.create('foobar', 'access', 'jti-3')
+
+        assert not await store.verify('foobar', 'access', 'jti-1')
+        assert await store.verify('foobar', 'refresh', 'jti-2')
+
+        await store.revoke('foobar')
+
+        assert not await store.verify('foobar', 'refresh', 'jti-2')
+        assert not await store.verify('foobar', 'access', 'jti-3')
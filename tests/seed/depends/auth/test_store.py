@@ -0,0 +1,84 @@
+import pytest
+
+from seed.depends.auth.store import TokenStore, AsyncTokenStore
+from seed.depends.auth.types import JWTToken
+from seed.depends.redis import RedisContextManager
+
+
+@pytest.fixture(autouse=True)
+def clean_token():
+    TokenStore().revoke('foobar')
+    yield
+    TokenStore().revoke('foobar')
+
+
+def test_token_store_create_and_verify():
+    store = TokenStore()
+    store.create('foobar', 'access', 'jti')
+
+    assert store.get('foobar', 'access') == 'jti'
+    assert store.verify('foobar', 'access', 'jti')
+    assert not store.verify('foobar', 'access', 'other_jti')
+    assert not store.verify('foobar', 'refresh', 'jti')
+
+
+def test_token_store_refresh_token_expire():
+    TokenStore().create('foobar', 'refresh', 'jti', expires_in=10)
+
+    with RedisContextManager() as r:
+        assert 0 < r.ttl(TokenStore.name('foobar')) <= 10
+
+
+def test_token_store_revoke():
+    store = TokenStore()
+    store.create('foobar', 'access', 'jti')
+    store.revoke('foobar')
+
+    assert store.get('foobar', 'access') is None
+
+
+@pytest.mark.asyncio
+async def test_async_token_store():
+    store = AsyncTokenStore()
+    await store.create('foobar', 'access', 'jti')
+
+    assert await store.get('foobar', 'access') == 'jti'
+    assert await store.verify('foobar', 'access', 'jti')
+
+    await store.revoke('foobar')
+
+    assert not await store.verify('foobar', 'access', 'jti')
+
+
+@pytest.mark.asyncio
+async def test_jwt_token_create_async():
+    token = await JWTToken.create_async(subject='foobar', expires=10)
+
+    assert isinstance(token, JWTToken)
+    assert await token.verify_async()
+    assert token.verify()
+
+
+def test_token_store_create_many():
+    TokenStore().create_many('foobar', {
+        'access': ('access_jti', 10),
+        'refresh': ('refresh_jti', 20),
+    })
+
+    with RedisContextManager() as r:
+        assert r.hgetall(TokenStore.name('foobar')) == {
+            b'access': b'access_jti',
+            b'refresh': b'refresh_jti',
+        }
+        assert 0 < r.ttl(TokenStore.name('foobar')) <= 20
+
+
+@pytest.mark.asyncio
+async def test_async_token_store_create_many():
+    await AsyncTokenStore().create_many('foobar', {
+        'access': ('access_jti', 10),
+    })
+
+    with RedisContextManager() as r:
+        assert r.hgetall(TokenStore.name('foobar')) == {b'access': b'access_jti'}
+        assert r.ttl(TokenStore.name('foobar')) == -1
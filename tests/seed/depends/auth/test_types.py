@@ -1,3 +1,7 @@
+import pytest
+
+from jwt.exceptions import ExpiredSignatureError
+
 from seed.depends.auth.types import JWTToken
 from seed.depends.redis import RedisContextManager
 
@@ -15,7 +19,7 @@ def test_jwt_token_verify():
     assert token.verify()
 
     with RedisContextManager() as r:
-        r.delete('token:foobar')
+        r.delete('token:{foobar}')
 
     assert not token.verify()
 
@@ -26,4 +30,34 @@ def test_jwt_token_create():
     assert isinstance(token, JWTToken)
 
     with RedisContextManager() as r:
-        assert r.hget('token:foobar', 'access')
+        assert r.hget('token:{foobar}', 'access')
+
+
+def test_jwt_token_create_many():
+    tokens = JWTToken.create_many(['access', 'refresh'], subject='foobar')
+
+    assert set(tokens.keys()) == {'access', 'refresh'}
+    assert tokens['access'].verify()
+    assert tokens['refresh'].verify()
+
+    with RedisContextManager() as r:
+        assert r.ttl('token:{foobar}') == tokens['refresh'].expires_in
+
+
+def test_jwt_token_expired_with_claims_cache():
+    credential = JWTToken.create(subject='foobar', expires=-10).credential
+
+    with pytest.raises(ExpiredSignatureError):
+        JWTToken(credential)
+
+
+def test_jwt_token_lazy_fields():
+    token = JWTToken(JWTToken.create(subject='foobar', secrets={'foo': 'bar'}, expires=10).credential)
+
+    assert not hasattr(token, '__dict__')
+    assert token._secrets is None and token._expires is None and token._created_at is None
+
+    assert token.secrets == '{"foo":"bar"}'
+    assert token.expires.int_timestamp == token.claims['exp']
+    assert token.created_at.int_timestamp == token.claims['iat']
+    assert token.redis_name == 'token:{foobar}'
@@ -0,0 +1,104 @@
+import redis
+
+from unittest.mock import patch
+
+from seed.depends.redis import (
+    POOL_TIMEOUT_MESSAGE,
+    MetricsSentinelConnectionPool,
+    PoolMetrics,
+    RedisContextManager,
+    get_connection_pool,
+    get_redis,
+    pool_metrics,
+    reset_connection_pool,
+    transaction_supported
+)
+
+
+def test_redis_connection_pool_shared():
+    pool = get_connection_pool()
+
+    assert get_connection_pool() is pool
+    assert get_redis().connection_pool is pool
+
+    with RedisContextManager() as r1, RedisContextManager() as r2:
+        assert r1 is r2
+        assert r1.connection_pool is pool
+
+
+def test_redis_pool_metrics_failures():
+    metrics = PoolMetrics()
+    connection = object()
+
+    metrics.failure(0.1, redis.ConnectionError(POOL_TIMEOUT_MESSAGE))
+    metrics.failure(0.0, redis.ConnectionError('Connection refused'))
+    metrics.checkin(connection)  # Released by pool after failed connect, never checked out
+
+    assert metrics.snapshot()['timeouts'] == 1
+    assert metrics.snapshot()['connect_errors'] == 1
+    assert metrics.snapshot()['in_use'] == 0
+
+    metrics.checkout(0.0, connection)
+    metrics.checkin(object())
+
+    assert metrics.snapshot()['in_use'] == 1
+
+    metrics.checkin(connection)
+
+    assert metrics.snapshot()['in_use'] == 0
+
+
+def test_redis_connection_pool_reset():
+    pool = get_connection_pool()
+    reset_connection_pool()
+
+    assert get_connection_pool() is not pool
+
+
+def test_redis_pool_metrics():
+    before = pool_metrics()['checkouts']
+
+    with RedisContextManager() as r:
+        r.set('pool:metrics', 1)
+        r.delete('pool:metrics')
+
+    metrics = pool_metrics()
+
+    assert metrics['checkouts'] == before + 2
+    assert metrics['in_use'] == 0
+    assert metrics['wait_time_max'] >= 0
+
+
+def test_redis_sentinel_mode():
+    reset_connection_pool()
+
+    try:
+        with patch('seed.depends.redis.redis_mode', return_value='sentinel'):
+            pool = get_connection_pool()
+
+            assert isinstance(pool, MetricsSentinelConnectionPool)
+            assert pool.service_name == 'mymaster'
+            assert pool.sentinel_manager.sentinels[0].connection_pool.connection_kwargs['port'] == 26379
+            assert get_redis().connection_pool is pool
+            assert transaction_supported()
+    finally:
+        reset_connection_pool()
+
+
+def test_redis_cluster_mode():
+    reset_connection_pool()
+
+    try:
+        with patch('seed.depends.redis.redis_mode', return_value='cluster'), \
+                patch('seed.depends.redis.RedisCluster') as cluster:
+            assert get_redis() is cluster.return_value
+            assert get_redis() is cluster.return_value
+            assert cluster.call_count == 1
+            assert 'db' not in cluster.call_args[1]
+            assert [
+                (node.host, node.port) for node in cluster.call_args[1]['startup_nodes']
+            ] == [('127.0.0.1', 7000)]
+            assert not transaction_supported()
+            assert pool_metrics() == {}
+    finally:
+        reset_connection_pool()
@@ -0,0 +1,67 @@
+import time
+
+from seed.depends.auth import JWTToken
+from seed.depends.auth.store import TokenStore
+from seed.models import RoleModel, UserRoleModel
+
+
+def admin_headers(session):
+    session.bulk_save_objects([
+        RoleModel(role='admin'),
+        UserRoleModel(user_id=1, role_='admin'),
+    ])
+    session.flush()
+
+    token = JWTToken.create(subject='test@foobar.com', token_type='access', expires=5)
+
+    return {'Authorization': f'Bearer {token.credential}'}
+
+
+def wait_job(client, headers, job_id):
+    for _ in range(100):
+        job = client.get(f'/api/admin/sessions/revoke/{job_id}', headers=headers).json()
+
+        if job['finished']:
+            return job
+
+        time.sleep(0.01)
+
+
+def test_sessions_revoke(client, session):
+    headers = admin_headers(session)
+    TokenStore().create('mbosco@example.com', 'access', 'jti')
+
+    response = client.post('/api/admin/sessions/revoke', headers=headers, json={'user_ids': [2, 3]})
+
+    assert response.status_code == 202
+    assert response.json()['selected'] == 2
+
+    job = wait_job(client, headers, response.json()['job_id'])
+
+    assert job['revoked'] == 1
+    assert TokenStore().get('mbosco@example.com', 'access') is None
+
+
+def test_sessions_revoke_selection_required(client, session):
+    response = client.post('/api/admin/sessions/revoke', headers=admin_headers(session), json={})
+
+    assert response.status_code == 400
+
+
+def test_sessions_revoke_not_admin(client, create_token):
+    token = create_token(subject='test@foobar.com')
+
+    response = client.post(
+        '/api/admin/sessions/revoke',
+        headers={'Authorization': f'Bearer {token.credential}'},
+        json={'all': True},
+    )
+
+    assert response.status_code == 401
+
+
+def test_sessions_revoke_job_not_exists(client, session):
+    response = client.get('/api/admin/sessions/revoke/not_exists', headers=admin_headers(session))
+
+    assert response.status_code == 404
+    assert response.json()['symbol'] == 'revoke_job_not_exists'
@@ -0,0 +1,7 @@
+def test_jwks(client):
+    response = client.get('/.well-known/jwks.json')
+
+    assert response.status_code == 200
+    assert response.json() == {'keys': []}
+    assert 'max-age' in response.headers['cache-control']
+    assert client.get('/api/.well-known/jwks.json').status_code == 404
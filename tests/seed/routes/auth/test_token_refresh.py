@@ -39,3 +39,24 @@ def test_token_refresh_refresh_token_renewal(client):
     assert response.status_code == 201
     assert 'access_token' in response.json()
     assert 'refresh_token' in response.json()
+
+
+def test_token_refresh_replay(client):
+    token = JWTToken.create(
+        subject='test@foobar.com',
+        token_type='refresh',
+        expires=5
+    )
+    headers = {
+        'Authorization': f'Bearer {token.credential}'
+    }
+
+    setting.jwt.refresh_token_renewal_before_expire = '1y'
+
+    first = client.post('/api/token/refresh', headers=headers)
+    second = client.post('/api/token/refresh', headers=headers)  # Rotated by first, which is already finished
+
+    assert first.status_code == 201
+    assert second.status_code == 401
+    assert 'access_token' not in second.json()
+    assert JWTToken(first.json()['access_token']).verify()
@@ -1,4 +1,3 @@
-
 def test_user_me_get_information(client, create_token):
     token = create_token(
         subject='test@foobar.com'
@@ -21,3 +20,20 @@ def test_user_me_get_information(client, create_token):
         },
         'social_accounts': ['kakao']
     }
+
+
+def test_user_me_not_modified(client, create_token, query_counter, response_cache):
+    token = create_token(
+        subject='test@foobar.com'
+    )
+    headers = {'Authorization': f'Bearer {token.credential}'}
+
+    response = client.get('/api/users/me', headers=headers)
+    etag = response.headers['etag']
+    statements = len(query_counter)
+
+    response = client.get('/api/users/me', headers={**headers, 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert len(query_counter) == statements  # Route body is not run
@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+import pytest
+import threading
+
+from seed.exceptions import RouterHTTPException
+from seed.executor import BoundedExecutor, executor_metrics, get_default_executor
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_run():
+    var = contextvars.ContextVar('var')
+    var.set('foobar')
+
+    executor = BoundedExecutor(name='test', max_workers=2)
+
+    assert await executor.run(lambda a, b=0: (a + b, var.get()), 1, b=2) == (3, 'foobar')
+    assert executor.metrics.snapshot()['submitted'] == 1
+    assert executor.metrics.snapshot()['queued'] == 0
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_reject():
+    executor = BoundedExecutor(name='test', max_workers=1, max_queue=1, retry_after=3)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    running = asyncio.ensure_future(executor.run(block))
+    await asyncio.get_event_loop().run_in_executor(None, started.wait, 5)
+
+    queued = asyncio.ensure_future(executor.run(lambda: 'queued'))
+    await asyncio.sleep(0)
+
+    with pytest.raises(RouterHTTPException) as e:
+        await executor.run(lambda: 'rejected')
+
+    assert e.value.status_code == 503
+    assert e.value.headers == {'Retry-After': '3'}
+
+    release.set()
+
+    assert await queued == 'queued'
+    await running
+
+    metrics = executor_metrics(executor)
+
+    assert metrics['rejected'] == 1
+    assert metrics['max_queued'] == 1
+    assert metrics['wait_time_max'] > 0
+
+
+def test_default_executor():
+    assert get_default_executor() is get_default_executor()
+    assert get_default_executor().max_workers == 40
@@ -0,0 +1,116 @@
+import pytest
+
+from fastapi import Depends
+
+from seed.depends.auth import AsyncAuth
+from seed.rate_limit import LocalBlocks, RateLimit
+from seed.router import Route, Router
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('algorithm', ['sliding_window', 'token_bucket'])
+async def test_rate_limit_hit(algorithm):
+    rate_limit = RateLimit(limit=3, period=60, algorithm=algorithm)
+
+    results = [await rate_limit.hit(f'test:{algorithm}') for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert 0 < results[-1].retry_after <= 60
+    assert results[-1].headers['Retry-After'] == str(results[-1].retry_after)
+    assert 'Retry-After' not in results[0].headers
+    assert (await rate_limit.hit(f'other:{algorithm}')).allowed
+
+
+def test_rate_limit_options():
+    with pytest.raises(AssertionError):
+        RateLimit(limit=1, key='header')
+
+    with pytest.raises(AssertionError):
+        RateLimit(limit=1, algorithm='fixed_window')
+
+
+def test_local_blocks():
+    blocks = LocalBlocks(maxsize=1)
+    blocks.block('foo', 10)
+
+    assert 9 < blocks.blocked('foo') <= 10
+
+    blocks.block('bar', -1)
+
+    assert blocks.blocked('foo') is None  # Evicted
+    assert blocks.blocked('bar') is None
+    assert len(blocks) == 0
+
+
+def test_route_rate_limit(get_test_client, empty_app):
+    rate_limit = RateLimit(limit=2, period=60, key='uuid')
+    hits = []
+    hit = rate_limit.hit
+
+    async def _hit(key):
+        hits.append(key)
+        return await hit(key)
+
+    rate_limit.hit = _hit
+
+    class _Route(Route):
+        @Route.option(rate_limit=rate_limit)
+        async def get():
+            return {'foo': 'bar'}
+
+    router = Router()
+    router.Route('/')(_Route)
+
+    empty_app.include_router(router)
+    client = get_test_client(empty_app)
+
+    response = client.get('/')
+
+    assert response.json() == {'foo': 'bar'}
+    assert response.headers['ratelimit-limit'] == '2'
+    assert response.headers['ratelimit-remaining'] == '1'
+
+    client.get('/')
+    response = client.get('/')
+
+    assert response.status_code == 429
+    assert response.json()['symbol'] == 'rate_limit_exceeded'
+    assert int(response.headers['retry-after']) > 0
+
+    response = client.get('/')
+
+    assert response.status_code == 429
+    assert len(hits) == 3  # Shed locally, without redis
+    assert '_Route.get:uuid:' in hits[0]
+
+
+def test_route_rate_limit_before_auth(get_test_client, empty_app, create_token):
+    verified = []
+
+    class _Auth(AsyncAuth):
+        async def _verify_async(self, context):
+            verified.append(context.token.subject)
+            return await super()._verify_async(context)
+
+    class _Route(Route):
+        @Route.option(rate_limit=RateLimit(limit=1, period=60, key='subject'))
+        async def get(
+            auth: _Auth(required=True) = Depends()
+        ):
+            return {'subject': auth.token.subject}
+
+    router = Router()
+    router.Route('/')(_Route)
+
+    empty_app.include_router(router)
+    client = get_test_client(empty_app)
+
+    foobar = {'Authorization': f'Bearer {create_token(subject="foobar").credential}'}
+    other = {'Authorization': f'Bearer {create_token(subject="other").credential}'}
+
+    assert client.get('/', headers=foobar).json() == {'subject': 'foobar'}
+    assert client.get('/', headers=foobar).status_code == 429
+    assert client.get('/', headers=other).status_code == 200  # Bucket of subject, not ip
+    assert client.get('/', headers={'Authorization': 'Bearer invalid'}).status_code == 400  # Limited by ip
+    assert verified == ['foobar', 'other']  # Rejected requests are not verified
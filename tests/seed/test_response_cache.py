@@ -0,0 +1,102 @@
+import pytest
+
+from fastapi import Depends, Response
+
+from seed.response_cache import (
+    CachedResponse, MemoryResponseCache, RedisResponseCache, RouteCache,
+    invalidate_response_cache
+)
+from seed.depends.auth import AsyncAuth
+from seed.router import Route, Router
+
+
+@pytest.mark.asyncio
+async def test_memory_response_cache():
+    cache = MemoryResponseCache(maxsize=2)
+    cached = CachedResponse(b'{}', media_type='application/json')
+
+    await cache.set('a', ['foo', 'foo:1'], cached, 60)
+    await cache.set('b', ['foo', 'foo:2'], cached, 60)
+
+    assert await cache.get('a') is cached
+
+    await cache.set('c', ['bar'], cached, 60)
+
+    assert await cache.get('b') is None  # Least recently used
+    assert cache.invalidate('foo:1') == 1
+    assert await cache.get('a') is None
+    assert await cache.get('c') is cached
+
+    await cache.set('d', ['bar'], cached, -1)
+
+    assert await cache.get('d') is None
+
+
+@pytest.mark.asyncio
+async def test_redis_response_cache():
+    cache = RedisResponseCache()
+    cached = CachedResponse(b'{"foo":"bar"}', media_type='application/json')
+
+    await cache.set('test:a', ['test', 'test:1'], cached, 60)
+    await cache.set('test:b', ['test', 'test:2'], cached, 60)
+
+    loaded = await cache.get('test:a')
+
+    assert loaded.body == cached.body
+    assert loaded.etag == cached.etag
+    assert cache.invalidate('test:1') == 1
+    assert await cache.get('test:a') is None
+    assert await cache.invalidate_async('test') == 1
+    assert await cache.get('test:b') is None
+
+
+def test_route_cache_vary():
+    with pytest.raises(AssertionError):
+        RouteCache(vary=['path'])
+
+
+def test_route_cache(get_test_client, empty_app, create_token, response_cache):
+    calls = []
+
+    class _Route(Route):
+        @Route.cache(ttl=60, vary=['subject', 'query:page'], name='items')
+        async def get(
+            auth: AsyncAuth(required=True) = Depends()
+        ):
+            calls.append(auth.token.subject)
+            return {'calls': len(calls)}
+
+        @Route.cache_invalidate('items')
+        async def post(
+            auth: AsyncAuth(required=True) = Depends()
+        ):
+            return Response(status_code=204)
+
+    router = Router()
+    router.Route('/')(_Route)
+
+    empty_app.include_router(router)
+    client = get_test_client(empty_app)
+
+    foo = {'Authorization': f"Bearer {create_token(subject='test@foobar.com').credential}"}
+    bar = {'Authorization': f"Bearer {create_token(subject='test2@foobar.com').credential}"}
+
+    response = client.get('/', headers=foo)
+
+    assert response.json() == {'calls': 1}
+    assert response.headers['cache-control'] == 'private, no-cache'
+    assert client.get('/', headers=foo).json() == {'calls': 1}
+    assert client.get('/?page=2', headers=foo).json() == {'calls': 2}
+    assert client.get('/', headers=bar).json() == {'calls': 3}
+
+    response = client.get('/', headers={**foo, 'If-None-Match': response.headers['etag']})
+
+    assert response.status_code == 304
+    assert len(calls) == 3
+
+    client.post('/', headers=foo)
+
+    assert client.get('/', headers=foo).json() == {'calls': 4}
+    assert client.get('/', headers=bar).json() == {'calls': 3}
+    assert invalidate_response_cache('items') == 2
+    assert client.get('/', headers=bar).json() == {'calls': 5}
@@ -1,7 +1,11 @@
+import decimal
+import orjson
 import pytest
+import threading
 
 from fastapi.responses import ORJSONResponse
 
+from seed.executor import BoundedExecutor
 from seed.router import Route, Router
 
 
@@ -222,3 +226,71 @@ def test_router_join_router(empty_endpoint):
 
     assert router2.routes[0].path == '/'
     assert router2.routes[0].methods == {'GET'}
+
+
+def test_router_executor(get_test_client, empty_app):
+    route_executor = BoundedExecutor(name='route')
+    router_executor = BoundedExecutor(name='router')
+
+    class _Route(Route):
+        @Route.option(executor=route_executor)
+        def get():
+            return {'thread': threading.current_thread().name}
+
+        def post():
+            return {'thread': threading.current_thread().name}
+
+    router = Router(executor=router_executor)
+    router.Route('/')(_Route)
+
+    empty_app.include_router(router)
+    client = get_test_client(empty_app)
+
+    assert client.get('/').json()['thread'].startswith('executor:route')
+    assert client.post('/').json()['thread'].startswith('executor:router')
+    assert route_executor.metrics.snapshot()['submitted'] == 1
+
+
+@pytest.mark.asyncio
+async def test_router_endpoint_wrapper_bound_options():
+    async def endpoint():
+        return {'foo': 'bar'}
+
+    def endpoint_with_status_code():
+        return {}, 400
+
+    endpoint.options = {'status_code': 201, 'response_class': ORJSONResponse}
+    router = Router()
+    wrapped = router._endpoint_wrapper(endpoint)
+
+    response = await wrapped()
+
+    assert response.body == b'{"foo":"bar"}'
+    assert response.status_code == 201
+
+    endpoint.options = {'status_code': 202}  # Bound on registration, not looked up per request
+    response = await wrapped()
+
+    assert response.status_code == 201
+
+    response = await router._endpoint_wrapper(endpoint_with_status_code)()
+
+    assert response.status_code == 400
+
+
+def test_router_fast_serialize(get_test_client, empty_app):
+    class _Route(Route):
+        @Route.option(fast_serialize=True, orjson_options=orjson.OPT_NON_STR_KEYS)
+        async def get():
+            return {1: decimal.Decimal('1.5')}, 201
+
+    router = Router()
+    router.Route('/')(_Route)
+
+    assert 'fast_serialize' not in router.routes[0].endpoint.options
+
+    empty_app.include_router(router)
+    response = get_test_client(empty_app).get('/')
+
+    assert response.status_code == 201
+    assert response.json() == {'1': '1.5'}
@@ -0,0 +1,62 @@
+import datetime
+import decimal
+import enum
+import orjson
+import pytest
+
+from pydantic import BaseModel
+
+from seed.models import UserModel
+from seed.serializer import FastORJSONResponse, ResponseSampler, dumps, orjson_default
+
+
+class _Color(enum.Enum):
+    RED = 'red'
+
+
+class _Schema(BaseModel):
+    foo: str
+
+
+def test_orjson_default():
+    created_at = datetime.datetime(2021, 1, 1, 12, 0, 0)
+    user = UserModel(id=1, email='foo@bar.com', username='foo', created_at=created_at)
+
+    assert orjson_default(decimal.Decimal('1.10')) == '1.10'
+    assert orjson_default(_Color.RED) == 'red'
+    assert orjson_default(_Schema(foo='bar')) == {'foo': 'bar'}
+    assert orjson_default({1}) == [1]
+    assert orjson_default(user)['created_at'] == created_at
+
+    with pytest.raises(TypeError):
+        orjson_default(object())
+
+
+def test_dumps():
+    assert orjson.loads(dumps({
+        'price': decimal.Decimal('9.99'),
+        'color': _Color.RED,
+        'at': datetime.datetime(2021, 1, 1),
+    })) == {'price': '9.99', 'color': 'red', 'at': '2021-01-01T00:00:00'}
+
+    assert dumps({'a': 1}, option=orjson.OPT_INDENT_2) == b'{\n  "a": 1\n}'
+
+
+def test_fast_orjson_response():
+    response = FastORJSONResponse({'foo': decimal.Decimal('1')}, status_code=201)
+
+    assert response.body == b'{"foo":"1"}'
+    assert response.status_code == 201
+    assert response.media_type == 'application/json'
+
+
+def test_response_sampler():
+    sampler = ResponseSampler(_Schema, name='test')
+    sampler._sample_rate = 1.0
+
+    assert sampler.check(b'{"foo":"bar"}')
+    assert not sampler.check(b'{"bar":"foo"}')
+
+    sampler._sample_rate = 0.0
+
+    assert sampler.check(b'{"bar":"foo"}')